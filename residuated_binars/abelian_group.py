@@ -17,7 +17,7 @@
 Abelian Group
 ==============
 """
-from typing import Dict
+from typing import Dict, Tuple
 
 from residuated_binars.algebraic_structure import AlgebraicStructure
 from residuated_binars.axiom_checkers import (
@@ -42,6 +42,8 @@ class AbelianGroup(AlgebraicStructure):
     <BLANKLINE>
     """
 
+    constant_symbols: Tuple[str, ...] = ("0",)
+
     def check_axioms(self) -> None:  # noqa: D102
         assert associative(self.operations["add"])
         assert commutative(self.operations["add"])
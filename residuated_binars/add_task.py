@@ -21,6 +21,8 @@ Script for adding a task
 -  creates a new file with the same name in another given folder
 -  the output file includes the same one lemma as the input
 -  but the ‘task’ is changed according to the script’s parameters
+-  every theory is parsed once into a ``TheoryTemplate``, which can be
+   rendered for any task and cardinality without parsing it again
 
 Possible task types:
 
@@ -32,8 +34,8 @@ Both task types have a hard-coded timeout of ``1000000`` seconds.
 
 """
 import os
-import re
 from enum import Enum
+from typing import Dict, List, Optional
 
 
 class TaskType(Enum):
@@ -43,16 +45,177 @@ class TaskType(Enum):
     NITPICK = "nitpick[timeout=1000000,max_threads=0]"
 
 
-def add_task(
-    source_path: str,
+DATATYPE_PREFIX = "datatype finite_type ="
+IMPORTS_PREFIX = "imports "
+
+
+def _with_task_lines(lines: List[str]) -> List[str]:
+    result: List[str] = []
+    for line in lines:
+        if line == "oops" and result[-1:] and result[-1].endswith('"'):
+            result.append("")
+        result.append(line)
+    return result
+
+
+def _slot_kind(lines: List[str], index: int) -> Optional[str]:
+    if lines[index].startswith(DATATYPE_PREFIX):
+        return "datatype"
+    if lines[index].startswith(IMPORTS_PREFIX):
+        return "imports"
+    if lines[index + 1 : index + 2] == ["oops"]:
+        return "task"
+    return None
+
+
+class TheoryTemplate:
+    r"""
+    A text of a theory with slots for imports, a finite type and tasks.
+
+    A theory is parsed once, and then it's rendered for any task and
+    cardinality without searching the text again.
+
+    >>> template = TheoryTemplate(
+    ...     "theory T0_1\nimports Main\n"
+    ...     "datatype finite_type = finite_type_constants\n"
+    ...     'lemma "(\na\n) \\<longrightarrow>\nb\n"\nsledgehammer\noops\n'
+    ...     'lemma "True"\noops\nend'
+    ... )
+    >>> print(template.render(TaskType.NITPICK, 3))
+    theory T0_1
+    imports Main
+    datatype finite_type = C0 | C1 | C2
+    lemma "(
+    a
+    ) \<longrightarrow>
+    b
+    "
+    nitpick[timeout=1000000,max_threads=0]
+    oops
+    lemma "True"
+    nitpick[timeout=1000000,max_threads=0]
+    oops
+    end
+    >>> template.task_count
+    2
+    >>> template.render(TaskType.SLEDGEHAMMER, imports="Session.Base")[:32]
+    'theory T0_1\nimports Session.Base'
+    """
+
+    def __init__(self, theory_text: str):
+        """
+        Split a theory into constant parts and slots.
+
+        A line of imports is a slot for a theory to import, a line declaring
+        ``finite_type`` is a slot for the type, and a line before ``oops`` is
+        a slot for a task (it's added if a lemma statement ends right before
+        ``oops``).
+
+        :param theory_text: a text of a theory file
+        """
+        lines = _with_task_lines(theory_text.split("\n"))
+        slots = [
+            index
+            for index in range(len(lines))
+            if _slot_kind(lines, index) is not None
+        ]
+        self.slots = [_slot_kind(lines, index) for index in slots]
+        self.imports = [
+            lines[index][len(IMPORTS_PREFIX) :]
+            for index in slots
+            if _slot_kind(lines, index) == "imports"
+        ]
+        self.parts = [
+            "\n".join(lines[start + 1 : end] + [""])
+            for start, end in zip([-1] + slots, slots)
+        ] + ["\n".join(lines[slots[-1] + 1 if slots else 0 :])]
+
+    @property
+    def task_count(self) -> int:
+        """Return a number of lemmas with tasks."""
+        return self.slots.count("task")
+
+    def render(
+        self,
+        task_type: TaskType,
+        cardinality: int = 1,
+        imports: Optional[str] = None,
+    ) -> str:
+        """
+        Fill the slots.
+
+        :param task_type: use Nitpick or Sledgehammer (disprove by finding a
+            finite counter-example or prove)
+        :param cardinality: a cardinality of finite model to find (only for
+            Nitpick tasks)
+        :param imports: a theory to import instead of the original ones
+        :returns: a text of a theory file
+        """
+        fillers = {
+            "task": task_type.value,
+            "datatype": f"{DATATYPE_PREFIX} "
+            + " | ".join(f"C{i}" for i in range(cardinality)),
+            "imports": IMPORTS_PREFIX
+            + (" ".join(self.imports) if imports is None else imports),
+        }
+        result = [self.parts[0]]
+        for kind, part in zip(self.slots, self.parts[1:]):
+            result.append(fillers[str(kind)])
+            result.append("\n" + part)
+        return "".join(result)
+
+
+def set_task(
+    theory_text: str, task_type: TaskType, cardinality: int = 1
+) -> str:
+    r"""
+    Change a task and a finite type in a text of a theory.
+
+    >>> print(set_task(
+    ...     "datatype finite_type = finite_type_constants\n"
+    ...     'lemma "True"\noops', TaskType.NITPICK, 2
+    ... ))
+    datatype finite_type = C0 | C1
+    lemma "True"
+    nitpick[timeout=1000000,max_threads=0]
+    oops
+
+    :param theory_text: a text of a theory file
+    :param task_type: use Nitpick or Sledgehammer (disprove by finding a finite
+        counter-example or prove)
+    :param cardinality: a cardinality of finite model to find (only for Nitpick
+        tasks)
+    :returns: a new text of a theory file
+    """
+    return TheoryTemplate(theory_text).render(task_type, cardinality)
+
+
+def load_templates(source_path: str) -> Dict[str, TheoryTemplate]:
+    """
+    Parse all theory files from a folder.
+
+    :param source_path: a directory with theory files
+    :returns: a map from file names to templates
+    """
+    templates = {}
+    for theory_name in os.listdir(source_path):
+        with open(
+            os.path.join(source_path, theory_name), "r", encoding="utf-8"
+        ) as theory_file:
+            templates[theory_name] = TheoryTemplate(theory_file.read())
+    return templates
+
+
+def write_tasks(
+    templates: Dict[str, TheoryTemplate],
     target_path: str,
     task_type: TaskType,
     cardinality: int = 1,
 ) -> None:
     """
-    Take theory files from an existing folder and change tasks in them.
+    Render templates with a given task and write them to files.
 
-    :param source_path: a directory where to get theory files to add tasks to
+    :param templates: a map from file names to templates
     :param target_path: where to put new theory files with added tasks
     :param task_type: use Nitpick or Sledgehammer (disprove by finding a finite
         counter-example or prove)
@@ -61,23 +224,32 @@ def add_task(
     """
     if not os.path.exists(target_path):
         os.mkdir(target_path)
-    for theory_name in os.listdir(source_path):
-        with open(
-            os.path.join(source_path, theory_name), "r", encoding="utf-8"
-        ) as theory_file:
-            theory_text = theory_file.read()
-        theory_text = re.sub(
-            "datatype finite_type =.*\n",
-            "datatype finite_type = "
-            + " | ".join(map(lambda i: "C" + str(i), range(cardinality)))
-            + "\n",
-            re.sub(
-                '"\n.*\n?oops',
-                '"\n' + task_type.value + "\noops",
-                theory_text,
-            ),
-        )
+    for theory_name, template in templates.items():
         with open(
             os.path.join(target_path, theory_name), "w", encoding="utf-8"
         ) as theory_file:
-            theory_file.write(theory_text)
+            theory_file.write(template.render(task_type, cardinality))
+
+
+def add_task(
+    source_path: str,
+    target_path: str,
+    task_type: TaskType,
+    cardinality: int = 1,
+) -> None:
+    """
+    Take theory files from an existing folder and change tasks in them.
+
+    To add tasks for several cardinalities, it's faster to call
+    ``load_templates`` once and ``write_tasks`` for every cardinality.
+
+    :param source_path: a directory where to get theory files to add tasks to
+    :param target_path: where to put new theory files with added tasks
+    :param task_type: use Nitpick or Sledgehammer (disprove by finding a finite
+        counter-example or prove)
+    :param cardinality: a cardinality of finite model to find (only for Nitpick
+        tasks)
+    """
+    write_tasks(
+        load_templates(source_path), target_path, task_type, cardinality
+    )
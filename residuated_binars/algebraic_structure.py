@@ -17,7 +17,8 @@
 Algebraic Structure
 ====================
 """
-from typing import Any, Dict, List, Union
+from io import StringIO
+from typing import Any, Dict, List, Optional, TextIO, Tuple, Union
 
 CayleyTable = Dict[str, Dict[str, str]]
 TOP = r"⟙"
@@ -64,6 +65,9 @@ class AlgebraicStructure:
     <BLANKLINE>
     """
 
+    constant_symbols: Tuple[str, ...] = ()
+    """Symbols of distinguished elements (constants of the signature)."""
+
     def __init__(
         self,
         label: str,
@@ -79,6 +83,25 @@ class AlgebraicStructure:
         self.operations = operations
         self.check_axioms()
 
+    @classmethod
+    def unchecked(
+        cls, label: str, operations: Dict[str, Dict[str, Any]]
+    ) -> Any:
+        """
+        Create a structure without checking its axioms.
+
+        This is for tables which are known to satisfy the axioms (like ones
+        read from a catalog of valid models).
+
+        :param label: an arbitrary name for an algebraic structure
+        :param operations: a dictionary of operations and their names
+        :returns: an instance of the class
+        """
+        structure = cls.__new__(cls)
+        structure.label = label
+        structure.operations = operations
+        return structure
+
     def check_axioms(self) -> None:
         """Check axioms specific to that algebraic structure.
 
@@ -102,9 +125,9 @@ class AlgebraicStructure:
                 for one in symbol_map.keys():
                     new_table[symbol_map[one]] = {}
                     for two in symbol_map.keys():
-                        new_table[symbol_map[one]][
-                            symbol_map[two]
-                        ] = symbol_map[operation[one][two]]
+                        new_table[symbol_map[one]][symbol_map[two]] = (
+                            symbol_map[operation[one][two]]
+                        )
                 self.operations[op_label] = new_table
             else:
                 new_op: Dict[str, str] = {}
@@ -143,24 +166,35 @@ class AlgebraicStructure:
 
         :returns: a string representation
         """
-        result = ""
+        stream = StringIO()
+        self.write_mace4(stream)
+        return stream.getvalue()
+
+    def write_mace4(self, stream: TextIO) -> None:
+        """
+        Write the algebraic structure in ``Prover9/Mace4`` format.
+
+        The order of symbols and the operation map are computed once, and
+        every operation is written with one call.
+
+        :param stream: a text stream to write to
+        """
+        symbols = self.symbols
+        operation_map = self.operation_map
         for op_label, operation in self.operations.items():
-            op_symbol = self.operation_map.get(op_label, None)
-            if isinstance(list(operation.items())[0][1], Dict):
-                for i in self.symbols:
-                    for j in self.symbols:
-                        if op_symbol is not None:
-                            result += (
-                                f"{i} {op_symbol} {j} = {operation[i][j]}.\n"
-                            )
-                        else:
-                            result += (
-                                f"{op_label}({i}, {j}) = {operation[i][j]}.\n"
-                            )
+            if isinstance(next(iter(operation.values())), Dict):
+                _write_binary_mace4(
+                    stream,
+                    op_label,
+                    operation_map.get(op_label, None),
+                    (symbols, operation),
+                )
             else:
-                for i in self.symbols:
-                    result += f"{op_label}({i}) = {operation[i]}.\n"
-        return result
+                stream.write(
+                    "".join(
+                        f"{op_label}({i}) = {operation[i]}.\n" for i in symbols
+                    )
+                )
 
     def _operation_tabular_view(
         self, operation: Dict[str, Any]
@@ -188,6 +222,172 @@ class AlgebraicStructure:
             for op_label, operation in self.operations.items()
         }
 
+    def product(self, *others: "AlgebraicStructure") -> Any:
+        """
+        Build a direct product of structures of the same class.
+
+        Tables are built from tables of element indices: an element of the
+        product ``(a, b)`` gets the index ``i(a) * |B| + i(b)``. Axioms of
+        all classes in the package are equations, which hold in products,
+        so the product is not checked again. Elements with equal
+        components keep their symbol (so ``⟘``, ``⟙``, ``0`` and ``1`` stay
+        distinguished) unless it's a symbol of a product itself, and the
+        others are named like ``(a, b)``, so names of elements of nested
+        products don't collide.
+
+        >>> join = {BOT: {BOT: BOT, TOP: TOP}, TOP: {BOT: TOP, TOP: TOP}}
+        >>> meet = {BOT: {BOT: BOT, TOP: BOT}, TOP: {BOT: BOT, TOP: TOP}}
+        >>> from residuated_binars.bounded_lattice import BoundedLattice
+        >>> chain = BoundedLattice("chain", {"join": join, "meet": meet})
+        >>> square = chain.product(chain)
+        >>> square.label, type(square).__name__, square.symbols
+        ('chain x chain', 'BoundedLattice', ['⟘', '(⟘, ⟙)', '(⟙, ⟘)', '⟙'])
+        >>> square.operations["join"]["(⟘, ⟙)"]["(⟙, ⟘)"]
+        '⟙'
+        >>> cube = chain.power(3)
+        >>> cube.label, cube.cardinality
+        ('chain^3', 8)
+        >>> _ = BoundedLattice(cube.label, cube.operations)
+        >>> involution = AlgebraicStructure(
+        ...     "invo", {"invo": {"a": "b", "b": "a"}}
+        ... )
+        >>> involution.power(2).operations["invo"]
+        {'a': 'b', '(a, b)': '(b, a)', '(b, a)': '(a, b)', 'b': 'a'}
+        >>> involution.power(2).power(2).cardinality
+        16
+        >>> hypercube = square.power(2)
+        >>> hypercube.cardinality, hypercube.symbols[1]
+        (16, '((⟘, ⟙), (⟘, ⟙))')
+        >>> _ = BoundedLattice(hypercube.label, hypercube.operations)
+        >>> AlgebraicStructure("commas", {"identity": {
+        ...     "a": "a", "a, b": "a, b", "b, c": "b, c", "c": "c"
+        ... }}).power(2)
+        Traceback (most recent call last):
+         ...
+        ValueError: ambiguous symbol of a product: (a, b, c)
+        >>> involution.product(chain)
+        Traceback (most recent call last):
+         ...
+        ValueError: can't multiply AlgebraicStructure and BoundedLattice
+        >>> involution.power(0)
+        Traceback (most recent call last):
+         ...
+        ValueError: a power must be positive: 0
+
+        :param others: structures of the same class and with the same
+            operations
+        :returns: the product (an instance of the same class)
+        :raises ValueError: if the structures are of different kinds or
+            symbols of their elements make names of the product's elements
+            ambiguous
+        """
+        for other in others:
+            if type(other) is not type(self) or set(other.operations) != set(
+                self.operations
+            ):
+                raise ValueError(
+                    f"can't multiply {type(self).__name__} "
+                    f"and {type(other).__name__}"
+                )
+        components: List[Tuple[str, ...]] = [
+            (symbol,) for symbol in self.symbols
+        ]
+        tables = self.tabular_format
+        for other in others:
+            components = [
+                old + (new,) for old in components for new in other.symbols
+            ]
+            tables = {
+                name: _product_table(
+                    table, other.tabular_format[name], other.cardinality
+                )
+                for name, table in tables.items()
+            }
+        return _from_tables(
+            type(self),
+            " x ".join(factor.label for factor in (self,) + others),
+            tables,
+            _product_symbols(components),
+        )
+
+    def power(self, exponent: int) -> Any:
+        """
+        Build a direct power of the structure (see ``product``).
+
+        :param exponent: a number of factors
+        :returns: the power (an instance of the same class)
+        :raises ValueError: if the exponent is not positive
+        """
+        if exponent < 1:
+            raise ValueError(f"a power must be positive: {exponent}")
+        result = self.product(*(exponent - 1) * [self])
+        result.label = f"{self.label}^{exponent}"
+        return result
+
     def __repr__(self):
         """Return a default representation --- the tabular format."""
         return str(self.tabular_format)
+
+
+def _product_table(first: Any, second: Any, size: int) -> Any:
+    if isinstance(first[0], list):
+        return [
+            [one * size + two for one in first_row for two in second_row]
+            for first_row in first
+            for second_row in second
+        ]
+    return [one * size + two for one in first for two in second]
+
+
+def _product_symbol(components: Tuple[str, ...]) -> str:
+    if len(set(components)) == 1 and not components[0].startswith("("):
+        return components[0]
+    return f"({', '.join(components)})"
+
+
+def _product_symbols(components: List[Tuple[str, ...]]) -> List[str]:
+    symbols = [_product_symbol(symbols) for symbols in components]
+    if len(set(symbols)) < len(symbols):
+        raise ValueError(
+            "ambiguous symbol of a product: "
+            + next(symbol for symbol in symbols if symbols.count(symbol) > 1)
+        )
+    return symbols
+
+
+def _from_tables(
+    cls: Any, label: str, tables: Dict[str, Any], symbols: List[str]
+) -> Any:
+    return cls.unchecked(
+        label,
+        {
+            name: {
+                symbols[one]: (
+                    {
+                        symbols[two]: symbols[value]
+                        for two, value in enumerate(row)
+                    }
+                    if isinstance(row, list)
+                    else symbols[row]
+                )
+                for one, row in enumerate(table)
+            }
+            for name, table in tables.items()
+        },
+    )
+
+
+def _write_binary_mace4(
+    stream: TextIO,
+    op_label: str,
+    op_symbol: Optional[str],
+    table: Tuple[List[str], CayleyTable],
+) -> None:
+    symbols, operation = table
+    middle = ") = " if op_symbol is None else " = "
+    for i in symbols:
+        left = (
+            f"{op_label}({i}, " if op_symbol is None else f"{i} {op_symbol} "
+        )
+        row = operation[i]
+        stream.write("".join(f"{left}{j}{middle}{row[j]}.\n" for j in symbols))
@@ -0,0 +1,526 @@
+# Copyright 2022 Boris Shminke
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# noqa: D205, D400
+"""
+Archive
+========
+
+A binary file format for large collections of models.
+
+-  a file starts with a magic string, a format version and a JSON header
+   describing blocks of data
+-  models with the same cardinality and operations are stored in one
+   block of ``uint8`` (or ``uint16`` for more than 256 elements)
+   operation tables, one model after another
+-  labels, classes and element symbols of models are kept in separate
+   arrays of the same block
+-  a file is opened with ``mmap``, so nothing is read until a model is
+   requested, and processes opening the same file share its memory
+
+"""
+import importlib
+import json
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+from itertools import accumulate, chain
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Union
+
+from residuated_binars.algebraic_structure import AlgebraicStructure
+
+MAGIC = b"RBINARS\x00"
+VERSION = 1
+PREFIX = struct.Struct("<8sII")
+ALIGNMENT = 8
+Signature = Tuple[int, Tuple[Tuple[str, int], ...]]
+
+
+def _aligned(size: int) -> int:
+    return -(-size // ALIGNMENT) * ALIGNMENT
+
+
+def class_name(structure: AlgebraicStructure) -> str:
+    """
+    Get a name of a class of a model by which it can be imported.
+
+    >>> class_name(AlgebraicStructure("test", {"invo": {"0": "0"}}))
+    'residuated_binars.algebraic_structure:AlgebraicStructure'
+
+    :param structure: a model
+    :returns: a module name and a qualified class name
+    """
+    return f"{type(structure).__module__}:{type(structure).__qualname__}"
+
+
+def import_class(full_name: str) -> Any:
+    """
+    Import a class by a name got from ``class_name``.
+
+    :param full_name: a module name and a qualified class name
+    :returns: the class
+    """
+    module_name, _, qualified_name = full_name.partition(":")
+    result: Any = importlib.import_module(module_name)
+    for name in qualified_name.split("."):
+        result = getattr(result, name)
+    return result
+
+
+class _BlockWriter:
+    """Arrays of a block of models with the same signature."""
+
+    def __init__(self, signature: Signature):
+        """
+        Start an empty block.
+
+        :param signature: a cardinality and operation names and arities
+        """
+        self.signature = signature
+        self.arrays = {
+            "tables": array("B" if signature[0] <= 256 else "H"),
+            "classes": array("H"),
+            "symbols": array("I"),
+            "label_offsets": array("I", [0]),
+            "labels": array("B"),
+        }
+
+    def add(
+        self,
+        structure: AlgebraicStructure,
+        tables: Dict[str, Any],
+        indices: Tuple[int, int],
+    ) -> None:
+        """
+        Append a model to the block.
+
+        :param structure: a model
+        :param tables: operation tables of the model in tabular format
+        :param indices: indices of a class and symbols of the model
+        """
+        for table in tables.values():
+            self.arrays["tables"].extend(
+                chain.from_iterable(table)  # type: ignore
+                if isinstance(table[0], list)
+                else table
+            )
+        self.arrays["classes"].append(indices[0])
+        self.arrays["symbols"].append(indices[1])
+        self.arrays["labels"].frombytes(structure.label.encode("utf-8"))
+        self.arrays["label_offsets"].append(len(self.arrays["labels"]))
+
+    def description(self) -> Dict[str, Any]:
+        """
+        Describe the block for a header.
+
+        :returns: a description without positions of arrays
+        """
+        return {
+            "cardinality": self.signature[0],
+            "operations": self.signature[1],
+            "typecode": self.arrays["tables"].typecode,
+            "count": len(self.arrays["classes"]),
+        }
+
+
+def _signature(tables: Dict[str, Any]) -> Signature:
+    return len(next(iter(tables.values()))), tuple(
+        (name, 2 if isinstance(table[0], list) else 1)
+        for name, table in tables.items()
+    )
+
+
+def write_archive(
+    file_name: str, structures: Iterable[AlgebraicStructure]
+) -> int:
+    """
+    Save models to an archive file.
+
+    Classes of models are saved by name, so they must be importable.
+
+    :param file_name: a name of an archive file to write
+    :param structures: models to save
+    :returns: a number of saved models
+    """
+    classes: Dict[str, int] = {}
+    symbols: Dict[Tuple[str, ...], int] = {}
+    blocks: Dict[Signature, _BlockWriter] = {}
+    for structure in structures:
+        tables = structure.tabular_format
+        signature = _signature(tables)
+        blocks.setdefault(signature, _BlockWriter(signature)).add(
+            structure,
+            tables,
+            (
+                classes.setdefault(class_name(structure), len(classes)),
+                symbols.setdefault(tuple(structure.symbols), len(symbols)),
+            ),
+        )
+    descriptions, buffers = _layout([blocks[key] for key in sorted(blocks)])
+    _write(
+        file_name,
+        json.dumps(
+            {
+                "byteorder": sys.byteorder,
+                "classes": list(classes),
+                "symbols": list(symbols),
+                "blocks": descriptions,
+            }
+        ).encode("utf-8"),
+        buffers,
+    )
+    return sum(description["count"] for description in descriptions)
+
+
+def _layout(
+    blocks: List[_BlockWriter],
+) -> Tuple[List[Dict[str, Any]], List[bytes]]:
+    descriptions: List[Dict[str, Any]] = []
+    buffers: List[bytes] = []
+    offset = 0
+    for block in blocks:
+        descriptions.append(block.description())
+        for field, data in block.arrays.items():
+            buffers.append(data.tobytes())
+            descriptions[-1][field] = [offset, len(buffers[-1])]
+            offset += _aligned(len(buffers[-1]))
+    return descriptions, buffers
+
+
+def _write(file_name: str, header: bytes, buffers: List[bytes]) -> None:
+    with open(file_name, "wb") as archive_file:
+        archive_file.write(PREFIX.pack(MAGIC, VERSION, len(header)))
+        for buffer in [header] + buffers:
+            archive_file.write(buffer)
+            archive_file.write(
+                bytes(_aligned(archive_file.tell()) - archive_file.tell())
+            )
+
+
+def _view(data: Any, start: int, size: int, typecode: str) -> memoryview:
+    return data[start : start + size].cast(typecode)
+
+
+class _Block:
+    """Zero-copy views of arrays of a block of models."""
+
+    def __init__(
+        self, description: Dict[str, Any], data: memoryview, start: int
+    ):
+        """
+        Map arrays of a block.
+
+        :param description: a description of the block from a header
+        :param data: a view of a whole archive file
+        :param start: a position where data blocks start
+        """
+        self.cardinality: int = description["cardinality"]
+        self.count: int = description["count"]
+        self.operations: List[Tuple[str, int]] = [
+            tuple(operation) for operation in description["operations"]
+        ]
+        self.record_size = sum(
+            self.cardinality**arity for _, arity in self.operations
+        )
+        self.arrays: Dict[str, Any] = {
+            field: _view(
+                data,
+                start + description[field][0],
+                description[field][1],
+                typecode,
+            )
+            for field, typecode in (
+                ("tables", description["typecode"]),
+                ("classes", "H"),
+                ("symbols", "I"),
+                ("label_offsets", "I"),
+                ("labels", "B"),
+            )
+        }
+
+    def label(self, position: int) -> str:
+        """
+        Get a label of a model.
+
+        :param position: a position of a model in the block
+        :returns: a label
+        """
+        offsets = self.arrays["label_offsets"]
+        return bytes(
+            self.arrays["labels"][offsets[position] : offsets[position + 1]]
+        ).decode("utf-8")
+
+    def tables(self, position: int) -> Dict[str, Any]:
+        """
+        Get operation tables of a model without copying.
+
+        :param position: a position of a model in the block
+        :returns: a map from operation names to flat tables
+        """
+        result = {}
+        start = position * self.record_size
+        for name, arity in self.operations:
+            size = self.cardinality**arity
+            result[name] = self.arrays["tables"][start : start + size]
+            start += size
+        return result
+
+
+def _map(file_name: str) -> Tuple[mmap.mmap, Dict[str, Any]]:
+    with open(file_name, "rb") as archive_file:
+        data = mmap.mmap(archive_file.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        return data, _read_header(data, file_name)
+    except ValueError:
+        data.close()
+        raise
+
+
+def _read_header(data: mmap.mmap, file_name: str) -> Dict[str, Any]:
+    magic, version, header_size = PREFIX.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"not a model archive: {file_name}")
+    if version != VERSION:
+        raise ValueError(f"unsupported archive version: {version}")
+    header = json.loads(data[PREFIX.size : PREFIX.size + header_size])
+    if header["byteorder"] != sys.byteorder:
+        raise ValueError(f"archive byte order is {header['byteorder']}")
+    header["start"] = _aligned(PREFIX.size + header_size)
+    return header
+
+
+def _operation(
+    symbols: List[str], table: memoryview, arity: int
+) -> Dict[str, Any]:
+    values = [symbols[value] for value in table]
+    if arity == 1:
+        return dict(zip(symbols, values))
+    return {
+        one: dict(
+            zip(symbols, values[i * len(symbols) : (i + 1) * len(symbols)])
+        )
+        for i, one in enumerate(symbols)
+    }
+
+
+class ModelArchive:
+    """
+    A read-only collection of models stored in an archive file.
+
+    >>> import sys
+    >>> if sys.version_info.major == 3 and sys.version_info.minor >= 9:
+    ...     from importlib.resources import files
+    ... else:
+    ...     from importlib_resources import files
+    >>> from residuated_binars.parser import iterate_algebras
+    >>> from residuated_binars.lattice import Lattice
+    >>> binars = list(iterate_algebras(
+    ...     files("residuated_binars").joinpath("resources/isabelle2.out")
+    ... ))
+    >>> join = {"0": {"0": "0", "1": "1"}, "1": {"0": "1", "1": "1"}}
+    >>> meet = {"0": {"0": "0", "1": "0"}, "1": {"0": "0", "1": "1"}}
+    >>> lattice = Lattice("lattice", {"join": join, "meet": meet})
+    >>> write_archive("test.rba", binars + [lattice])
+    7
+    >>> with ModelArchive("test.rba") as archive:
+    ...     print(len(archive), archive.cardinalities)
+    ...     print(archive.label(0), type(archive[0]).__name__, archive[0])
+    ...     print({
+    ...         name: table.tolist()
+    ...         for name, table in archive.tables(0).items()
+    ...     })
+    ...     print(len(archive[:2]), archive[-1].label == binars[-1].label)
+    ...     print(archive.indices(7), archive.indices(3))
+    7 [2, 7]
+    lattice Lattice {'join': [[0, 1], [1, 1]], 'meet': [[0, 0], [0, 1]]}
+    {'join': [0, 1, 1, 1], 'meet': [0, 0, 0, 1]}
+    2 True
+    [1, 2, 3, 4, 5, 6] []
+    >>> archive = ModelArchive("test.rba")
+    >>> [structure.label for structure in archive] == ["lattice"] + [
+    ...     binar.label for binar in binars
+    ... ]
+    True
+    >>> archive[1].tabular_format == binars[0].tabular_format
+    True
+    >>> unchecked = archive.load(1, validate=False)
+    >>> type(unchecked) is type(binars[0]), unchecked.label == binars[0].label
+    (True, True)
+    >>> import pickle
+    >>> pickle.loads(pickle.dumps(archive)).label(1) == binars[0].label
+    True
+    >>> archive[7]
+    Traceback (most recent call last):
+     ...
+    IndexError: archive index out of range
+    >>> archive.close()
+    >>> with open("test.rba", "wb") as archive_file:
+    ...     _ = archive_file.write(PREFIX.pack(MAGIC, 0, 0))
+    >>> ModelArchive("test.rba")
+    Traceback (most recent call last):
+     ...
+    ValueError: unsupported archive version: 0
+    >>> with open("test.rba", "wb") as archive_file:
+    ...     _ = archive_file.write(PREFIX.pack(b"RBINARS?", VERSION, 0))
+    >>> ModelArchive("test.rba")
+    Traceback (most recent call last):
+     ...
+    ValueError: not a model archive: test.rba
+    >>> header = b'{"byteorder": "other"}'
+    >>> with open("test.rba", "wb") as archive_file:
+    ...     _ = archive_file.write(PREFIX.pack(MAGIC, VERSION, len(header)))
+    ...     _ = archive_file.write(header)
+    >>> ModelArchive("test.rba")
+    Traceback (most recent call last):
+     ...
+    ValueError: archive byte order is other
+    >>> import os
+    >>> os.remove("test.rba")
+    """
+
+    def __init__(self, file_name: str):
+        """
+        Map an archive file to memory and read its header.
+
+        :param file_name: a name of an archive file
+        :raises ValueError: if the file is not an archive of a known version
+        """
+        self.file_name = file_name
+        self._mmap, header = _map(file_name)
+        self._data = memoryview(self._mmap)
+        self.class_names: List[str] = header["classes"]
+        self.symbols: List[List[str]] = header["symbols"]
+        self.blocks = [
+            _Block(description, self._data, header["start"])
+            for description in header["blocks"]
+        ]
+        self._starts = list(
+            accumulate([0] + [block.count for block in self.blocks])
+        )
+
+    @property
+    def cardinalities(self) -> List[int]:
+        """Return cardinalities of models in every block."""
+        return [block.cardinality for block in self.blocks]
+
+    def indices(self, cardinality: int) -> List[int]:
+        """
+        Get indices of models of a given cardinality.
+
+        :param cardinality: a cardinality of models
+        :returns: indices of models in the archive
+        """
+        return [
+            index
+            for block_index, block in enumerate(self.blocks)
+            if block.cardinality == cardinality
+            for index in range(
+                self._starts[block_index], self._starts[block_index + 1]
+            )
+        ]
+
+    def __len__(self) -> int:
+        """Return the number of models."""
+        return self._starts[-1]
+
+    def _locate(self, index: int) -> Tuple[_Block, int]:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("archive index out of range")
+        block_index = bisect_right(self._starts, index) - 1
+        return self.blocks[block_index], index - self._starts[block_index]
+
+    def label(self, index: int) -> str:
+        """
+        Get a label of a model without reading its tables.
+
+        :param index: an index of a model
+        :returns: a label
+        """
+        block, position = self._locate(index)
+        return block.label(position)
+
+    def tables(self, index: int) -> Dict[str, memoryview]:
+        """
+        Get flat operation tables of a model as views of the file.
+
+        The views must be released before closing the archive.
+
+        :param index: an index of a model
+        :returns: a map from operation names to tables (a binary operation
+            table is stored row by row)
+        """
+        block, position = self._locate(index)
+        return block.tables(position)
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[AlgebraicStructure, List[AlgebraicStructure]]:
+        """
+        Load a model (or a list of them).
+
+        :param index: an index of a model or a slice
+        :returns: a model (an instance of the class it was saved from)
+        """
+        if isinstance(index, slice):
+            return [self.load(i) for i in range(*index.indices(len(self)))]
+        return self.load(index)
+
+    def __iter__(self) -> Iterator[AlgebraicStructure]:
+        """Load models one by one."""
+        return map(self.load, range(len(self)))
+
+    def load(self, index: int, validate: bool = True) -> AlgebraicStructure:
+        """
+        Load a model.
+
+        :param index: an index of a model
+        :param validate: whether to check axioms of the model's class (it's
+            safe to skip for archives written from valid models)
+        :returns: a model (an instance of the class it was saved from)
+        """
+        block, position = self._locate(index)
+        symbols = self.symbols[block.arrays["symbols"][position]]
+        tables = block.tables(position)
+        cls = import_class(self.class_names[block.arrays["classes"][position]])
+        operations = {
+            name: _operation(symbols, tables[name], arity)
+            for name, arity in block.operations
+        }
+        return (cls if validate else cls.unchecked)(
+            block.label(position), operations
+        )
+
+    def close(self) -> None:
+        """Release all the views of the file and unmap it."""
+        for block in self.blocks:
+            for view in block.arrays.values():
+                view.release()
+        self._data.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "ModelArchive":
+        """Use an archive as a context manager."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Close an archive on exit."""
+        self.close()
+
+    def __reduce__(self) -> Tuple[Any, Tuple[str]]:
+        """Reopen an archive by name (for sending it to another process)."""
+        return ModelArchive, (self.file_name,)
@@ -53,6 +53,8 @@ class BooleanRing(AbelianGroup):
     <BLANKLINE>
     """
 
+    constant_symbols = ("0", "1")
+
     def check_axioms(self) -> None:  # noqa: D102
         super().check_axioms()
         assert associative(self.operations["mult"])
@@ -39,6 +39,8 @@ class BoundedLattice(Lattice):
     {'join': [[0, 1], [1, 1]], 'meet': [[0, 0], [0, 1]]}
     """
 
+    constant_symbols = (BOT, TOP)
+
     def check_axioms(self) -> None:  # noqa: D102
         super().check_axioms()
         assert is_left_identity(self.operations["meet"], TOP)
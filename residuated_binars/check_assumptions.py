@@ -21,18 +21,22 @@ Check Assumptions
 -  constructs a command for Isabelle server to process these files
 -  saves the log of Isabelle server replies to the file named
    ``isabelle.out`` in the directory where the theory files are
+-  ``check_assumptions_async`` does the same without blocking the event
+   loop, sending several requests to several servers at once
 
 This script depends on `Python client for Isabelle
 server <https://pypi.org/project/isabelle-client>`__.
 
 """
+import asyncio
+import json
 import logging
 import os
 import sys
-from typing import Optional
+from typing import Any, Dict, List, Optional, Sequence
 
 import nest_asyncio
-from isabelle_client import get_isabelle_client
+from isabelle_client import IsabelleClient, get_isabelle_client
 from isabelle_client.utils import start_isabelle_server
 
 
@@ -46,6 +50,7 @@ def get_customised_logger(task_folder: str) -> logging.Logger:
     if os.path.exists(logfile_name):
         os.remove(logfile_name)
     logger = logging.getLogger(os.path.basename(task_folder))
+    _close_handlers(logger)
     handler = logging.FileHandler(logfile_name)
     handler.setFormatter(logging.Formatter("%(asctime)s: %(message)s"))
     logger.addHandler(handler)
@@ -53,31 +58,184 @@ def get_customised_logger(task_folder: str) -> logging.Logger:
     return logger
 
 
-def check_assumptions(path: str, server_info: Optional[str] = None) -> None:
+def _close_handlers(logger: logging.Logger) -> None:
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+
+
+def check_assumptions(
+    path: str,
+    server_info: Optional[str] = None,
+    theories: Optional[List[str]] = None,
+    session: Optional[Dict[str, Any]] = None,
+) -> None:
     """
     Ask Isabelle server to process all theory files in a given path.
 
     :param path: a folder with theory files
     :param server_info: an info string of an Isabelle server
+    :param theories: names of theories to process; if ``None``, all theory
+        files from the ``path`` are processed
+    :param session: arguments of ``session_start`` (like
+        ``PrebuiltSession.start_arguments``); by default, ``HOL`` session
+        is used
     """
     nest_asyncio.apply()
-    theories = [
-        theory_name[0]
-        for theory_name in [
-            os.path.splitext(theory_file) for theory_file in os.listdir(path)
+    if theories is None:
+        theories = [
+            theory_name[0]
+            for theory_name in [
+                os.path.splitext(theory_file)
+                for theory_file in os.listdir(path)
+            ]
+            if theory_name[1] == ".thy"
         ]
-        if theory_name[1] == ".thy"
-    ]
     new_server_info = _start_server_if_needed(path, server_info)
     isabelle_client = get_isabelle_client(new_server_info)
     isabelle_client.logger = get_customised_logger(path)
-    isabelle_client.use_theories(
-        theories=theories, master_dir=get_abs_path(path), watchdog_timeout=0
-    )
+    _use_theories_in_session(isabelle_client, path, theories, session)
     if server_info is None:
         isabelle_client.shutdown()
 
 
+def _use_theories_in_session(
+    isabelle_client: IsabelleClient,
+    path: str,
+    theories: List[str],
+    session: Optional[Dict[str, Any]],
+) -> None:
+    session_id = (
+        None if session is None else isabelle_client.session_start(**session)
+    )
+    isabelle_client.use_theories(
+        theories=theories,
+        session_id=session_id,
+        master_dir=get_abs_path(path),
+        watchdog_timeout=0,
+    )
+    if session_id is not None:
+        isabelle_client.session_stop(session_id)
+
+
+async def check_assumptions_async(
+    path: str,
+    server_infos: Sequence[str],
+    theory_batches: Sequence[List[str]],
+    max_in_flight: int = 4,
+    session: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Ask Isabelle servers to process batches of theory files concurrently.
+
+    Every batch is sent as a separate ``use_theories`` request. Requests are
+    distributed between servers in turn (one session per server), and no
+    more than ``max_in_flight`` of them are waited for at once. If the
+    coroutine is cancelled, the requests in flight are cancelled too, and
+    the sessions are stopped.
+
+    >>> from residuated_binars.fake_isabelle_server import (
+    ...     FakeIsabelleServer
+    ... )
+    >>> servers = [FakeIsabelleServer(latency=0.01), FakeIsabelleServer()]
+    >>> server_infos = [server.start() for server in servers]
+    >>> os.mkdir("test-async")
+    >>> asyncio.run(check_assumptions_async(
+    ...     "test-async", server_infos, [["T105"], ["T106"], ["T107"]], 2
+    ... ))
+    >>> [server.theories_processed for server in servers]
+    [2, 1]
+    >>> async def cancel_soon():
+    ...     task = asyncio.ensure_future(
+    ...         check_assumptions_async("test-async", server_infos, [["T1"]])
+    ...     )
+    ...     await asyncio.sleep(0.001)
+    ...     task.cancel()
+    ...     await asyncio.wait([task])
+    ...     return task.cancelled()
+    >>> asyncio.run(cancel_soon())
+    True
+    >>> for server in servers:
+    ...     server.stop()
+    >>> import shutil
+    >>> shutil.rmtree("test-async")
+
+    :param path: a folder with theory files
+    :param server_infos: info strings of running Isabelle servers
+    :param theory_batches: names of theories to process in one request
+    :param max_in_flight: a maximal number of simultaneous requests
+    :param session: arguments of ``session_start`` (like
+        ``PrebuiltSession.start_arguments``); by default, ``HOL`` session
+        is used
+    """
+    clients = _get_clients(path, server_infos)
+    session_ids = await asyncio.gather(
+        *(
+            _start_session(client, session or {"session": "HOL"})
+            for client in clients
+        )
+    )
+    semaphore = asyncio.Semaphore(max_in_flight)
+    requests = [
+        asyncio.ensure_future(
+            _use_theories(
+                clients[index % len(clients)],
+                {
+                    "session_id": session_ids[index % len(clients)],
+                    "theories": theories,
+                    "master_dir": get_abs_path(path),
+                    "watchdog_timeout": 0,
+                },
+                semaphore,
+            )
+        )
+        for index, theories in enumerate(theory_batches)
+    ]
+    try:
+        await asyncio.gather(*requests)
+    finally:
+        for request in requests:
+            request.cancel()
+        await asyncio.gather(
+            *(
+                client.execute_command(
+                    f"session_stop {json.dumps({'session_id': session_id})}"
+                )
+                for client, session_id in zip(clients, session_ids)
+            )
+        )
+
+
+def _get_clients(
+    path: str, server_infos: Sequence[str]
+) -> List[IsabelleClient]:
+    logger = get_customised_logger(path)
+    clients = [
+        get_isabelle_client(server_info) for server_info in server_infos
+    ]
+    for client in clients:
+        client.logger = logger
+    return clients
+
+
+async def _start_session(
+    client: IsabelleClient, arguments: Dict[str, Any]
+) -> str:
+    response = (
+        await client.execute_command(f"session_start {json.dumps(arguments)}")
+    )[-1]
+    if response.response_type != "FINISHED":
+        raise ValueError(f"Unexpected response type: {response.response_type}")
+    return json.loads(response.response_body)["session_id"]
+
+
+async def _use_theories(
+    client: IsabelleClient, arguments: dict, semaphore: asyncio.Semaphore
+) -> None:
+    async with semaphore:
+        await client.execute_command(f"use_theories {json.dumps(arguments)}")
+
+
 def get_abs_path(path: str) -> str:
     """
     Get an absolute path on Windows or Linux.
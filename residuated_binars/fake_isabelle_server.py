@@ -0,0 +1,309 @@
+# Copyright 2022 Boris Shminke
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# noqa: D205, D400
+"""
+Fake Isabelle Server
+=====================
+
+A local stand-in for Isabelle server for load-testing the pipeline on
+machines without Isabelle.
+
+-  speaks the same TCP protocol (a password, then a command; ``OK``,
+   ``NOTE``, ``FINISHED``, ``FAILED``, and ``ERROR`` replies, the long
+   ones prefixed by their length)
+-  replays theory nodes recorded in ``resources/isabelle.out`` and
+   ``resources/isabelle2.out`` (a theory with an unknown name gets one of
+   the recorded nodes in turn)
+-  simulates processing time of every theory and a limited number of
+   worker threads
+-  fails a given share of ``use_theories`` requests
+-  counts requests and how many of them were processed simultaneously
+
+"""
+import asyncio
+import json
+import random
+import sys
+import threading
+import uuid
+from typing import Any, Dict, List, Optional, Sequence
+
+from residuated_binars.isabelle_log import iterate_nodes
+
+if sys.version_info.major == 3 and sys.version_info.minor >= 9:
+    # pylint: disable=no-name-in-module
+    from importlib.resources import files  # type: ignore
+else:
+    from importlib_resources import files  # pylint: disable=import-error
+
+HELLO = {"isabelle_id": "fake", "isabelle_version": "Isabelle2021"}
+
+
+def read_recorded_nodes(log_file_names: Sequence[Any]) -> Dict[str, Any]:
+    """
+    Read theory nodes from ``FINISHED`` replies saved in log files.
+
+    >>> nodes = read_recorded_nodes(RECORDED_LOGS)
+    >>> len(nodes)
+    234
+    >>> nodes["T105"]["messages"][2]["message"][:20]
+    'Nitpick found a pote'
+
+    :param log_file_names: names of files with Isabelle server replies
+    :returns: a map from theory names to their nodes
+    """
+    return {
+        node["theory_name"].split(".")[-1]: node
+        for log_file_name in log_file_names
+        for node in iterate_nodes(log_file_name)
+    }
+
+
+RECORDED_LOGS = [
+    files("residuated_binars").joinpath("resources/isabelle.out"),
+    files("residuated_binars").joinpath("resources/isabelle2.out"),
+]
+
+
+def _encode(response_type: str, body: Any) -> bytes:
+    message = (
+        f"{response_type} {json.dumps(body, separators=(',', ':'))}"
+    ).encode("utf-8")
+    if len(message) > 100:
+        return f"{len(message) + 1}\n".encode("utf-8") + message + b"\n"
+    return message + b"\n"
+
+
+class FakeIsabelleServer:
+    """
+    A fake Isabelle server replaying recorded replies.
+
+    >>> server = FakeIsabelleServer(latency=0.01)
+    >>> server_info = server.start()
+    >>> server_info.startswith('server "fake" = 127.0.0.1:')
+    True
+    >>> from isabelle_client import get_isabelle_client
+    >>> client = get_isabelle_client(server_info)
+    >>> response = client.use_theories(["T105", "Unknown"], master_dir=".")
+    >>> response[-1].response_type
+    'FINISHED'
+    >>> [
+    ...     node["theory_name"]
+    ...     for node in json.loads(response[-1].response_body)["nodes"]
+    ... ]
+    ['Draft.T105', 'Draft.Unknown']
+    >>> client.echo("test")[-1].response_body
+    '"test"'
+    >>> client.help()[-1].response_type
+    'OK'
+    >>> client.purge_theories("test", [])[-1].response_body
+    '{"purged":[],"retained":[]}'
+    >>> client.session_build("test")[-1].response_type
+    'FINISHED'
+    >>> client.cancel("test")[-1].response_type
+    'OK'
+    >>> asyncio.run(client.execute_command("wrong"))[-1].response_type
+    'ERROR'
+    >>> server.theories_processed
+    2
+    >>> client.shutdown()[-1].response_type
+    'OK'
+    >>> server.stop()
+    """
+
+    # pylint: disable=too-many-instance-attributes
+    def __init__(
+        self,
+        recorded_logs: Optional[Sequence[Any]] = None,
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        threads: int = 8,
+        seed: int = 0,
+    ):
+        """
+        Prepare recorded replies.
+
+        :param recorded_logs: names of files with Isabelle server replies to
+            replay; by default, the ones from the package resources
+        :param latency: seconds spent on every theory
+        :param failure_rate: a share of ``use_theories`` requests to fail
+        :param threads: how many theories are processed simultaneously
+        :param seed: a seed for choosing requests to fail
+        """
+        self.nodes = read_recorded_nodes(
+            RECORDED_LOGS if recorded_logs is None else recorded_logs
+        )
+        self._node_list = list(self.nodes.values())
+        self.latency, self.failure_rate, self.threads = (
+            latency,
+            failure_rate,
+            threads,
+        )
+        self.password = uuid.uuid4().hex
+        self._random = random.Random(seed)
+        self.requests_in_flight, self.max_requests_in_flight = 0, 0
+        self.theories_processed = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, port: int = 0) -> str:
+        """
+        Start the server in a background thread.
+
+        :param port: a port to listen; by default, any free one
+        :returns: a line of server info in the same format as Isabelle's
+        """
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, daemon=True
+        )
+        self._thread.start()
+        server = asyncio.run_coroutine_threadsafe(
+            self._start_server(port), self._loop
+        ).result()
+        address, real_port = server.sockets[0].getsockname()[:2]
+        return (
+            f'server "fake" = {address}:{real_port} '
+            f'(password "{self.password}")'
+        )
+
+    async def _start_server(self, port: int) -> asyncio.Server:
+        # pylint: disable=attribute-defined-outside-init
+        self._semaphore = asyncio.Semaphore(self.threads)
+        self._server = await asyncio.start_server(
+            self._handle, "127.0.0.1", port
+        )
+        return self._server
+
+    def stop(self) -> None:
+        """Stop the server and its thread."""
+        if self._loop is not None and self._thread is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._loop = None
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        password = (await reader.readline()).decode("utf-8").strip()
+        if password == self.password:
+            writer.write(_encode("OK", HELLO))
+            command = (await reader.readline()).decode("utf-8").strip()
+            name, _, arguments = command.partition(" ")
+            await self._execute(
+                name, json.loads(arguments) if arguments else None, writer
+            )
+            await writer.drain()
+        writer.close()
+
+    async def _execute(
+        self, name: str, arguments: Any, writer: asyncio.StreamWriter
+    ) -> None:
+        if name in {"session_start", "session_stop", "session_build"}:
+            await self._run_task(writer, lambda task: self._session(name))
+        elif name == "use_theories":
+            await self._run_task(
+                writer,
+                lambda task: self._use_theories(
+                    arguments["theories"], task, writer
+                ),
+            )
+        elif name == "shutdown":
+            writer.write(b"OK\n")
+            self._server.close()
+        else:
+            writer.write(_simple_reply(name, arguments))
+
+    async def _run_task(self, writer: asyncio.StreamWriter, job: Any) -> None:
+        task = str(uuid.uuid4())
+        writer.write(_encode("OK", {"task": task}))
+        response_type, body = await job(task)
+        body["task"] = task
+        writer.write(_encode(response_type, body))
+
+    async def _session(self, name: str) -> Any:
+        await asyncio.sleep(0)
+        if name == "session_start":
+            return "FINISHED", {
+                "session_id": str(uuid.uuid4()),
+                "tmp_dir": "/tmp/fake",
+            }
+        return "FINISHED", {"ok": True, "return_code": 0}
+
+    async def _use_theories(
+        self, theories: List[str], task: str, writer: asyncio.StreamWriter
+    ) -> Any:
+        self.requests_in_flight += 1
+        self.max_requests_in_flight = max(
+            self.max_requests_in_flight, self.requests_in_flight
+        )
+        try:
+            nodes = await asyncio.gather(
+                *(
+                    self._process_theory(theory_name, index, task, writer)
+                    for index, theory_name in enumerate(theories)
+                )
+            )
+        finally:
+            self.requests_in_flight -= 1
+        if self._random.random() < self.failure_rate:
+            return "FAILED", {"kind": "error", "message": "Fake failure"}
+        return "FINISHED", {"ok": True, "errors": [], "nodes": list(nodes)}
+
+    async def _process_theory(
+        self,
+        theory_name: str,
+        index: int,
+        task: str,
+        writer: asyncio.StreamWriter,
+    ) -> Any:
+        async with self._semaphore:
+            for percentage in (0, 100):
+                writer.write(
+                    _encode(
+                        "NOTE",
+                        {
+                            "kind": "writeln",
+                            "message": f"theory Draft.{theory_name} "
+                            f"{percentage}%",
+                            "percentage": percentage,
+                            "task": task,
+                            "theory": f"Draft.{theory_name}",
+                        },
+                    )
+                )
+                await asyncio.sleep(self.latency / 2)
+        self.theories_processed += 1
+        node = dict(
+            self.nodes.get(
+                theory_name, self._node_list[index % len(self._node_list)]
+            )
+        )
+        node["theory_name"] = f"Draft.{theory_name}"
+        return node
+
+
+def _simple_reply(name: str, arguments: Any) -> bytes:
+    if name == "echo":
+        return _encode("OK", arguments)
+    if name == "help":
+        return _encode("OK", ["cancel", "echo", "help", "use_theories"])
+    if name == "purge_theories":
+        return _encode("OK", {"purged": [], "retained": []})
+    if name == "cancel":
+        return b"OK\n"
+    return _encode("ERROR", f"Bad command '{name}'")
@@ -21,14 +21,275 @@ Filter Theories
    directory should be an output of ``check_assumption.py`` script)
 -  filters only those theory files, for which neither finite model was
    found, nor the proof (depending on the task type)
+-  if a theory file contains several named lemmas, the results are
+   reported for every lemma separately
 -  copies filtered theory files from the input directory to another
-   given directory
+   given directory (an open lemma of a theory with several named lemmas
+   gets a theory file of its own)
+-  copies theory files without tasks (like ``Definitions.thy``) as they
+   are, since other theories may import them
+-  ``read_theory_results`` reads the server's output once and keeps a
+   status, the relevant message, and a (lazily parsed) model for every
+   theory, so that filtering and loading models share one pass
 
 """
-import json
 import os
-import re
 import shutil
+from enum import Enum
+from typing import Dict, List, Optional
+
+from residuated_binars.algebraic_structure import AlgebraicStructure
+from residuated_binars.isabelle_log import (
+    get_lemma_names,
+    iterate_nodes,
+    split_by_lemma,
+)
+from residuated_binars.parser import isabelle_format_to_algebra
+
+
+class ResultStatus(Enum):
+    """A result of checking a theory (in order of priority)."""
+
+    PROOF = "Try this: "
+    TIMEOUT = "Timed out"
+    POTENTIALLY_SPURIOUS = (
+        "Nitpick found a potentially spurious counterexample"
+    )
+    COUNTEREXAMPLE = "Nitpick found a counterexample"
+    NONE = "Nitpick found no counterexample"
+
+
+RESULT_MESSAGES = tuple(status.value for status in ResultStatus)
+OPEN_RESULTS = (ResultStatus.NONE.value, ResultStatus.TIMEOUT.value)
+
+
+class TheoryResult:
+    r"""
+    Messages about one theory (or lemma) and what follows from them.
+
+    >>> result = TheoryResult("T0_1", [
+    ...     "Nitpicking formula...",
+    ...     "Nitpick found a counterexample:\n"
+    ...     "    join = (\\<lambda>x. _)((a, a) := a, (a, b) := b,"
+    ...     " (b, a) := b, (b, b) := b)"
+    ... ])
+    >>> result.status.name, result.is_open
+    ('COUNTEREXAMPLE', False)
+    >>> result.model
+    {'join': [[0, 1], [1, 1]]}
+    >>> result.model is result.model
+    True
+    >>> print(TheoryResult("T1_0", ["Timed out"]).model)
+    None
+    >>> print(TheoryResult("T1_0", ["Nitpicking formula..."]).status)
+    None
+    """
+
+    def __init__(self, name: str, messages: List[str]):
+        """
+        Classify a theory by the first relevant message.
+
+        :param name: a name of a theory or a lemma
+        :param messages: messages about it from Isabelle server
+        """
+        self.name = name
+        self.messages = messages
+        self.status: Optional[ResultStatus] = None
+        self.message: Optional[str] = None
+        for message in messages:
+            for status in ResultStatus:
+                if self.status is None and status.value in message:
+                    self.status, self.message = status, message
+        self._model: Optional[AlgebraicStructure] = None
+
+    @property
+    def is_open(self) -> bool:
+        """Return whether neither a counter-example nor a proof is found."""
+        return self.status is None or self.status.value in OPEN_RESULTS
+
+    @property
+    def model_message(self) -> Optional[str]:
+        """Return the first message with a model (if any)."""
+        return next(
+            (message for message in self.messages if "lambda" in message),
+            None,
+        )
+
+    @property
+    def model(self) -> Optional[AlgebraicStructure]:
+        """
+        Return a model parsed from the first message with it.
+
+        The model is parsed on the first access only.
+
+        :raises ValueError: if the model breaks axioms of its structure
+        """
+        if self._model is None and self.model_message is not None:
+            self._model = isabelle_format_to_algebra(
+                self.model_message, self.name
+            )
+        return self._model
+
+
+def read_theory_results(
+    log_file_name: str, source_path: Optional[str] = None
+) -> Dict[str, TheoryResult]:
+    """
+    Read results of all theories from a log of Isabelle server replies.
+
+    If there were several ``use_theories`` requests, the nodes from all of
+    their replies are taken. The nodes are read one by one, so the whole
+    reply is never loaded into memory, but messages of all theories are
+    kept.
+
+    >>> import sys
+    >>> if sys.version_info.major == 3 and sys.version_info.minor >= 9:
+    ...     from importlib.resources import files
+    ... else:
+    ...     from importlib_resources import files
+    >>> results = read_theory_results(
+    ...     files("residuated_binars").joinpath("resources/isabelle2.out")
+    ... )
+    >>> result = results["T105"]
+    >>> result.status.name, result.message[:30], result.model.label
+    ('POTENTIALLY_SPURIOUS', 'Nitpick found a potentially sp', 'T105')
+    >>> with open("test.out", "w", encoding="utf-8") as log_file:
+    ...     _ = log_file.write("NOTE {}")
+    >>> read_theory_results("test.out")
+    Traceback (most recent call last):
+     ...
+    ValueError: No FINISHED message in test.out
+    >>> os.remove("test.out")
+
+    :param log_file_name: a name of a file with Isabelle server replies
+    :param source_path: a folder with theory files (to find lemma names);
+        by default, the folder of the log file
+    :returns: a map from theory (or lemma) names to their results
+    :raises ValueError: if there is no FINISHED message in the log
+    """
+    path = (
+        os.path.dirname(str(log_file_name))
+        if source_path is None
+        else source_path
+    )
+    results: Dict[str, TheoryResult] = {}
+    finished = False
+    for node in iterate_nodes(log_file_name):
+        finished = True
+        for lemma_name, messages in split_by_lemma(node, path).items():
+            results[lemma_name] = TheoryResult(lemma_name, messages)
+    if not finished:
+        raise ValueError(f"No FINISHED message in {log_file_name}")
+    return results
+
+
+def get_theory_results(source_path: str) -> Dict[str, str]:
+    """
+    Classify theories by the first relevant message in Isabelle server reply.
+
+    >>> import sys
+    >>> if sys.version_info.major == 3 and sys.version_info.minor >= 9:
+    ...     from importlib.resources import files
+    ... else:
+    ...     from importlib_resources import files
+    >>> results = get_theory_results(
+    ...     files("residuated_binars").joinpath("resources")
+    ... )
+    >>> len(results)
+    186
+    >>> results["T02_3"]
+    'Nitpick found no counterexample'
+
+    :param source_path: where to look for processed theory files; should
+        include an ``isabelle.out`` file with server's output
+    :returns: a map from theory (or lemma) names to one of
+        ``RESULT_MESSAGES``
+    :raises ValueError: if there is no FINISHED message in Isabelle server
+        response
+    """
+    return {
+        name: result.status.value
+        for name, result in read_theory_results(
+            os.path.join(source_path, "isabelle.out"), source_path
+        ).items()
+        if result.status is not None
+    }
+
+
+def _packed_lemmas(source_path: str) -> Dict[str, str]:
+    lemma_files: Dict[str, str] = {}
+    for file_name in os.listdir(source_path):
+        if file_name.endswith(".thy"):
+            for lemma_name in get_lemma_names(
+                source_path, file_name[:-4]
+            ).values():
+                if lemma_name != file_name[:-4]:
+                    lemma_files[lemma_name] = os.path.join(
+                        source_path, file_name
+                    )
+    return lemma_files
+
+
+def _support_theories(source_path: str) -> List[str]:
+    return [
+        file_name
+        for file_name in os.listdir(source_path)
+        if file_name.endswith(".thy")
+        and not get_lemma_names(source_path, file_name[:-4])
+    ]
+
+
+def write_lemma_theory(
+    source_file_name: str, lemma_name: str, target_file_name: str
+) -> None:
+    r"""
+    Write one named lemma of a theory into a theory of its own.
+
+    The new theory is named after the lemma and has the same header.
+
+    >>> with open("test.thy", "w", encoding="utf-8") as theory_file:
+    ...     _ = theory_file.write(
+    ...         "theory Pack0\nimports Main\nbegin\n"
+    ...         'lemma T0_1: "a"\nnitpick\noops\n'
+    ...         'lemma T1_0: "b"\nnitpick\noops\nend'
+    ...     )
+    >>> write_lemma_theory("test.thy", "T1_0", "T1_0.thy")
+    >>> with open("T1_0.thy", "r", encoding="utf-8") as theory_file:
+    ...     print(theory_file.read())
+    theory T1_0
+    imports Main
+    begin
+    lemma T1_0: "b"
+    nitpick
+    oops
+    end
+    >>> os.remove("test.thy")
+    >>> os.remove("T1_0.thy")
+
+    :param source_file_name: a theory file with several named lemmas
+    :param lemma_name: a name of a lemma to keep
+    :param target_file_name: where to write the new theory
+    """
+    with open(source_file_name, "r", encoding="utf-8") as source_file:
+        lines = source_file.read().split("\n")
+    start = next(
+        index for index, line in enumerate(lines) if line.startswith("lemma ")
+    )
+    first = next(
+        index
+        for index, line in enumerate(lines)
+        if line.startswith(f"lemma {lemma_name}:")
+    )
+    last = lines.index("oops", first)
+    with open(target_file_name, "w", encoding="utf-8") as target_file:
+        target_file.write(
+            "\n".join(
+                [f"theory {lemma_name}"]
+                + lines[1:start]
+                + lines[first : last + 1]
+                + ["end"]
+            )
+        )
 
 
 def filter_theories(source_path: str, target_path: str) -> None:
@@ -37,51 +298,31 @@ def filter_theories(source_path: str, target_path: str) -> None:
 
     Get theory files from an existing folder and copy to another existing
     folder ones those of them, for which neither have a finite counter-example
-    nor a proof.
+    nor a proof. An open lemma of a theory with several named lemmas is
+    written to a theory of its own. Theory files without tasks (like
+    ``Definitions.thy``) are always copied.
 
     :param source_path: where to look for processed theory files; should
         include an ``isabelle.out`` file with server's output
     :param target_path: where to put theory files without proofs or
         counter-examples
-    :raises ValueError: if there is no FINISHED message in Isabelle server
-        response
     """
     if not os.path.exists(target_path):
         os.mkdir(target_path)
-    with open(
-        os.path.join(source_path, "isabelle.out"), "r", encoding="utf-8"
-    ) as out_file:
-        final_line = [
-            re.compile(".*FINISHED (.*)\n?").match(line)
-            for line in out_file.readlines()
-            if "FINISHED" in line
-            and ("Sledgehammering" in line or "Nitpick" in line)
-        ][0]
-    if final_line is None:
-        raise ValueError(f"Unexpected Isabelle server response: {final_line}")
-    results = {
-        node["theory_name"][6:]: [
-            message["message"]
-            for message in node["messages"]
-            if any(
-                nitpick_message in message["message"]
-                for nitpick_message in (
-                    "Try this: ",
-                    "Timed out",
-                    "Nitpick found a potentially spurious counterexample",
-                    "Nitpick found a counterexample",
-                    "Nitpick found no counterexample",
-                )
+    for file_name in _support_theories(source_path):
+        shutil.copy(
+            os.path.join(source_path, file_name),
+            os.path.join(target_path, file_name),
+        )
+    lemma_files = _packed_lemmas(source_path)
+    for theory_name, result in get_theory_results(source_path).items():
+        target_file_name = os.path.join(target_path, theory_name + ".thy")
+        if result in OPEN_RESULTS and theory_name in lemma_files:
+            write_lemma_theory(
+                lemma_files[theory_name], theory_name, target_file_name
             )
-        ][0]
-        for node in json.loads(final_line.group(1))["nodes"]
-    }
-    for result in results:
-        if (
-            "Nitpick found no counterexample" in results[result]
-            or "Timed out" in results[result]
-        ):
+        elif result in OPEN_RESULTS:
             shutil.copy(
-                os.path.join(source_path, result + ".thy"),
-                os.path.join(target_path, result + ".thy"),
+                os.path.join(source_path, theory_name + ".thy"),
+                target_file_name,
             )
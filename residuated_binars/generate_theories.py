@@ -37,14 +37,67 @@ hypotheses to check for models of different cardinalities.
 
 The theory files are called ``T[number].thy`` where ``number``
 enumerates theory files starting from zero.
+
+Optionally, every law is defined only once as a named predicate in a
+``Definitions.thy`` theory, and the lemmas import it and refer to the
+laws by these names, so Isabelle parses and type-checks each law once.
 """
 import os
 from itertools import combinations
-from typing import List, Optional
+from typing import (
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from residuated_binars.filter_theories import OPEN_RESULTS
+from residuated_binars.laws import Law
+
+DEFINITIONS = "Definitions"
+
+
+def _lemma_lines(
+    assumptions: List[str],
+    goal: Optional[str] = None,
+    lemma_name: Optional[str] = None,
+) -> List[str]:
+    lemma_text = [
+        'lemma "(' if lemma_name is None else f'lemma {lemma_name}: "('
+    ]
+    lemma_text += [" &\n".join(assumptions)]
+    if goal is not None:
+        lemma_text += [") \\<longrightarrow>"]
+        lemma_text += [goal]
+    else:
+        lemma_text += [")"]
+    lemma_text += ['"', "oops"]
+    return lemma_text
+
+
+def _header(
+    theory_name: str, imports: Optional[str], declare_type: bool = False
+) -> List[str]:
+    header = [
+        f"theory {theory_name}",
+        f"imports {'Main' if imports is None else imports}",
+        "begin",
+    ]
+    if imports is None or declare_type:
+        header += ["datatype finite_type = finite_type_constants"]
+    return header
 
 
 def generate_isabelle_theory_file(
-    theory_name: str, assumptions: List[str], goal: Optional[str] = None
+    theory_name: str,
+    assumptions: List[str],
+    goal: Optional[str] = None,
+    imports: Optional[str] = None,
+    *,
+    declare_type: bool = False,
 ) -> List[str]:
     """
     Generate a text of Isabelle theory file with only ones lemma inside.
@@ -52,31 +105,309 @@ def generate_isabelle_theory_file(
     :param theory_name: name of a theory file
     :param assumptions: a list of lemma assumptions in Isabelle language
     :param goal: the lemma goal in Isabelle language
+    :param imports: a theory with ``finite_type`` declaration to import; by
+        default, the theory imports ``Main`` and declares ``finite_type``
+        itself
+    :param declare_type: whether to declare ``finite_type`` even if another
+        theory is imported (for polymorphic definitions)
     :returns: a list of lines of a theory file
     """
-    theory_text = [f"theory {theory_name}"]
-    theory_text += [
-        "imports Main",
-        "begin",
-        "datatype finite_type = finite_type_constants",
-        'lemma "(',
-    ]
-    theory_text += [" &\n".join(assumptions)]
-    if goal is not None:
-        theory_text += [") \\<longrightarrow>"]
-        theory_text += [goal]
-    else:
-        theory_text += [")"]
-    theory_text += ['"', "oops", "end"]
+    theory_text = _header(theory_name, imports, declare_type)
+    theory_text += _lemma_lines(assumptions, goal)
+    theory_text += ["end"]
     return theory_text
 
 
-def independence_case(
+def generate_packed_theory_file(
+    theory_name: str,
+    lemmas: List[Tuple[str, List[str], Optional[str]]],
+    imports: Optional[str] = None,
+    *,
+    declare_type: bool = False,
+) -> List[str]:
+    r"""
+    Generate a text of Isabelle theory file with several named lemmas inside.
+
+    All the lemmas share the same ``finite_type`` declaration, so Isabelle
+    loads the theory and processes the datatype only once for all of them.
+
+    >>> print("\n".join(generate_packed_theory_file(
+    ...     "Pack0", [("T0_1", ["a"], "b"), ("T1_0", ["b"], "a")]
+    ... )))
+    theory Pack0
+    imports Main
+    begin
+    datatype finite_type = finite_type_constants
+    lemma T0_1: "(
+    a
+    ) \<longrightarrow>
+    b
+    "
+    oops
+    lemma T1_0: "(
+    b
+    ) \<longrightarrow>
+    a
+    "
+    oops
+    end
+
+    :param theory_name: name of a theory file
+    :param lemmas: a list of lemma names, assumptions and goals
+    :param imports: a theory with ``finite_type`` declaration to import; by
+        default, the theory imports ``Main`` and declares ``finite_type``
+        itself
+    :param declare_type: whether to declare ``finite_type`` even if another
+        theory is imported (for polymorphic definitions)
+    :returns: a list of lines of a theory file
+    """
+    theory_text = _header(theory_name, imports, declare_type)
+    for lemma_name, assumptions, goal in lemmas:
+        theory_text += _lemma_lines(assumptions, goal, lemma_name)
+    theory_text += ["end"]
+    return theory_text
+
+
+def _typed(operation: str, arity: int) -> str:
+    argument_type = " \\<times> ".join(arity * ["finite_type"])
+    return f"({operation} :: {argument_type} \\<Rightarrow> finite_type)"
+
+
+def _definition(
+    name: str, formula: str, law: Law, polymorphic: bool
+) -> Tuple[str, List[str]]:
+    parameters = sorted(law.operations)
+    arguments = parameters
+    if polymorphic:
+        constants = sorted(set(law.constants), key=law.constants.index)
+        arguments = [
+            _typed(operation, law.operations[operation])
+            for operation in parameters
+        ] + constants
+        parameters = parameters + constants
+        formula = formula.replace("::finite_type", "::'a")
+    return " ".join([name] + arguments), [
+        f'definition {name} where "{" ".join([name] + parameters)} =',
+        f'{formula}"',
+    ]
+
+
+def generate_definitions_theory(
+    laws: List[str],
+    theory_name: str = DEFINITIONS,
+    *,
+    polymorphic: bool = False,
+) -> Tuple[List[str], Dict[str, str]]:
+    r"""
+    Generate a text of Isabelle theory file defining every law once.
+
+    Every law becomes a predicate of operations it uses (constants like
+    ``C0`` stay constructors of ``finite_type`` in its body, since only free
+    variables may be arguments of a definition).
+    Formulae which ``Law`` can't parse are not defined and should be used
+    verbatim.
+
+    >>> lines, definitions = generate_definitions_theory(
+    ...     ["(\\<forall> x::finite_type. meet(x, C0) = C0)", "True"]
+    ... )
+    >>> print("\n".join(lines))
+    theory Definitions
+    imports Main
+    begin
+    datatype finite_type = finite_type_constants
+    definition law0 where "law0 meet =
+    (\<forall> x::finite_type. meet(x, C0) = C0)"
+    end
+    >>> definitions
+    {'(\\<forall> x::finite_type. meet(x, C0) = C0)': 'law0 meet'}
+
+    A polymorphic theory doesn't declare ``finite_type``, so it doesn't
+    depend on a cardinality, and constants are arguments of definitions
+    (theories importing it declare ``finite_type`` themselves, and lemmas
+    give operations this type explicitly, otherwise they would be free
+    variables of any type):
+
+    >>> lines, definitions = generate_definitions_theory(
+    ...     ["(\\<forall> x::finite_type. meet(x, C0) = C0)"],
+    ...     polymorphic=True,
+    ... )
+    >>> print("\n".join(lines))
+    theory Definitions
+    imports Main
+    begin
+    definition law0 where "law0 meet C0 =
+    (\<forall> x::'a. meet(x, C0) = C0)"
+    end
+    >>> print(*definitions.values())
+    law0 (meet :: finite_type \<times> finite_type \<Rightarrow> finite_type)
+    C0
+
+    :param laws: formulae in Isabelle syntax
+    :param theory_name: name of a theory file
+    :param polymorphic: whether to define laws for any type instead of
+        ``finite_type``
+    :returns: a list of lines of a theory file and a map from formulae to
+        their replacements in lemmas
+    """
+    theory_text = _header(theory_name, None)[: 3 if polymorphic else 4]
+    definitions: Dict[str, str] = {}
+    for formula in dict.fromkeys(laws):
+        try:
+            law = Law(formula, formula)
+        except ValueError:
+            continue
+        definitions[formula], lines = _definition(
+            f"law{len(definitions)}", formula, law, polymorphic
+        )
+        theory_text += lines
+    theory_text += ["end"]
+    return theory_text, definitions
+
+
+def write_theory_file(path: str, theory_name: str, theory_text: str) -> None:
+    """
+    Write a text of a theory to a respective file.
+
+    :param path: a folder for storing theory files
+    :param theory_name: name of a theory
+    :param theory_text: a full text of a theory file
+    """
+    with open(
+        os.path.join(path, f"{theory_name}.thy"),
+        "w",
+        encoding="utf-8",
+    ) as theory_file:
+        theory_file.write(theory_text)
+
+
+class Hypothesis:
+    r"""
+    A structured description of one independence hypothesis.
+
+    >>> hypothesis = Hypothesis((0, 2), 1)
+    >>> hypothesis.name
+    'T02_1'
+    >>> hypothesis.is_open
+    True
+    >>> hypothesis.statuses[2] = "Nitpick found no counterexample"
+    >>> hypothesis.is_open
+    True
+    >>> hypothesis.statuses[3] = "Nitpick found a counterexample"
+    >>> hypothesis.is_open
+    False
+    >>> print("\n".join(hypothesis.theory_lines(["a", "b", "c"], ["d"])))
+    theory T02_1
+    imports Main
+    begin
+    datatype finite_type = finite_type_constants
+    lemma "(
+    a &
+    c &
+    d
+    ) \<longrightarrow>
+    b
+    "
+    oops
+    end
+    """
+
+    def __init__(self, assumption_indices: Sequence[int], goal_index: int):
+        """
+        Create a hypothesis without any checks done yet.
+
+        :param assumption_indices: indices of assumption to use
+        :param goal_index: index of a goal to prove
+        """
+        self.assumption_indices = tuple(assumption_indices)
+        self.goal_index = goal_index
+        self.statuses: Dict[int, str] = {}
+
+    @property
+    def name(self) -> str:
+        """Return a name of a theory file for the hypothesis."""
+        return (
+            f"T{''.join(map(str, self.assumption_indices))}_{self.goal_index}"
+        )
+
+    @property
+    def is_open(self) -> bool:
+        """Return whether neither a counter-example nor a proof is found."""
+        return (
+            not self.statuses
+            or self.statuses[max(self.statuses)] in OPEN_RESULTS
+        )
+
+    def theory_lines(
+        self,
+        independent_assumptions: List[str],
+        additional_assumptions: List[str],
+        definitions: Optional[Dict[str, str]] = None,
+        *,
+        declare_type: bool = False,
+    ) -> List[str]:
+        """
+        Generate a text of Isabelle theory file for the hypothesis.
+
+        :param independent_assumptions: a list of assumption which independence
+            we want to check
+        :param additional_assumptions: a list of additional assumptions
+        :param definitions: if given, the theory imports ``Definitions`` and
+            formulae are replaced by names of laws from there (as returned by
+            ``generate_definitions_theory``)
+        :param declare_type: whether to declare ``finite_type`` even if
+            ``Definitions`` are imported (for polymorphic definitions)
+        :returns: a list of lines of a theory file
+        """
+        return generate_isabelle_theory_file(
+            *self.lemma(
+                independent_assumptions, additional_assumptions, definitions
+            ),
+            None if definitions is None else DEFINITIONS,
+            declare_type=declare_type,
+        )
+
+    def lemma(
+        self,
+        independent_assumptions: List[str],
+        additional_assumptions: List[str],
+        definitions: Optional[Dict[str, str]] = None,
+    ) -> Tuple[str, List[str], Optional[str]]:
+        """
+        Get a name, assumptions and a goal of a lemma for the hypothesis.
+
+        :param independent_assumptions: a list of assumption which independence
+            we want to check
+        :param additional_assumptions: a list of additional assumptions
+        :param definitions: names of laws to use instead of formulae (as
+            returned by ``generate_definitions_theory``)
+        :returns: a name, assumptions and a goal as for
+            ``generate_packed_theory_file``
+        """
+        names = {} if definitions is None else definitions
+        return (
+            self.name,
+            [
+                names.get(formula, formula)
+                for formula in [
+                    independent_assumptions[k] for k in self.assumption_indices
+                ]
+                + additional_assumptions
+            ],
+            names.get(
+                independent_assumptions[self.goal_index],
+                independent_assumptions[self.goal_index],
+            ),
+        )
+
+
+def independence_case(  # pylint: disable=too-many-arguments
     path: str,
     independent_assumptions: List[str],
     assumption_indices: List[int],
     goal_index: int,
     additional_assumptions: List[str],
+    *,
+    definitions: Optional[Dict[str, str]] = None,
 ) -> None:
     """
     Generate theory of independence of an assumption from a subset of the rest.
@@ -89,65 +420,138 @@ def independence_case(
     :param additional_assumptions: a list of additional assumptions about
         the binars like the lattice reduct distributivity, existence of
         an involution operation, and multiplication associativity
+    :param definitions: names of laws from ``Definitions`` theory to use
+        instead of formulae
     """
-    assumption_list = list(assumption_indices)
-    theory_name = f"T{''.join(map(str, assumption_list))}_{goal_index}"
-    all_assumptions = [
-        independent_assumptions[k] for k in assumption_indices
-    ] + additional_assumptions
-    theory_text = generate_isabelle_theory_file(
-        theory_name,
-        all_assumptions,
-        independent_assumptions[goal_index],
+    hypothesis = Hypothesis(assumption_indices, goal_index)
+    write_theory_file(
+        path,
+        hypothesis.name,
+        "\n".join(
+            hypothesis.theory_lines(
+                independent_assumptions, additional_assumptions, definitions
+            )
+        ),
     )
-    with open(
-        os.path.join(path, f"{theory_name}.thy"),
-        "w",
-        encoding="utf-8",
-    ) as theory_file:
-        theory_file.write("\n".join(theory_text))
 
 
-def independence_check(
+def iterate_hypotheses(
+    total_assumptions_count: int, check_subset_independence: bool
+) -> Iterator[Hypothesis]:
+    """
+    Enumerate independence hypotheses lazily.
+
+    Nothing is rendered here, so a caller can filter or reorder hypotheses
+    before writing any theory files.
+
+    >>> [hypothesis.name for hypothesis in iterate_hypotheses(3, True)]
+    ['T1_0', 'T2_0', 'T12_0', 'T0_1', 'T2_1', 'T02_1', 'T0_2', 'T1_2', 'T01_2']
+    >>> [hypothesis.name for hypothesis in iterate_hypotheses(3, False)]
+    ['T12_0', 'T02_1', 'T01_2']
+
+    :param total_assumptions_count: a number of assumptions which
+        independence we want to check
+    :param check_subset_independence: whether to check every assumption from
+        the list against all the rest or against any combination of the rest
+    :returns: hypotheses one by one (each only once)
+    """
+    for goal_index in range(total_assumptions_count):
+        indices = tuple(
+            list(range(0, goal_index))
+            + list(range(goal_index + 1, total_assumptions_count))
+        )
+        if check_subset_independence:
+            for assumptions_count in range(1, total_assumptions_count):
+                for assumption_indices in combinations(
+                    indices, assumptions_count
+                ):
+                    yield Hypothesis(assumption_indices, goal_index)
+        elif indices:
+            yield Hypothesis(indices, goal_index)
+
+
+def _write_definitions(path: str, laws: List[str]) -> Dict[str, str]:
+    lines, definitions = generate_definitions_theory(laws)
+    write_theory_file(path, DEFINITIONS, "\n".join(lines))
+    return definitions
+
+
+def independence_check(  # pylint: disable=too-many-arguments
     path: str,
     independent_assumptions: List[str],
     additional_assumptions: List[str],
     check_subset_independence: bool,
-) -> None:
-    """
+    *,
+    keep: Optional[Callable[[Hypothesis], bool]] = None,
+    shared_definitions: bool = False,
+) -> int:
+    r"""
     Generate a theory files to check independence given additional assumptions.
 
+    >>> import shutil
+    >>> independence_check(
+    ...     "test-hyp", 3 * ["True"], [], True,
+    ...     keep=lambda hypothesis: len(hypothesis.assumption_indices) == 2
+    ... )
+    3
+    >>> sorted(os.listdir("test-hyp"))
+    ['T01_2.thy', 'T02_1.thy', 'T12_0.thy']
+    >>> shutil.rmtree("test-hyp")
+    >>> independence_check(
+    ...     "test-hyp", ["(\\<forall> x::finite_type. join(x, x) = x)",
+    ...     "(\\<forall> x::finite_type. meet(x, x) = x)"], ["True"], True,
+    ...     shared_definitions=True
+    ... )
+    2
+    >>> with open(os.path.join("test-hyp", "T0_1.thy")) as theory_file:
+    ...     print(theory_file.read())
+    theory T0_1
+    imports Definitions
+    begin
+    lemma "(
+    law0 join &
+    True
+    ) \<longrightarrow>
+    law1 meet
+    "
+    oops
+    end
+    >>> sorted(os.listdir("test-hyp"))
+    ['Definitions.thy', 'T0_1.thy', 'T1_0.thy']
+    >>> shutil.rmtree("test-hyp")
+
     :param path: a folder for storing theory files
     :param independent_assumptions: a list of assumption which independence
         we want to check
     :param additional_assumptions: a list of additional assumptions
     :param check_subset_independence: whether to check every assumption from
         the list against all the rest or against any combination of the rest
+    :param keep: a filter for hypotheses to write (all by default)
+    :param shared_definitions: whether to define the laws once in
+        ``Definitions.thy`` and refer to them by names in other theories
+    :returns: a number of written theory files (except ``Definitions.thy``)
     """
     if not os.path.exists(path):
         os.mkdir(path)
-    total_assumptions_count = len(independent_assumptions)
-    for goal_index in range(total_assumptions_count):
-        for assumptions_count in range(1, total_assumptions_count):
-            indices = tuple(
-                list(range(0, goal_index))
-                + list(range(goal_index + 1, total_assumptions_count))
-            )
-            index_combinations = (
-                list(
-                    combinations(
-                        indices,
-                        assumptions_count,
-                    )
-                )
-                if check_subset_independence
-                else [indices]
+    definitions = (
+        _write_definitions(
+            path, independent_assumptions + additional_assumptions
+        )
+        if shared_definitions
+        else None
+    )
+    count = 0
+    for hypothesis in iterate_hypotheses(
+        len(independent_assumptions), check_subset_independence
+    ):
+        if keep is None or keep(hypothesis):
+            independence_case(
+                path,
+                independent_assumptions,
+                list(hypothesis.assumption_indices),
+                hypothesis.goal_index,
+                additional_assumptions,
+                definitions=definitions,
             )
-            for assumption_indices in index_combinations:
-                independence_case(
-                    path,
-                    independent_assumptions,
-                    list(assumption_indices),
-                    goal_index,
-                    additional_assumptions,
-                )
+            count += 1
+    return count
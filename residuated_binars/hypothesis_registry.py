@@ -0,0 +1,303 @@
+# Copyright 2022 Boris Shminke
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# noqa: D205, D400
+"""
+Hypothesis Registry
+====================
+
+An in-memory replacement for a chain of ``hyp[n]`` and ``task[n]`` folders.
+
+-  keeps all the hypotheses as ``Hypothesis`` objects together with
+   the results of checking them for every cardinality
+-  writes theory files only for hypotheses which are still open, and
+   always to the same scratch folder
+-  removes theory files of closed hypotheses from that folder without
+   listing it
+-  writes hypotheses in the order of their expected difficulty (estimated
+   from the timings of the previous rounds), the hardest first
+-  optionally packs several hypotheses into one theory file with several
+   lemmas to pay the cost of loading a theory only once for all of them
+-  optionally refers to laws by names from a ``Definitions`` theory which
+   is the same for all cardinalities (so it can be prebuilt once)
+
+"""
+import os
+from typing import Dict, List, Optional, Set, Tuple
+
+from residuated_binars.add_task import TaskType, TheoryTemplate
+from residuated_binars.filter_theories import get_theory_results
+from residuated_binars.generate_theories import (
+    DEFINITIONS,
+    Hypothesis,
+    generate_definitions_theory,
+    generate_packed_theory_file,
+    iterate_hypotheses,
+    write_theory_file,
+)
+from residuated_binars.scheduler import (
+    DifficultyModel,
+    Timings,
+    get_theory_timings,
+    order_hypotheses,
+)
+
+
+def _shared_definitions(
+    laws: List[str],
+) -> Tuple[Optional[Dict[str, str]], Optional[str]]:
+    lines, definitions = generate_definitions_theory(laws, polymorphic=True)
+    return definitions, "\n".join(lines)
+
+
+class HypothesisRegistry:  # pylint: disable=too-many-instance-attributes
+    r"""
+    A collection of independence hypotheses and their statuses.
+
+    >>> registry = HypothesisRegistry(3 * ["True"], [], True)
+    >>> sorted(registry.hypotheses)
+    ['T01_2', 'T02_1', 'T0_1', 'T0_2', 'T12_0', 'T1_0', 'T1_2', 'T2_0', 'T2_1']
+    >>> registry.write_tasks("test-scratch", TaskType.NITPICK, 2)[:2]
+    ['T1_0', 'T2_0']
+    >>> len(os.listdir("test-scratch"))
+    9
+    >>> registry.hypotheses["T1_0"].statuses[2] = "Timed out"
+    >>> registry.hypotheses["T2_0"].statuses[2] = "Try this: "
+    >>> len(registry.open_hypotheses)
+    8
+    >>> len(registry.write_tasks("test-scratch", TaskType.NITPICK, 3))
+    8
+    >>> sorted(os.listdir("test-scratch"))[:2]
+    ['T01_2.thy', 'T02_1.thy']
+    >>> registry.lemmas_per_theory = 5
+    >>> registry.write_tasks("test-scratch", TaskType.NITPICK, 3)
+    ['Pack0', 'Pack1']
+    >>> sorted(os.listdir("test-scratch"))
+    ['Pack0.thy', 'Pack1.thy']
+    >>> import shutil
+    >>> shutil.rmtree("test-scratch")
+    >>> registry = HypothesisRegistry(
+    ...     ["(\\<forall> x::finite_type. join(x, x) = x)", "True"], [], True,
+    ...     shared_definitions=True
+    ... )
+    >>> registry.write_tasks("test-scratch", TaskType.NITPICK, 2)
+    ['T1_0', 'T0_1']
+    >>> sorted(os.listdir("test-scratch"))
+    ['Definitions.thy', 'T0_1.thy', 'T1_0.thy']
+    >>> registry.write_tasks(
+    ...     "test-scratch", TaskType.NITPICK, 3, "Prebuilt.Definitions"
+    ... )
+    ['T1_0', 'T0_1']
+    >>> with open(os.path.join("test-scratch", "T0_1.thy")) as theory_file:
+    ...     print("\n".join(theory_file.read().split("\n")[:6]))
+    theory T0_1
+    imports Prebuilt.Definitions
+    begin
+    datatype finite_type = C0 | C1 | C2
+    lemma "(
+    law0 (join :: finite_type \<times> finite_type \<Rightarrow> finite_type)
+    >>> shutil.rmtree("test-scratch")
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        independent_assumptions: List[str],
+        additional_assumptions: List[str],
+        check_subset_independence: bool,
+        lemmas_per_theory: int = 1,
+        shared_definitions: bool = False,
+    ):
+        """
+        Create all the hypotheses as in ``independence_check``.
+
+        :param independent_assumptions: a list of assumption which independence
+            we want to check
+        :param additional_assumptions: a list of additional assumptions
+        :param check_subset_independence: whether to check every assumption
+            from the list against all the rest or against any combination of
+            the rest
+        :param lemmas_per_theory: how many hypotheses to pack into one theory
+            file
+        :param shared_definitions: whether theories refer to laws by names
+            from a polymorphic ``Definitions`` theory (see
+            ``generate_definitions_theory``), which doesn't depend on a
+            cardinality, and declare ``finite_type`` themselves
+        """
+        self.lemmas_per_theory, self.independent_assumptions = (
+            lemmas_per_theory,
+            independent_assumptions,
+        )
+        self.additional_assumptions = additional_assumptions
+        self.hypotheses: Dict[str, Hypothesis] = {
+            hypothesis.name: hypothesis
+            for hypothesis in iterate_hypotheses(
+                len(independent_assumptions), check_subset_independence
+            )
+        }
+        self.timings: Timings = {}
+        self._written: Set[str] = set()
+        self._templates: Dict[str, TheoryTemplate] = {}
+        self._packs: Dict[str, List[Hypothesis]] = {}
+        self.definitions, self._definitions_text = (
+            _shared_definitions(
+                independent_assumptions + additional_assumptions
+            )
+            if shared_definitions
+            else (None, None)
+        )
+
+    @property
+    def open_hypotheses(self) -> List[Hypothesis]:
+        """Return hypotheses with neither counter-example nor proof found."""
+        return [
+            hypothesis
+            for hypothesis in self.hypotheses.values()
+            if hypothesis.is_open
+        ]
+
+    def write_tasks(
+        self,
+        path: str,
+        task_type: TaskType,
+        cardinality: int = 1,
+        imports: Optional[str] = None,
+    ) -> List[str]:
+        """
+        Write theory files with a given task for all open hypotheses.
+
+        :param path: a scratch folder for theory files
+        :param task_type: use Nitpick or Sledgehammer (disprove by finding a
+            finite counter-example or prove)
+        :param cardinality: a cardinality of finite model to find (only for
+            Nitpick tasks)
+        :param imports: a theory with definitions to import (like
+            ``PrebuiltSession.imports``); by default, ``Definitions.thy`` is
+            written to the same folder if theories use shared definitions
+        :returns: names of written theories
+        """
+        if not os.path.exists(path):
+            os.mkdir(path)
+        if self._definitions_text is not None and imports is None:
+            write_theory_file(path, DEFINITIONS, self._definitions_text)
+        theory_names = []
+        for theory_name, template in self._theories():
+            write_theory_file(
+                path,
+                theory_name,
+                template.render(task_type, cardinality, imports),
+            )
+            theory_names.append(theory_name)
+        for theory_name in self._written.difference(theory_names):
+            os.remove(os.path.join(path, f"{theory_name}.thy"))
+        self._written = set(theory_names)
+        return theory_names
+
+    def scheduled_hypotheses(self, workers: int = 1) -> List[List[Hypothesis]]:
+        """
+        Distribute open hypotheses between workers, the hardest first.
+
+        :param workers: a number of workers (servers or sessions)
+        :returns: ordered lists of hypotheses for every worker
+        """
+        return order_hypotheses(
+            self.open_hypotheses,
+            DifficultyModel(self.timings, self.hypotheses),
+            workers,
+        )
+
+    def _template(self, hypothesis: Hypothesis) -> TheoryTemplate:
+        if hypothesis.name not in self._templates:
+            self._templates[hypothesis.name] = TheoryTemplate(
+                "\n".join(
+                    hypothesis.theory_lines(
+                        self.independent_assumptions,
+                        self.additional_assumptions,
+                        self.definitions,
+                        declare_type=True,
+                    )
+                )
+            )
+        return self._templates[hypothesis.name]
+
+    def _theories(self) -> List[Tuple[str, TheoryTemplate]]:
+        open_hypotheses = self.scheduled_hypotheses()[0]
+        if self.lemmas_per_theory == 1:
+            self._packs = {}
+            return [
+                (hypothesis.name, self._template(hypothesis))
+                for hypothesis in open_hypotheses
+            ]
+        self._packs = {
+            f"Pack{pack_index}": open_hypotheses[
+                start : start + self.lemmas_per_theory
+            ]
+            for pack_index, start in enumerate(
+                range(0, len(open_hypotheses), self.lemmas_per_theory)
+            )
+        }
+        return [
+            (
+                pack_name,
+                TheoryTemplate(
+                    "\n".join(
+                        generate_packed_theory_file(
+                            pack_name,
+                            [
+                                hypothesis.lemma(
+                                    self.independent_assumptions,
+                                    self.additional_assumptions,
+                                    self.definitions,
+                                )
+                                for hypothesis in pack
+                            ],
+                            None if self.definitions is None else DEFINITIONS,
+                            declare_type=True,
+                        )
+                    )
+                ),
+            )
+            for pack_name, pack in self._packs.items()
+        ]
+
+    def update_statuses(self, path: str, cardinality: int) -> None:
+        """
+        Save results of checking hypotheses for a given cardinality.
+
+        :param path: a scratch folder with an ``isabelle.out`` file
+        :param cardinality: a cardinality which was checked
+        """
+        for theory_name, result in get_theory_results(path).items():
+            if theory_name in self.hypotheses:
+                self.hypotheses[theory_name].statuses[cardinality] = result
+
+    def update_timings(self, path: str, cardinality: int) -> None:
+        """
+        Save processing times of hypotheses for a given cardinality.
+
+        A time of a packed theory is split evenly between its lemmas, so
+        that timings are always keyed by hypotheses names.
+
+        :param path: a scratch folder with an ``isabelle.out`` file
+        :param cardinality: a cardinality which was checked
+        """
+        self.timings[cardinality] = {}
+        for theory_name, seconds in get_theory_timings(
+            os.path.join(path, "isabelle.out")
+        ).items():
+            names = [
+                hypothesis.name
+                for hypothesis in self._packs.get(theory_name, [])
+            ] or [theory_name]
+            for name in names:
+                self.timings[cardinality][name] = seconds / len(names)
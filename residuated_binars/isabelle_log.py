@@ -0,0 +1,286 @@
+# Copyright 2022 Boris Shminke
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# noqa: D205, D400
+"""
+Isabelle Log
+=============
+
+Reading logs of Isabelle server replies (like ``isabelle.out``) in
+bounded memory.
+
+-  a ``FINISHED`` reply to ``use_theories`` is one line holding messages
+   about every theory, so instead of loading it whole, the log is read in
+   chunks and the ``nodes`` array is decoded one node at a time
+-  other (short) lines are read one by one, skipping the long ones
+-  messages about a theory with several lemmas are grouped by lemmas
+
+"""
+import json
+import os
+import re
+from typing import Any, Dict, Iterator, List, Optional, Sequence, TextIO
+
+FINISHED = "FINISHED {"
+NODES = '"nodes":'
+DECODER = json.JSONDecoder()
+TASK_PREFIXES = ("nitpick", "sledgehammer")
+
+
+class _ChunkedText:
+    """
+    A window into a text file which is read in chunks.
+
+    >>> from io import StringIO
+    >>> text = _ChunkedText(StringIO("abc [ {} ]"), 2)
+    >>> text.find(["z"])
+    >>> text = _ChunkedText(StringIO("abc [ {} ]"), 2)
+    >>> text.find(["[", "c"]), text.find(["["])
+    ('c', '[')
+    >>> text.next_char(), text.decode()
+    ('{', {})
+    >>> text.next_char()
+    ']'
+    """
+
+    def __init__(self, log_file: TextIO, chunk_size: int):
+        """
+        Start reading a file.
+
+        :param log_file: a file to read
+        :param chunk_size: how many characters to read at once
+        """
+        self.log_file = log_file
+        self.chunk_size = chunk_size
+        self.text = ""
+        self.pos = 0
+
+    def read_more(self) -> bool:
+        """
+        Drop the consumed text and read the next chunk.
+
+        :returns: whether there was anything to read
+        """
+        chunk = self.log_file.read(
+            max(self.chunk_size, len(self.text) - self.pos)
+        )
+        self.text = self.text[self.pos :] + chunk
+        self.pos = 0
+        return bool(chunk)
+
+    def find(self, markers: Sequence[str]) -> Optional[str]:
+        """
+        Move to the end of the nearest of given markers.
+
+        :param markers: strings to look for
+        :returns: the marker found or ``None`` if the file has ended
+        """
+        while True:
+            found = [
+                (index, marker)
+                for index, marker in (
+                    (self.text.find(marker, self.pos), marker)
+                    for marker in markers
+                )
+                if index >= 0
+            ]
+            if found:
+                index, marker = min(found)
+                self.pos = index + len(marker)
+                return marker
+            self.pos = max(
+                self.pos,
+                len(self.text) - max(len(marker) for marker in markers) + 1,
+            )
+            if not self.read_more():
+                return None
+
+    def next_char(self) -> str:
+        """
+        Skip white space and commas.
+
+        :returns: the next character (empty if the file has ended)
+        """
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in " ,\n":
+                self.pos += 1
+            if self.pos < len(self.text) or not self.read_more():
+                return self.text[self.pos : self.pos + 1]
+
+    def decode(self) -> Any:
+        """
+        Decode a JSON object starting at the current position.
+
+        :returns: a decoded object
+        :raises JSONDecodeError: if the object is malformed or incomplete
+        """
+        while True:
+            try:
+                value, self.pos = DECODER.raw_decode(self.text, self.pos)
+                return value
+            except json.JSONDecodeError:
+                if not self.read_more():
+                    raise
+
+
+def iterate_nodes(
+    log_file_name: Any, chunk_size: int = 1 << 16
+) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over theory nodes from all ``FINISHED`` replies in a log.
+
+    Only one node (and a chunk of the file) is kept in memory at once.
+
+    >>> import sys
+    >>> if sys.version_info.major == 3 and sys.version_info.minor >= 9:
+    ...     from importlib.resources import files
+    ... else:
+    ...     from importlib_resources import files
+    >>> nodes = iterate_nodes(
+    ...     files("residuated_binars").joinpath("resources/isabelle.out"),
+    ...     1000
+    ... )
+    >>> next(nodes)["theory_name"]
+    'Draft.T01234_5'
+    >>> len(list(nodes))
+    185
+    >>> from io import StringIO
+    >>> list(iterate_nodes(StringIO('FINISHED {"nodes":[{"a":')))
+    Traceback (most recent call last):
+     ...
+    json.decoder.JSONDecodeError: Expecting value: line 1 column 25 (char 24)
+
+    :param log_file_name: a name of a file with Isabelle server replies (or
+        an open text file)
+    :param chunk_size: how many characters to read at once
+    :returns: nodes one by one
+    """
+    if hasattr(log_file_name, "read"):
+        yield from _nodes(_ChunkedText(log_file_name, chunk_size))
+    else:
+        with open(log_file_name, "r", encoding="utf-8") as log_file:
+            yield from _nodes(_ChunkedText(log_file, chunk_size))
+
+
+def _nodes(text: _ChunkedText) -> Iterator[Dict[str, Any]]:
+    while text.find([FINISHED]) is not None:
+        if text.find([NODES, "\n"]) == NODES and text.next_char() == "[":
+            text.pos += 1
+            while text.next_char() == "{":
+                yield text.decode()
+
+
+def short_lines(log_file: TextIO, max_length: int = 1 << 12) -> Iterator[str]:
+    r"""
+    Iterate over lines of a log skipping too long ones.
+
+    >>> from io import StringIO
+    >>> list(short_lines(StringIO("a\n" + 10 * "b" + "\nc"), 5))
+    ['a\n', 'c']
+
+    :param log_file: an open log file
+    :param max_length: a maximal length of a line to keep
+    :returns: lines not longer than ``max_length``
+    """
+    skipping = False
+    for line in iter(lambda: log_file.readline(max_length), ""):
+        if not skipping and (line.endswith("\n") or len(line) < max_length):
+            yield line
+        skipping = not line.endswith("\n")
+
+
+def get_lemma_names(source_path: str, theory_name: str) -> Dict[int, str]:
+    r"""
+    Find which lemma every task line of a theory file belongs to.
+
+    >>> os.mkdir("test-lemmas")
+    >>> with open(os.path.join("test-lemmas", "Pack0.thy"), "w") as file:
+    ...     _ = file.write(
+    ...         'lemma T0_1: "x"\nnitpick\noops\n'
+    ...         'lemma T1_0: "y"\nnitpick\noops'
+    ...     )
+    >>> get_lemma_names("test-lemmas", "Pack0")
+    {2: 'T0_1', 5: 'T1_0'}
+    >>> get_lemma_names("test-lemmas", "Pack1")
+    {}
+    >>> import shutil
+    >>> shutil.rmtree("test-lemmas")
+
+    :param source_path: a folder with theory files
+    :param theory_name: a name of a theory
+    :returns: a map from line numbers of tasks to lemma names (lemmas without
+        names are named after the theory); empty if there is no such file
+    """
+    theory_file_name = os.path.join(source_path, f"{theory_name}.thy")
+    lemma_names: Dict[int, str] = {}
+    if os.path.exists(theory_file_name):
+        lemma_name = theory_name
+        with open(theory_file_name, "r", encoding="utf-8") as theory_file:
+            for line_number, line in enumerate(theory_file, 1):
+                match = re.match(r"lemma (\w+):", line)
+                lemma_name = lemma_name if match is None else match.group(1)
+                if line.startswith(TASK_PREFIXES):
+                    lemma_names[line_number] = lemma_name
+    return lemma_names
+
+
+def split_by_lemma(
+    node: Dict[str, Any], source_path: str
+) -> Dict[str, List[str]]:
+    r"""
+    Group messages about one theory by lemmas.
+
+    Messages are grouped by lines of a theory file which they refer to, and
+    every line is mapped to a lemma named in the theory file (messages about
+    lines outside named lemmas go under the theory name).
+
+    >>> node = {"theory_name": "Draft.T0_1", "messages": [
+    ...     {"message": "a", "pos": {"line": 5}},
+    ...     {"message": "b", "pos": {"line": 5}}]}
+    >>> split_by_lemma(node, ".")
+    {'T0_1': ['a', 'b']}
+    >>> node["messages"][1]["pos"]["line"] = 6
+    >>> split_by_lemma(node, ".")
+    {'T0_1': ['a', 'b']}
+    >>> split_by_lemma({"theory_name": "Draft.T0_1", "messages": []}, ".")
+    {}
+    >>> os.mkdir("test-split")
+    >>> with open(os.path.join("test-split", "Pack1.thy"), "w") as file:
+    ...     _ = file.write('lemma T2_0: "x"\nnitpick\noops')
+    >>> split_by_lemma(
+    ...     {"theory_name": "Draft.Pack1", "messages": [
+    ...         {"message": "a", "pos": {"line": 2}}, {"message": "b"}]},
+    ...     "test-split"
+    ... )
+    {'T2_0': ['a'], 'Pack1': ['b']}
+    >>> import shutil
+    >>> shutil.rmtree("test-split")
+
+    :param node: a node from ``FINISHED`` reply of Isabelle server
+    :param source_path: a folder with theory files
+    :returns: a map from lemma names to their messages
+    """
+    theory_name = node["theory_name"].split(".")[-1]
+    by_line: Dict[int, List[str]] = {}
+    for message in node["messages"]:
+        by_line.setdefault(message.get("pos", {}).get("line", 0), []).append(
+            message["message"]
+        )
+    lemma_names = get_lemma_names(source_path, theory_name) if by_line else {}
+    by_lemma: Dict[str, List[str]] = {}
+    for line, messages in by_line.items():
+        by_lemma.setdefault(lemma_names.get(line, theory_name), []).extend(
+            messages
+        )
+    return by_lemma
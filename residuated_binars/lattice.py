@@ -17,13 +17,108 @@
 Lattice
 ========
 """
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 import graphviz
 
 from residuated_binars.algebraic_structure import BOT, TOP, AlgebraicStructure
 from residuated_binars.axiom_checkers import absorbs, associative, commutative
 
+Table = Sequence[Sequence[int]]
+
+
+def order_from_meet(meet: Table) -> List[int]:
+    """
+    Get an order matrix of a lattice as bitmasks.
+
+    >>> order_from_meet([[0, 0, 0], [0, 1, 1], [0, 1, 2]])
+    [1, 3, 7]
+
+    :param meet: a table of ``meet``
+    :returns: for every element, a bitmask of elements below it
+    """
+    return [
+        sum(1 << two for two, value in enumerate(row) if value == two)
+        for row in meet
+    ]
+
+
+def upper_covers(order: List[int]) -> List[List[int]]:
+    """
+    Get upper covers of every element of a lattice.
+
+    >>> upper_covers([1, 3, 5, 15])
+    [[1, 2], [3], [3], []]
+
+    :param order: bitmasks of elements below every element
+    :returns: lists of elements covering every element
+    """
+    strictly_above = [
+        sum(
+            1 << other
+            for other, mask in enumerate(order)
+            if mask >> element & 1 and other != element
+        )
+        for element in range(len(order))
+    ]
+    return [
+        [
+            other
+            for other, mask in enumerate(order)
+            if mask & above == 1 << other
+        ]
+        for above in strictly_above
+    ]
+
+
+def _twins(join: Table, meet: Table, element: int) -> Iterable[int]:
+    classes: Dict[Tuple[int, int], int] = {}
+    for other, (upper, lower) in enumerate(zip(join[element], meet[element])):
+        classes[upper, lower] = classes.get((upper, lower), 0) | 1 << other
+    return classes.values()
+
+
+def is_modular_table(join: Table, meet: Table, order: List[int]) -> bool:
+    """
+    Check whether a lattice has no ``N5`` sublattice.
+
+    A lattice is not modular iff there are ``a < c`` and ``b`` such that
+    ``a`` and ``c`` have the same join and meet with ``b``. So for every
+    ``b``, elements are grouped by their join and meet with ``b``, and
+    every group must be an antichain.
+
+    :param join: a table of ``join``
+    :param meet: a table of ``meet``
+    :param order: bitmasks of elements below every element
+    :returns: whether the lattice is modular
+    """
+    return all(
+        twins & order[element] == 1 << element
+        for pivot in range(len(order))
+        for twins in _twins(join, meet, pivot)
+        if twins & (twins - 1)
+        for element in range(twins.bit_length())
+        if twins >> element & 1
+    )
+
+
+def is_distributive_table(join: Table, meet: Table) -> bool:
+    """
+    Check whether a lattice has neither ``N5`` nor ``M3`` sublattices.
+
+    A lattice is distributive iff ``a ∧ b = a ∧ c`` and ``a ∨ b = a ∨ c``
+    imply ``b = c``, i.e. for every ``a``, all elements have different
+    pairs of join and meet with ``a``.
+
+    :param join: a table of ``join``
+    :param meet: a table of ``meet``
+    :returns: whether the lattice is distributive
+    """
+    return all(
+        len(set(zip(join[element], meet[element]))) == len(join)
+        for element in range(len(join))
+    )
+
 
 class Lattice(AlgebraicStructure):
     r"""
@@ -76,6 +171,8 @@ class Lattice(AlgebraicStructure):
     Traceback (most recent call last):
      ...
     ValueError: meet is not associative
+    >>> lattice.is_distributive(), lattice.is_modular()
+    (True, True)
     """
 
     def check_axioms(self) -> None:  # noqa: D102
@@ -99,6 +196,38 @@ class Lattice(AlgebraicStructure):
     def operation_map(self) -> Dict[str, str]:  # noqa: D102
         return {"meet": "^", "join": "v"}
 
+    _order_tables: Optional[Tuple[Table, Table, List[int]]] = None
+
+    @property
+    def order_tables(self) -> Tuple[Table, Table, List[int]]:
+        """
+        Return tables of ``join`` and ``meet`` and an order matrix.
+
+        They are computed once (and again after remapping symbols).
+        Elements are numbered as in ``symbols``, and the order matrix is
+        a bitmask of elements below every element.
+        """
+        if self._order_tables is None:
+            tables = self.tabular_format
+            self._order_tables = (
+                tables["join"],  # type: ignore
+                tables["meet"],  # type: ignore
+                order_from_meet(tables["meet"]),  # type: ignore
+            )
+        return self._order_tables  # type: ignore
+
+    def remap_symbols(self, symbol_map: Dict[str, str]) -> None:  # noqa: D102
+        super().remap_symbols(symbol_map)
+        self._order_tables = None
+
+    def is_distributive(self) -> bool:
+        """Check whether the lattice is distributive."""
+        return is_distributive_table(*self.order_tables[:2])
+
+    def is_modular(self) -> bool:
+        """Check whether the lattice is modular."""
+        return is_modular_table(*self.order_tables)
+
     @property
     def more(self) -> Dict[str, List[str]]:
         """Return a representation of a 'more' relation of the lattice."""
@@ -157,3 +286,35 @@ class Lattice(AlgebraicStructure):
             )
         }
         self.remap_symbols(symbol_map)
+
+
+def classify_lattices(
+    lattices: Iterable[Lattice],
+) -> List[Tuple[bool, bool]]:
+    """
+    Check distributivity and modularity of many lattices.
+
+    Distributivity is checked only for modular lattices.
+
+    >>> import os
+    >>> from tempfile import TemporaryDirectory
+    >>> from residuated_binars.lattice_catalog import LatticeCatalog
+    >>> with TemporaryDirectory() as directory, LatticeCatalog(
+    ...     os.path.join(directory, "lattices.rba"), 5
+    ... ) as catalog:
+    ...     classify_lattices(catalog.lattices(5))
+    [(False, True), (False, False), (True, True), (True, True), (True, True)]
+
+    :param lattices: lattices to check
+    :returns: whether every lattice is distributive and whether it's modular
+    """
+    result = []
+    for lattice in lattices:
+        modular = is_modular_table(*lattice.order_tables)
+        result.append(
+            (
+                modular and is_distributive_table(*lattice.order_tables[:2]),
+                modular,
+            )
+        )
+    return result
@@ -0,0 +1,429 @@
+# Copyright 2022 Boris Shminke
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# noqa: D205, D400
+"""
+Lattice Catalog
+================
+
+All lattices up to a given cardinality (up to isomorphism) in a model
+archive.
+
+-  a lattice is described by its order: for every element, a bitmask of
+   elements below it
+-  every lattice with more than two elements is got from a smaller one by
+   adding a new coatom, so lattices are generated cardinality by
+   cardinality, and isomorphic copies are dropped by comparing canonical
+   forms
+-  lattices are saved as ``BoundedLattice`` (every finite lattice is
+   bounded) with labels like ``L5_3:DM``, where ``D`` and ``M`` mark
+   distributive and modular ones; the one-element lattice, where the
+   bounds coincide, is saved as ``Lattice`` with one element ``⟘``
+-  lattices are loaded without checking axioms again
+-  a catalog is an ``archive.ModelArchive``, so its tables are read
+   without copying and shared between processes
+
+"""
+import os
+from collections import defaultdict
+from itertools import chain, count, permutations, product
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from residuated_binars.algebraic_structure import BOT, TOP, AlgebraicStructure
+from residuated_binars.archive import ModelArchive, write_archive
+from residuated_binars.bounded_lattice import BoundedLattice
+from residuated_binars.lattice import (
+    Lattice,
+    is_distributive_table,
+    is_modular_table,
+)
+
+Order = Tuple[int, ...]
+
+
+def _bits(mask: int) -> List[int]:
+    return [index for index in range(mask.bit_length()) if mask >> index & 1]
+
+
+def _above(below: Sequence[int]) -> List[int]:
+    return [
+        sum(1 << j for j, mask in enumerate(below) if mask >> i & 1)
+        for i in range(len(below))
+    ]
+
+
+def _ranks(keys: Sequence[Any]) -> List[int]:
+    ranks = {key: rank for rank, key in enumerate(sorted(set(keys)))}
+    return [ranks[key] for key in keys]
+
+
+def _colours(below: Sequence[int]) -> List[int]:
+    lower = [_bits(mask) for mask in below]
+    upper = [_bits(mask) for mask in _above(below)]
+    colours = _ranks(
+        [(len(lower[i]), len(upper[i])) for i in range(len(below))]
+    )
+    while True:
+        refined = _ranks(
+            [
+                (
+                    colours[i],
+                    tuple(sorted(colours[j] for j in lower[i])),
+                    tuple(sorted(colours[j] for j in upper[i])),
+                )
+                for i in range(len(below))
+            ]
+        )
+        if max(refined) == max(colours):
+            return colours
+        colours = refined
+
+
+def canonical_form(below: Sequence[int]) -> Order:
+    """
+    Get the same description for all isomorphic orders.
+
+    Elements are split into classes which no isomorphism mixes, and the
+    smallest description over all orderings inside the classes is chosen.
+    In a canonical form, elements go in order of a linear extension.
+
+    >>> canonical_form((0b0001, 0b1111, 0b0101, 0b1001))
+    (1, 3, 5, 15)
+    >>> canonical_form((0b111, 0b110, 0b100))
+    (1, 3, 7)
+
+    :param below: a bitmask of elements below every element
+    :returns: bitmasks of elements below after renumbering
+    """
+    colours = _colours(below)
+    lower = [_bits(mask) for mask in below]
+    best: Optional[Order] = None
+    for choice in product(
+        *(
+            permutations(
+                [index for index, colour in enumerate(colours) if colour == c]
+            )
+            for c in range(max(colours) + 1)
+        )
+    ):
+        order = list(chain.from_iterable(choice))
+        position = {element: k for k, element in enumerate(order)}
+        code = tuple(
+            sum(1 << position[j] for j in lower[element]) for element in order
+        )
+        if best is None or code < best:
+            best = code
+    return best  # type: ignore
+
+
+def _downsets(below: Order) -> Iterator[int]:
+    stack = [(1, 1)]
+    while stack:
+        index, downset = stack.pop()
+        if index == len(below) - 1:
+            yield downset
+        else:
+            stack.append((index + 1, downset))
+            if below[index] & ~downset == 1 << index:
+                stack.append((index + 1, downset | 1 << index))
+
+
+def _keeps_meets(below: Order, downset: int) -> bool:
+    masks = set(below)
+    return all(downset & mask in masks for mask in below[:-1])
+
+
+def _add_coatom(below: Order, downset: int) -> Order:
+    return below[:-1] + (
+        downset | 1 << (len(below) - 1),
+        (1 << (len(below) + 1)) - 1,
+    )
+
+
+def generate_lattices(max_cardinality: int) -> Iterator[Order]:
+    """
+    Generate orders of all lattices up to isomorphism.
+
+    A new coatom can be put above any non-empty down-set of elements
+    except the top if every other element (except the top) has the
+    greatest element below it in this down-set.
+
+    >>> from collections import Counter
+    >>> Counter(
+    ...     bin(below[-1]).count("1") for below in generate_lattices(7)
+    ... )
+    Counter({7: 53, 6: 15, 5: 5, 4: 2, 1: 1, 2: 1, 3: 1})
+
+    :param max_cardinality: a maximal number of elements
+    :returns: canonical forms of orders with the bottom first and the top
+        last, by cardinality
+    """
+    level: List[Order] = [(1,)]
+    for cardinality in range(1, max_cardinality + 1):
+        if cardinality == 2:
+            level = [(1, 3)]
+        elif cardinality > 2:
+            level = sorted(
+                {
+                    canonical_form(_add_coatom(below, downset))
+                    for below in level
+                    for downset in _downsets(below)
+                    if _keeps_meets(below, downset)
+                }
+            )
+        yield from level
+
+
+def lattice_tables(below: Order) -> Dict[str, List[List[int]]]:
+    """
+    Get tables of lattice operations from an order.
+
+    >>> lattice_tables((1, 3, 5, 15))
+    {'join': [[0, 1, 2, 3], [1, 1, 3, 3], [2, 3, 2, 3], [3, 3, 3, 3]],
+     'meet': [[0, 0, 0, 0], [0, 1, 0, 1], [0, 0, 2, 2], [0, 1, 2, 3]]}
+
+    :param below: a bitmask of elements below every element of a lattice
+    :returns: tables of ``join`` and ``meet``
+    """
+    above = _above(below)
+    lower_index = {mask: index for index, mask in enumerate(below)}
+    upper_index = {mask: index for index, mask in enumerate(above)}
+    return {
+        "join": [[upper_index[one & two] for two in above] for one in above],
+        "meet": [[lower_index[one & two] for two in below] for one in below],
+    }
+
+
+def _symbols(cardinality: int) -> List[str]:
+    if cardinality == 1:
+        return [BOT]
+    return [BOT] + [chr(ord("a") + i) for i in range(cardinality - 2)] + [TOP]
+
+
+def _lattice(
+    label: str, below: Order, tables: Dict[str, List[List[int]]]
+) -> Any:
+    symbols = _symbols(len(below))
+    modular = is_modular_table(tables["join"], tables["meet"], list(below))
+    flags = (
+        "D"
+        if modular and is_distributive_table(tables["join"], tables["meet"])
+        else ""
+    ) + ("M" if modular else "")
+    return (BoundedLattice if len(below) > 1 else Lattice)(
+        f"{label}:{flags}",
+        {
+            name: {
+                symbols[i]: {
+                    symbols[j]: symbols[value] for j, value in enumerate(row)
+                }
+                for i, row in enumerate(table)
+            }
+            for name, table in tables.items()
+        },
+    )
+
+
+def build_catalog(file_name: str, max_cardinality: int) -> int:
+    """
+    Write all lattices up to a given cardinality to a model archive.
+
+    The archive is written to a temporary file first and then renamed, so
+    other processes never see a half-written catalog.
+
+    :param file_name: a name of an archive file to write
+    :param max_cardinality: a maximal number of elements
+    :returns: a number of saved lattices
+    """
+    numbers: Dict[int, Iterator[int]] = defaultdict(count)
+    saved = write_archive(
+        f"{file_name}.tmp",
+        (
+            _lattice(
+                f"L{len(below)}_{next(numbers[len(below)])}",
+                below,
+                lattice_tables(below),
+            )
+            for below in generate_lattices(max_cardinality)
+        ),
+    )
+    os.replace(f"{file_name}.tmp", file_name)
+    return saved
+
+
+def _has_flags(
+    label: str, distributive: Optional[bool], modular: Optional[bool]
+) -> bool:
+    flags = label.rsplit(":", 1)[1]
+    return (distributive is None or distributive == ("D" in flags)) and (
+        modular is None or modular == ("M" in flags)
+    )
+
+
+class LatticeCatalog:
+    """
+    A catalog of lattices stored in a model archive.
+
+    >>> from tempfile import TemporaryDirectory
+    >>> directory = TemporaryDirectory()
+    >>> file_name = os.path.join(directory.name, "lattices.rba")
+    >>> catalog = LatticeCatalog(file_name, 6)
+    >>> [catalog.count(cardinality) for cardinality in range(1, 7)]
+    [1, 1, 1, 2, 5, 15]
+    >>> catalog.lattices(1)[0].label, catalog.lattices(1)[0].symbols
+    ('L1_0:DM', ['⟘'])
+    >>> catalog.indices(5, distributive=False)
+    [5, 6]
+    >>> catalog.lattices(5, modular=False)
+    [{'join': [[0, 1, 2, 3, 4], [1, 1, 4, 4, 4], [2, 4, 2, 3, 4],
+    [3, 4, 3, 3, 4], [4, 4, 4, 4, 4]],
+    'meet': [[0, 0, 0, 0, 0], [0, 1, 0, 0, 1], [0, 0, 2, 2, 2],
+    [0, 0, 2, 3, 3], [0, 1, 2, 3, 4]]}]
+    >>> catalog.count(6, distributive=True), catalog.count(6, modular=True)
+    (5, 8)
+    >>> catalog.archive.label(5), catalog.archive.label(6)
+    ('L5_0:M', 'L5_1:')
+    >>> tables = catalog.tables(4)[1]
+    >>> tables["join"].tolist()
+    [0, 1, 2, 3, 1, 1, 2, 3, 2, 2, 2, 3, 3, 3, 3, 3]
+    >>> tables["join"].release(); tables["meet"].release()
+    >>> import pickle
+    >>> with pickle.loads(pickle.dumps(catalog)) as copy:
+    ...     print(copy.count(6))
+    15
+    >>> catalog.close()
+    >>> with LatticeCatalog(file_name) as catalog:
+    ...     print(len(catalog.archive))
+    25
+    >>> with LatticeCatalog(file_name, 7) as catalog:
+    ...     print(catalog.count(7))
+    53
+    >>> directory.cleanup()
+    """
+
+    def __init__(self, file_name: str, max_cardinality: Optional[int] = None):
+        """
+        Open a catalog (and build it first if needed).
+
+        :param file_name: a name of a catalog file
+        :param max_cardinality: lattices of which cardinalities the catalog
+            must contain; if the file doesn't exist or has only smaller
+            lattices, it's rebuilt
+        """
+        self.file_name = file_name
+        if max_cardinality is not None and (
+            not os.path.exists(file_name)
+            or _max_cardinality(file_name) < max_cardinality
+        ):
+            build_catalog(file_name, max_cardinality)
+        self.archive = ModelArchive(file_name)
+
+    def indices(
+        self,
+        cardinality: int,
+        distributive: Optional[bool] = None,
+        modular: Optional[bool] = None,
+    ) -> List[int]:
+        """
+        Find lattices of a given cardinality in the archive.
+
+        :param cardinality: a number of elements
+        :param distributive: if not ``None``, take only distributive (or only
+            non-distributive) lattices
+        :param modular: if not ``None``, take only modular (or only
+            non-modular) lattices
+        :returns: indices of lattices in the archive
+        """
+        return [
+            index
+            for index in self.archive.indices(cardinality)
+            if _has_flags(self.archive.label(index), distributive, modular)
+        ]
+
+    def count(
+        self,
+        cardinality: int,
+        distributive: Optional[bool] = None,
+        modular: Optional[bool] = None,
+    ) -> int:
+        """
+        Count lattices of a given cardinality.
+
+        :param cardinality: a number of elements
+        :param distributive: a filter as in ``indices``
+        :param modular: a filter as in ``indices``
+        :returns: a number of lattices up to isomorphism
+        """
+        return len(self.indices(cardinality, distributive, modular))
+
+    def lattices(
+        self,
+        cardinality: int,
+        distributive: Optional[bool] = None,
+        modular: Optional[bool] = None,
+    ) -> List[AlgebraicStructure]:
+        """
+        Load lattices of a given cardinality.
+
+        :param cardinality: a number of elements
+        :param distributive: a filter as in ``indices``
+        :param modular: a filter as in ``indices``
+        :returns: bounded lattices (their axioms are not checked again)
+        """
+        return [
+            self.archive.load(index, validate=False)
+            for index in self.indices(cardinality, distributive, modular)
+        ]
+
+    def tables(
+        self,
+        cardinality: int,
+        distributive: Optional[bool] = None,
+        modular: Optional[bool] = None,
+    ) -> List[Dict[str, memoryview]]:
+        """
+        Get flat tables of lattices as views of the file (without copying).
+
+        The views must be released before closing the catalog.
+
+        :param cardinality: a number of elements
+        :param distributive: a filter as in ``indices``
+        :param modular: a filter as in ``indices``
+        :returns: tables of ``join`` and ``meet`` for every lattice
+        """
+        return [
+            self.archive.tables(index)
+            for index in self.indices(cardinality, distributive, modular)
+        ]
+
+    def close(self) -> None:
+        """Close the archive."""
+        self.archive.close()
+
+    def __enter__(self) -> "LatticeCatalog":
+        """Use a catalog as a context manager."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Close a catalog on exit."""
+        self.close()
+
+    def __reduce__(self) -> Tuple[Any, Tuple[str]]:
+        """Reopen a catalog by name (for sending it to another process)."""
+        return LatticeCatalog, (self.file_name,)
+
+
+def _max_cardinality(file_name: str) -> int:
+    with ModelArchive(file_name) as archive:
+        return max(archive.cardinalities, default=0)
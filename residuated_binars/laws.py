@@ -0,0 +1,395 @@
+# Copyright 2022 Boris Shminke
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# noqa: D205, D400
+"""
+Laws
+=====
+
+Checking laws written in Isabelle syntax (like the ones from
+``constants``) on finite models.
+
+-  a law is a conjunction of universally quantified equations between
+   terms built from operations, variables and constants
+-  ``C0`` and ``C1`` denote the same elements of a model if it has them,
+   and its bottom and top otherwise
+-  a catalogue of laws contains every template from ``constants``
+   instantiated with operations of residuated binars, and the laws from
+   the lists of ``constants``
+-  associativity of an operation is checked by
+   ``axiom_checkers.associative`` (Light's test) instead of evaluating
+   the formula for every triple of elements
+
+"""
+import re
+from itertools import permutations
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from residuated_binars import constants
+from residuated_binars.algebraic_structure import (
+    BOT,
+    TOP,
+    AlgebraicStructure,
+)
+from residuated_binars.axiom_checkers import associative
+
+TOKEN = re.compile(r"\s*(\\<forall>|::\w+\.|\w+|[(),=&])")
+DEFAULT_CONSTANTS = {"C0": BOT, "C1": TOP}
+BINARY_OPERATIONS = ["join", "meet", "mult", "over", "undr"]
+UNARY_OPERATIONS = ["invo"]
+Term = Callable[[Dict[str, Any], Dict[str, str]], str]
+
+
+class _Parser:
+    """A recursive descent parser of laws."""
+
+    def __init__(self, formula: str):
+        """
+        Split a formula into tokens.
+
+        :param formula: a law in Isabelle syntax
+        :raises ValueError: if there are unknown symbols
+        """
+        self.tokens = TOKEN.findall(formula)
+        if "".join(self.tokens) != re.sub(r"\s", "", formula):
+            raise ValueError(f"can't parse a law: {formula}")
+        self.pos = 0
+        self.formula = formula
+        self.operations: Dict[str, int] = {}
+        self.constants: List[str] = []
+        self.variables: List[str] = []
+
+    def peek(self) -> Optional[str]:
+        """
+        Look at the next token.
+
+        :returns: the next token or ``None`` at the end
+        """
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self, expected: Optional[str] = None) -> str:
+        """
+        Consume the next token.
+
+        :param expected: a token which must be next
+        :returns: the consumed token
+        :raises ValueError: if the next token is not expected
+        """
+        token = self.peek()
+        if token is None or expected is not None and token != expected:
+            raise ValueError(f"can't parse a law: {self.formula}")
+        self.pos += 1
+        return token
+
+    def conjunction(self) -> Callable[..., bool]:
+        """
+        Parse a conjunction of formulae.
+
+        :returns: a function checking it on a model
+        """
+        parts = [self.primary()]
+        while self.peek() == "&":
+            self.take()
+            parts.append(self.primary())
+        if len(parts) == 1:
+            return parts[0]
+        return lambda model, env: all(part(model, env) for part in parts)
+
+    def primary(self) -> Callable[..., bool]:
+        """
+        Parse a quantified formula, a formula in brackets, or an equation.
+
+        :returns: a function checking it on a model
+        """
+        if self.peek() == "\\<forall>":
+            return self._quantified()
+        if self.peek() == "(":
+            self.take()
+            result = self.conjunction()
+            self.take(")")
+            return result
+        left = self.term()
+        self.take("=")
+        return _equation(left, self.term())
+
+    def _quantified(self) -> Callable[..., bool]:
+        self.take()
+        variable = self.take()
+        self.take()
+        if variable not in self.variables:
+            self.variables.append(variable)
+        return _for_all(variable, self.conjunction())
+
+    def term(self) -> Term:
+        """
+        Parse a term.
+
+        :returns: a function evaluating it on a model
+        """
+        name = self.take()
+        if self.peek() != "(":
+            if re.fullmatch(r"C\d+", name):
+                self.constants.append(name)
+                return lambda model, env: model["constants"][name]
+            return lambda model, env: env[name]
+        self.take()
+        arguments = [self.term()]
+        while self.take() == ",":
+            arguments.append(self.term())
+        self.operations[name] = len(arguments)
+        return _application(name, arguments)
+
+
+def _for_all(variable: str, body: Callable[..., bool]) -> Callable[..., bool]:
+    return lambda model, env: (
+        body(model, env)
+        if variable in env
+        else all(
+            body(model, {**env, variable: symbol})
+            for symbol in model["symbols"]
+        )
+    )
+
+
+def _equation(left: Term, right: Term) -> Callable[..., bool]:
+    return lambda model, env: left(model, env) == right(model, env)
+
+
+def _application(name: str, arguments: List[Term]) -> Term:
+    if len(arguments) == 1:
+        return lambda model, env: model["operations"][name][
+            arguments[0](model, env)
+        ]
+    return lambda model, env: model["operations"][name][
+        arguments[0](model, env)
+    ][arguments[1](model, env)]
+
+
+def _associativity(formula: str) -> Optional[Callable[..., bool]]:
+    for name in BINARY_OPERATIONS:
+        if formula == constants.ASSOCIATIVITY.replace("f(", f"{name}("):
+            return lambda model, env: associative(model["operations"][name])
+    return None
+
+
+class Law:
+    r"""
+    A law which can be checked on finite models.
+
+    >>> join = {"0": {"0": "0", "1": "1"}, "1": {"0": "1", "1": "1"}}
+    >>> meet = {"0": {"0": "0", "1": "0"}, "1": {"0": "0", "1": "1"}}
+    >>> lattice = AlgebraicStructure("test", {"join": join, "meet": meet})
+    >>> Law("absorption", constants.LATTICE[4]).holds(lattice)
+    True
+    >>> Law("test", "(\\<forall> x::finite_type. join(x, C0) = x)").holds(
+    ...     lattice
+    ... )
+    False
+    >>> lattice.remap_symbols({"0": BOT, "1": TOP})
+    >>> law = Law("zero", constants.BOUNDED_LATTICE[0])
+    >>> law.operations, law.holds(lattice)
+    ({'meet': 2}, True)
+    >>> Law("test", constants.INVOLUTION[0]).holds(lattice)
+    False
+    >>> Law("test", constants.LATTICE[2]).holds(lattice)
+    True
+    >>> idempotence = Law(
+    ...     "idempotence",
+    ...     "(\\<forall> x::finite_type. join(x, x) = x & meet(x, x) = x)"
+    ... )
+    >>> partial = AlgebraicStructure(
+    ...     "partial", {"join": {"0": {"1": "1"}}, "meet": {"0": {"0": "0"}}}
+    ... )
+    >>> [model.label for model in idempotence.models([lattice, partial])]
+    ['test']
+    >>> Law("test", "x = x)")
+    Traceback (most recent call last):
+     ...
+    ValueError: can't parse a law: x = x)
+    >>> Law("test", "(\\<forall> x::finite_type. x = x")
+    Traceback (most recent call last):
+     ...
+    ValueError: can't parse a law: (\<forall> x::finite_type. x = x
+    >>> Law("test", "x ≤ y")
+    Traceback (most recent call last):
+     ...
+    ValueError: can't parse a law: x ≤ y
+    """
+
+    def __init__(self, name: str, formula: str):
+        """
+        Parse a law.
+
+        :param name: a name of the law
+        :param formula: a law in Isabelle syntax
+        :raises ValueError: if the formula can't be parsed
+        """
+        self.name = name
+        self.formula = formula
+        parser = _Parser(formula)
+        self._instance = parser.conjunction()
+        if parser.peek() is not None:
+            raise ValueError(f"can't parse a law: {formula}")
+        self.operations = parser.operations
+        self.constants, self.variables = parser.constants, parser.variables
+        self._check = _associativity(formula) or self._instance
+
+    def holds(self, structure: AlgebraicStructure) -> bool:
+        """
+        Check the law on a model.
+
+        :param structure: a finite model
+        :returns: whether the law holds (it doesn't if the model has no
+            operations or constants it uses)
+        """
+        symbols = structure.symbols
+        model_constants = {
+            name: name if name in symbols else DEFAULT_CONSTANTS.get(name)
+            for name in self.constants
+        }
+        if not set(self.operations).issubset(structure.operations) or not (
+            set(model_constants.values()).issubset(symbols)
+        ):
+            return False
+        try:
+            return self._check(
+                {
+                    "symbols": symbols,
+                    "operations": structure.operations,
+                    "constants": model_constants,
+                },
+                {},
+            )
+        except KeyError:
+            return False
+
+    def check_instance(
+        self, model: Dict[str, Any], assignment: Dict[str, Any]
+    ) -> bool:
+        """
+        Check one instance of the law.
+
+        >>> law = Law("test", constants.ASSOCIATIVITY.replace("f(", "mult("))
+        >>> law.variables
+        ['x', 'y', 'z']
+        >>> model = {"operations": {"mult": [[0, 0], [0, 1]]}}
+        >>> law.check_instance(model, {"x": 0, "y": 1, "z": 1})
+        True
+
+        :param model: a dictionary with ``operations`` (tables indexed by
+            elements) and ``constants`` (if the law uses them)
+        :param assignment: values of all the variables of the law
+        :returns: whether the instance holds
+        """
+        return self._instance(model, assignment)
+
+    def models(
+        self, structures: Iterable[AlgebraicStructure]
+    ) -> List[AlgebraicStructure]:
+        """
+        Select models where the law holds.
+
+        :param structures: finite models
+        :returns: the models satisfying the law
+        """
+        return [structure for structure in structures if self.holds(structure)]
+
+
+TEMPLATES: Dict[str, Tuple[str, ...]] = {
+    "COMMUTATIVITY": ("f",),
+    "ASSOCIATIVITY": ("f",),
+    "IDEMPOTENCE": ("f",),
+    "LEFT_IDENTITY": ("f",),
+    "RIGHT_IDENTITY": ("f",),
+    "LEFT_ZERO": ("f",),
+    "RIGHT_ZERO": ("f",),
+    "LEFT_DISTRIBUTIVITY": ("f", "g"),
+    "RIGHT_DISTRIBUTIVITY": ("f", "g"),
+    "LEFT_ANTI_DISTRIBUTIVITY": ("f", "g", "h"),
+    "RIGHT_ANTI_DISTRIBUTIVITY": ("f", "g", "h"),
+    "ABSORPTION": ("f", "g"),
+    "PROJECTION": ("u",),
+    "DE_MORGAN": ("u", "g", "h"),
+}
+LAW_LISTS = [
+    "LATTICE",
+    "RESIDUATED_BINAR",
+    "TRIVIAL_DISTRIBUTIVITY_LAWS",
+    "NON_TRIVIAL_DISTRIBUTIVITY_LAWS",
+    "BOUNDED_LATTICE",
+    "ORTHOCOMPLEMENTATION",
+    "INVOLUTION",
+    "MODULARITY",
+]
+
+
+def _instances(template: str) -> List[Tuple[str, str]]:
+    parameters = TEMPLATES[template]
+    binary_count = len([name for name in parameters if name != "u"])
+    result = []
+    for binary in permutations(BINARY_OPERATIONS, binary_count):
+        for unary in UNARY_OPERATIONS if "u" in parameters else [""]:
+            operations = iter(binary)
+            substitution = {
+                parameter: unary if parameter == "u" else next(operations)
+                for parameter in parameters
+            }
+            formula = getattr(constants, template)
+            for parameter, operation in substitution.items():
+                formula = formula.replace(
+                    f"{'f' if parameter == 'u' else parameter}(",
+                    f"{operation}(",
+                )
+            result.append(
+                (f"{template}({', '.join(substitution.values())})", formula)
+            )
+    return result
+
+
+def law_catalogue() -> Dict[str, str]:
+    """
+    Get all the laws known to the package.
+
+    Instances of templates are named like ``ASSOCIATIVITY(mult)`` and
+    ``LEFT_DISTRIBUTIVITY(undr, meet)`` (operations in order of ``f``,
+    ``g`` and ``h``), the laws from lists are named like
+    ``RESIDUATED_BINAR[6]``. If a law occurs several times, only the first
+    name is kept.
+
+    >>> catalogue = law_catalogue()
+    >>> len(catalogue)
+    247
+    >>> catalogue["LEFT_DISTRIBUTIVITY(undr, meet)"][-51:]
+    'undr(x, meet(y, z)) = meet(undr(x, y), undr(x, z)))'
+    >>> catalogue["RESIDUATED_BINAR[8]"][-43:]
+    ' meet(x, over(join(mult(x, y), z), y)) = x)'
+
+    :returns: a map from names to formulae in Isabelle syntax
+    """
+    named: List[Tuple[str, str]] = []
+    for template in TEMPLATES:
+        named.extend(_instances(template))
+    for list_name in LAW_LISTS:
+        laws = getattr(constants, list_name)
+        if isinstance(laws, str):
+            named.append((list_name, laws))
+        else:
+            named.extend(
+                (f"{list_name}[{index}]", law)
+                for index, law in enumerate(laws)
+            )
+    formulae: Dict[str, str] = {}
+    for name, formula in named:
+        formulae.setdefault(formula, name)
+    return {name: formula for formula, name in formulae.items()}
@@ -0,0 +1,252 @@
+# Copyright 2022 Boris Shminke
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# noqa: D205, D400
+"""
+Loader
+=======
+
+Loading all models found during an experiment at once.
+
+-  finds every log of Isabelle server replies under an experiment folder
+   (both ``task[n]/isabelle.out`` written by ``check_assumptions`` and
+   ``isabelle[n].out`` kept by ``use_nitpick``)
+-  parses the logs in a pool of processes
+-  tags every structure with a log file and a label of a theory (or a
+   lemma); logs are ordered by a cardinality guessed from their names
+-  collects errors for every file and model instead of stopping at the
+   first one
+
+"""
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple, Union
+
+from residuated_binars.algebraic_structure import AlgebraicStructure
+from residuated_binars.filter_theories import (
+    TheoryResult,
+    read_theory_results,
+)
+
+LOG_NAME = re.compile(r"isabelle(\d*)\.out")
+TASK_FOLDER = re.compile(r"task(\d+)")
+
+
+class LoadedStructure:
+    """An algebraic structure together with where it was found."""
+
+    def __init__(self, structure: AlgebraicStructure, path: str):
+        """
+        Tag a structure.
+
+        :param structure: a parsed structure (its label is a name of a
+            theory or a lemma)
+        :param path: a log file where the structure was found
+        """
+        self.structure = structure
+        self.path = path
+
+    @property
+    def cardinality(self) -> int:
+        """Return a number of elements of the structure."""
+        return self.structure.cardinality
+
+    @property
+    def label(self) -> str:
+        """Return a name of a theory (or a lemma) of the structure."""
+        return self.structure.label
+
+    def __repr__(self):
+        """Return a short description."""
+        return f"{self.label} ({self.cardinality}): {self.structure}"
+
+
+class LoadError:
+    """A description of a file or a model which failed to load."""
+
+    def __init__(
+        self, path: str, error: Exception, label: Optional[str] = None
+    ):
+        """
+        Remember an error.
+
+        :param path: a log file
+        :param error: an exception raised while loading
+        :param label: a name of a theory (or a lemma) or ``None`` if the
+            whole file failed
+        """
+        self.path = path
+        self.label = label
+        self.error_type = type(error).__name__
+        self.message = str(error)
+
+    @property
+    def whole_file(self) -> bool:
+        """Return whether the whole file failed to load."""
+        return self.label is None
+
+    def __repr__(self):
+        """Return a short description."""
+        return (
+            f"{os.path.basename(self.path)}"
+            f"{'' if self.label is None else ':' + self.label}: "
+            f"{self.error_type}: {self.message}"
+        )
+
+
+def get_cardinality(log_file_name: str) -> Optional[int]:
+    """
+    Guess a cardinality which was checked from a name of a log file.
+
+    >>> get_cardinality(os.path.join("tasks", "isabelle5.out"))
+    5
+    >>> get_cardinality(os.path.join("task3", "isabelle.out"))
+    3
+    >>> print(get_cardinality("isabelle.out"))
+    None
+
+    :param log_file_name: a path to a log of Isabelle server replies
+    :returns: a cardinality or ``None`` if it's unknown
+    """
+    match = LOG_NAME.fullmatch(os.path.basename(log_file_name))
+    if match is not None and match.group(1):
+        return int(match.group(1))
+    folder = TASK_FOLDER.fullmatch(
+        os.path.basename(os.path.dirname(os.path.abspath(log_file_name)))
+    )
+    return int(folder.group(1)) if folder is not None else None
+
+
+def find_logs(experiment_path: str) -> List[str]:
+    """
+    Find all logs of Isabelle server replies in a folder and its subfolders.
+
+    :param experiment_path: an experiment folder
+    :returns: paths to log files ordered by cardinality
+    """
+    logs = [
+        os.path.join(path, file_name)
+        for path, _, file_names in os.walk(experiment_path)
+        for file_name in file_names
+        if LOG_NAME.fullmatch(file_name) is not None
+    ]
+    return sorted(
+        logs,
+        key=lambda log: (get_cardinality(log) or 0, log),
+    )
+
+
+def load_log(
+    log_file_name: str,
+) -> Tuple[List[LoadedStructure], List[LoadError]]:
+    """
+    Parse all models from one log file.
+
+    :param log_file_name: a path to a log of Isabelle server replies
+    :returns: tagged structures and errors
+    """
+    try:
+        results = read_theory_results(log_file_name)
+    except (OSError, ValueError) as error:
+        return [], [LoadError(log_file_name, error)]
+    loaded = [
+        _load_result(result, log_file_name) for result in results.values()
+    ]
+    return (
+        [item for item in loaded if isinstance(item, LoadedStructure)],
+        [item for item in loaded if isinstance(item, LoadError)],
+    )
+
+
+def _load_result(
+    result: TheoryResult, log_file_name: str
+) -> Union[LoadedStructure, LoadError, None]:
+    try:
+        model = result.model
+    except ValueError as error:
+        return LoadError(log_file_name, error, result.name)
+    if model is None:
+        return None
+    return LoadedStructure(model, log_file_name)
+
+
+def load_experiment(
+    experiment_path: str, processes: Optional[int] = None
+) -> Tuple[List[LoadedStructure], List[LoadError]]:
+    r"""
+    Parse all models found during an experiment.
+
+    >>> import sys
+    >>> if sys.version_info.major == 3 and sys.version_info.minor >= 9:
+    ...     from importlib.resources import files
+    ... else:
+    ...     from importlib_resources import files
+    >>> structures, errors = load_experiment(
+    ...     files("residuated_binars").joinpath("resources")
+    ... )
+    >>> sorted({structure.cardinality for structure in structures})
+    [7]
+    >>> structures[0].label, structures[0].cardinality
+    ('T105', 7)
+    >>> errors
+    []
+    >>> import json, shutil
+    >>> os.makedirs(os.path.join("test-experiment", "task4"))
+    >>> with open(
+    ...     os.path.join("test-experiment", "task4", "isabelle.out"), "w"
+    ... ) as log_file:
+    ...     _ = log_file.write("FINISHED " + json.dumps({"nodes": [{
+    ...         "theory_name": "Draft.T0_1",
+    ...         "messages": [{"message": "    join = (\\<lambda>x. _)"
+    ...             "((a, a) := a, (a, b) := a, (b, a) := b, (b, b) := b)\n"
+    ...             "    meet = (\\<lambda>x. _)"
+    ...             "((a, a) := a, (a, b) := a, (b, a) := a, (b, b) := b)"
+    ...         }]
+    ...     }]}))
+    >>> os.makedirs(os.path.join("test-experiment", "tasks"))
+    >>> with open(
+    ...     os.path.join("test-experiment", "tasks", "isabelle5.out"), "w"
+    ... ) as log_file:
+    ...     _ = log_file.write('FINISHED {"nodes":[{"theory_name":"T"')
+    >>> _ = shutil.copy(
+    ...     files("residuated_binars").joinpath("resources/isabelle2.out"),
+    ...     os.path.join("test-experiment", "tasks")
+    ... )
+    >>> structures, errors = load_experiment("test-experiment", processes=1)
+    >>> str(structures[0])[:24]
+    "T105 (7): {'invo': [6, 4"
+    >>> errors
+    [isabelle.out:T0_1: ValueError: join is not commutative,
+    isabelle5.out: JSONDecodeError: Expecting ',' delimiter:
+    line 1 column 38 (char 37)]
+    >>> [error.whole_file for error in errors]
+    [False, True]
+    >>> shutil.rmtree("test-experiment")
+
+    :param experiment_path: an experiment folder
+    :param processes: a number of processes to use (by default, the number
+        of CPUs); with ``1``, everything is done in the current process
+    :returns: tagged structures and errors (for files and separate models)
+    """
+    logs = find_logs(experiment_path)
+    if processes == 1:
+        results = list(map(load_log, logs))
+    else:
+        with ProcessPoolExecutor(processes) as executor:
+            results = list(executor.map(load_log, logs))
+    return (
+        [structure for structures, _ in results for structure in structures],
+        [error for _, errors in results for error in errors],
+    )
@@ -0,0 +1,336 @@
+# Copyright 2022 Boris Shminke
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# noqa: D205, D400
+"""
+Model Index
+============
+
+A local ``SQLite`` store of found models and the laws they satisfy.
+
+-  every model is saved with its cardinality and a source theory, and
+   every law from a catalogue (by default, ``law_catalogue()``) which
+   holds in it is saved as a row of a ``model_laws`` table
+-  the catalogue is saved in the same database, so law numbers keep their
+   meaning when the database is reopened
+-  a query for models satisfying some laws and violating others is one
+   ``SELECT`` on the ``models`` table with a sub-query on ``model_laws``
+   for every law, each served by an index on laws (and on cardinality if
+   it's given)
+
+"""
+import json
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from residuated_binars.algebraic_structure import AlgebraicStructure
+from residuated_binars.archive import class_name, import_class
+from residuated_binars.laws import Law, law_catalogue
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS laws (
+    bit INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    formula TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS models (
+    id INTEGER PRIMARY KEY,
+    label TEXT NOT NULL,
+    theory TEXT NOT NULL,
+    cardinality INTEGER NOT NULL,
+    class_name TEXT NOT NULL,
+    operations TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS model_laws (
+    model INTEGER NOT NULL REFERENCES models (id),
+    law INTEGER NOT NULL REFERENCES laws (bit),
+    PRIMARY KEY (model, law)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS models_cardinality ON models (cardinality);
+CREATE INDEX IF NOT EXISTS models_theory ON models (theory);
+CREATE INDEX IF NOT EXISTS models_label ON models (label);
+CREATE INDEX IF NOT EXISTS model_laws_law ON model_laws (law, model);
+"""
+
+
+class ModelIndex:
+    r"""
+    A database of models searchable by laws they satisfy.
+
+    >>> import sys
+    >>> if sys.version_info.major == 3 and sys.version_info.minor >= 9:
+    ...     from importlib.resources import files
+    ... else:
+    ...     from importlib_resources import files
+    >>> from residuated_binars.parser import iterate_algebras
+    >>> index = ModelIndex("test.db")
+    >>> index.add(iterate_algebras(
+    ...     files("residuated_binars").joinpath("resources/isabelle2.out")
+    ... ))
+    6
+    >>> index.close()
+    >>> with ModelIndex("test.db") as index:
+    ...     print(len(index.laws), index.count(cardinality=7))
+    ...     print([structure.label for structure in index.find(
+    ...         ["LEFT_DISTRIBUTIVITY(undr, meet)"], ["ASSOCIATIVITY(mult)"]
+    ...     )])
+    ...     print(index.count(["ASSOCIATIVITY(mult)"], cardinality=7))
+    ...     print(index.count(cardinality=2))
+    ...     print(index.satisfied_laws("T105")[-4:])
+    ...     print(index.satisfied_laws("T0"))
+    247 6
+    ['T105', 'T131', 'T164', 'T39', 'T7', 'T75']
+    0
+    0
+    ['RESIDUATED_BINAR[8]', 'RESIDUATED_BINAR[9]', 'RESIDUATED_BINAR[10]',
+     'RESIDUATED_BINAR[11]']
+    []
+
+    A hypothesis from ``generate_theories`` has a known counter-example if
+    a model satisfies all its assumptions but not its goal:
+
+    >>> from residuated_binars.constants import (
+    ...     LATTICE, NON_TRIVIAL_DISTRIBUTIVITY_LAWS
+    ... )
+    >>> from residuated_binars.generate_theories import Hypothesis
+    >>> index = ModelIndex("test.db")
+    >>> [model.label for model in index.counter_examples(
+    ...     *Hypothesis((0, 1), 2).lemma(
+    ...         NON_TRIVIAL_DISTRIBUTIVITY_LAWS, LATTICE
+    ...     )[1:]
+    ... )]
+    []
+    >>> [model.label for model in index.counter_examples(
+    ...     *Hypothesis((2,), 4).lemma(
+    ...         NON_TRIVIAL_DISTRIBUTIVITY_LAWS, LATTICE
+    ...     )[1:]
+    ... )]
+    ['T164']
+    >>> index.find(["x = x"])
+    Traceback (most recent call last):
+     ...
+    ValueError: unknown law: x = x
+    >>> index.close()
+    >>> ModelIndex("test.db", {"test": "(\\<forall> x::finite_type. x = x)"})
+    Traceback (most recent call last):
+     ...
+    ValueError: the database has another catalogue of laws
+    >>> import os
+    >>> os.remove("test.db")
+    """
+
+    def __init__(
+        self,
+        file_name: str = ":memory:",
+        laws: Optional[Dict[str, str]] = None,
+    ):
+        """
+        Open (or create) a database.
+
+        :param file_name: a name of a database file
+        :param laws: a catalogue of laws (names and formulae in Isabelle
+            syntax) for a new database; by default, ``law_catalogue()``
+        :raises ValueError: if an existing database has another catalogue
+        """
+        self.connection = sqlite3.connect(file_name)
+        self.connection.executescript(SCHEMA)
+        saved = self._catalogue(laws)
+        self.laws = [Law(name, formula) for name, formula in saved.items()]
+        self._bits = {law.name: bit for bit, law in enumerate(self.laws)}
+        self._bits.update(
+            {law.formula: bit for bit, law in enumerate(self.laws)}
+        )
+
+    def _catalogue(self, laws: Optional[Dict[str, str]]) -> Dict[str, str]:
+        saved = dict(
+            self.connection.execute(
+                "SELECT name, formula FROM laws ORDER BY bit"
+            ).fetchall()
+        )
+        if saved:
+            if laws is not None and laws != saved:
+                self.connection.close()
+                raise ValueError("the database has another catalogue of laws")
+            return saved
+        catalogue = law_catalogue() if laws is None else laws
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO laws (bit, name, formula) VALUES (?, ?, ?)",
+                [
+                    (bit, name, formula)
+                    for bit, (name, formula) in enumerate(catalogue.items())
+                ],
+            )
+        return catalogue
+
+    def add(
+        self,
+        structures: Iterable[AlgebraicStructure],
+        theory: Optional[str] = None,
+    ) -> int:
+        """
+        Check laws on models and save them.
+
+        :param structures: models to save
+        :param theory: a name of a source theory; by default, a label of a
+            model
+        :returns: a number of saved models
+        """
+        count = 0
+        with self.connection:
+            for structure in structures:
+                model = self.connection.execute(
+                    "INSERT INTO models (label, theory, cardinality,"
+                    " class_name, operations) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        structure.label,
+                        structure.label if theory is None else theory,
+                        structure.cardinality,
+                        class_name(structure),
+                        json.dumps(structure.operations),
+                    ),
+                ).lastrowid
+                self.connection.executemany(
+                    "INSERT INTO model_laws (model, law) VALUES (?, ?)",
+                    (
+                        (model, bit)
+                        for bit, law in enumerate(self.laws)
+                        if law.holds(structure)
+                    ),
+                )
+                count += 1
+        return count
+
+    def law_numbers(self, laws: Iterable[str]) -> List[int]:
+        """
+        Get numbers of laws in the catalogue.
+
+        :param laws: names or formulae of laws from the catalogue
+        :returns: numbers of laws as stored in the database
+        :raises ValueError: if a law is not in the catalogue
+        """
+        numbers = []
+        for law in laws:
+            if law not in self._bits:
+                raise ValueError(f"unknown law: {law}")
+            numbers.append(self._bits[law])
+        return numbers
+
+    def _where(
+        self,
+        satisfied: Sequence[str],
+        violated: Sequence[str],
+        cardinality: Optional[int],
+    ) -> Tuple[str, List[Any]]:
+        conditions: List[str] = []
+        parameters: List[Any] = []
+        if cardinality is not None:
+            conditions.append("cardinality = ?")
+            parameters.append(cardinality)
+        for laws, operator in ((satisfied, "IN"), (violated, "NOT IN")):
+            for number in self.law_numbers(laws):
+                conditions.append(
+                    f"id {operator} (SELECT model FROM model_laws"
+                    " WHERE law = ?)"
+                )
+                parameters.append(number)
+        return " AND ".join(conditions) or "1", parameters
+
+    def find(
+        self,
+        satisfied: Sequence[str] = (),
+        violated: Sequence[str] = (),
+        cardinality: Optional[int] = None,
+    ) -> List[AlgebraicStructure]:
+        """
+        Find models satisfying some laws and violating others.
+
+        :param satisfied: names or formulae of laws which must hold
+        :param violated: names or formulae of laws which must fail
+        :param cardinality: a cardinality of models to find (all by default)
+        :returns: models in order of saving them
+        """
+        condition, parameters = self._where(satisfied, violated, cardinality)
+        return [
+            import_class(name)(label, json.loads(operations))
+            for name, label, operations in self.connection.execute(
+                "SELECT class_name, label, operations FROM models"
+                f" WHERE {condition} ORDER BY id",
+                parameters,
+            )
+        ]
+
+    def count(
+        self,
+        satisfied: Sequence[str] = (),
+        violated: Sequence[str] = (),
+        cardinality: Optional[int] = None,
+    ) -> int:
+        """
+        Count models satisfying some laws and violating others.
+
+        :param satisfied: names or formulae of laws which must hold
+        :param violated: names or formulae of laws which must fail
+        :param cardinality: a cardinality of models to count (all by default)
+        :returns: a number of models
+        """
+        condition, parameters = self._where(satisfied, violated, cardinality)
+        return self.connection.execute(
+            f"SELECT COUNT(*) FROM models WHERE {condition}", parameters
+        ).fetchone()[0]
+
+    def counter_examples(
+        self,
+        assumptions: Sequence[str],
+        goal: str,
+        cardinality: Optional[int] = None,
+    ) -> List[AlgebraicStructure]:
+        """
+        Find known counter-examples to a hypothesis.
+
+        :param assumptions: names or formulae of assumptions
+        :param goal: a name or a formula of a goal
+        :param cardinality: a cardinality of models to find (all by default)
+        :returns: models where the assumptions hold but the goal fails
+        """
+        return self.find(assumptions, [goal], cardinality)
+
+    def satisfied_laws(self, label: str) -> List[str]:
+        """
+        Get names of laws which hold in a model.
+
+        :param label: a label of a model
+        :returns: names of laws in order of the catalogue (empty if there is
+            no model with this label)
+        """
+        return [
+            self.laws[bit].name
+            for (bit,) in self.connection.execute(
+                "SELECT law FROM model_laws WHERE model = (SELECT id FROM"
+                " models WHERE label = ? ORDER BY id LIMIT 1) ORDER BY law",
+                (label,),
+            )
+        ]
+
+    def close(self) -> None:
+        """Close the database."""
+        self.connection.close()
+
+    def __enter__(self) -> "ModelIndex":
+        """Use an index as a context manager."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Close an index on exit."""
+        self.close()
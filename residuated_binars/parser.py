@@ -17,38 +17,43 @@
 Parser
 =======
 """
-import json
+import os
 import re
-from typing import Any, Dict, List, Union
+from array import array
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
 from residuated_binars.algebraic_structure import (
     AlgebraicStructure,
     CayleyTable,
 )
+from residuated_binars.isabelle_log import iterate_nodes, split_by_lemma
 from residuated_binars.lattice import Lattice
 from residuated_binars.residuated_binar import ResiduatedBinar
 
+SYMBOL = r"[\w\\\^\<\>]+"
+BINARY_ENTRY = re.compile(rf"\(({SYMBOL}), ({SYMBOL})\) := ({SYMBOL})")
+UNARY_ENTRY = re.compile(rf"({SYMBOL}) := ({SYMBOL})")
+LAMBDA = re.compile(r"\\<lambda>x\. _\)\s*\(")
+OPERATION_NAME = re.compile(r"(\w+) =\s+\($")
+SEPARATORS = str.maketrans("(),:=", "     ")
+UNDEFINED = 0xFFFF
+
 
 def parse_binary_operation(line: str) -> CayleyTable:
     """
     Parse text describing a binary operation in Isabelle server response.
 
+    >>> parse_binary_operation("((a, a) := a, (a, b) := b)")
+    {'a': {'a': 'a', 'b': 'b'}}
+
     :param line: a part of Isabelle server response, representing a binary
         operation
     :returns: a Cayley table
     """
     table: CayleyTable = {}
-    regex = re.compile(
-        r"\(([\w\\\^\<\>]+), ([\w\\\^\<\>]+)\) := ([\w\\\^\<\>]+)"
-    )
-    match = regex.search(line)
-    while match is not None:
-        pos = match.span()[-1] + 1
-        args = list(match.groups())
-        if args[0] not in table:
-            table[args[0]] = {}
-        table[args[0]][args[1]] = args[2]
-        match = regex.search(line, pos)
+    for match in BINARY_ENTRY.finditer(line):
+        table.setdefault(match.group(1), {})[match.group(2)] = match.group(3)
     return table
 
 
@@ -56,21 +61,127 @@ def parse_unary_operation(line: str) -> Dict[str, str]:
     """
     Parse text describing a unary operation in Isabelle server response.
 
+    >>> parse_unary_operation("(a := b, b := a)")
+    {'a': 'b', 'b': 'a'}
+
     :param line: a part of Isabelle server response, representing an unary
         operation
     :returns: an inner representation of an unary operation
     """
-    table: Dict[str, str] = {}
-    regex = re.compile(r"([\w\\\<\>\^]+) := ([\w\\\<\>\^]+)")
-    match = regex.search(line)
-    while match is not None:
-        pos = match.span()[-1] + 1
-        args = list(match.groups())
-        table[args[0]] = args[1]
-        match = regex.search(line, pos)
+    return {
+        match.group(1): match.group(2) for match in UNARY_ENTRY.finditer(line)
+    }
+
+
+def tokenize_model(
+    isabelle_message: str,
+) -> Tuple[List[str], Dict[str, Tuple[int, "array[int]"]]]:
+    r"""
+    Read tables of operations from a Nitpick message.
+
+    The message is scanned once for operation headers, and a text of every
+    table is split into constants by ``str.translate`` and ``str.split``.
+    Every constant gets an integer number (arguments first, in order of
+    appearance), and values go straight to flat arrays (a binary operation
+    table is stored row by row; missing entries are ``UNDEFINED``).
+
+    >>> symbols, tables = tokenize_model(
+    ...     "    invo = (\\<lambda>x. _)(C1 := C0, C0 := C1)\n"
+    ...     "    mult =\n      (\\<lambda>x. _)\n"
+    ...     "      ((C0, C0) := C0, (C0, C1) := C1, (C1, C0) := C1)\n"
+    ...     "  Skolem constants:\n    x = C1"
+    ... )
+    >>> symbols
+    ['C1', 'C0']
+    >>> tables["invo"]
+    (1, array('H', [1, 0]))
+    >>> tables["mult"][1].tolist() == [UNDEFINED, 0, 0, 1]
+    True
+
+    :param isabelle_message: a text of Nitpick model
+    :returns: names of constants and tables of operations (together with
+        their arities) in terms of constants' numbers
+    """
+    operations = _operation_tokens(isabelle_message)
+    symbol_ids: Dict[str, None] = {}
+    for _, arity, tokens in operations:
+        for position in range(arity):
+            symbol_ids.update(dict.fromkeys(tokens[position :: arity + 1]))
+    for _, arity, tokens in operations:
+        symbol_ids.update(dict.fromkeys(tokens[arity :: arity + 1]))
+    symbols = list(symbol_ids)
+    code = {
+        symbol: number for number, symbol in enumerate(symbols)
+    }.__getitem__
+    return symbols, {
+        name: (
+            arity,
+            _fill_table(arity, list(map(code, tokens)), len(symbols)),
+        )
+        for name, arity, tokens in operations
+    }
+
+
+def _operation_tokens(
+    isabelle_message: str,
+) -> List[Tuple[str, int, List[str]]]:
+    headers = list(LAMBDA.finditer(isabelle_message))
+    operations = []
+    for index, header in enumerate(headers):
+        next_header = (
+            headers[index + 1].start()
+            if index + 1 < len(headers)
+            else len(isabelle_message)
+        )
+        table_text = isabelle_message[
+            header.end() : _table_end(
+                isabelle_message, header.end(), next_header
+            )
+        ]
+        name = OPERATION_NAME.search(
+            isabelle_message, max(0, header.start() - 80), header.start()
+        )
+        if name is not None:
+            operations.append(
+                (
+                    name.group(1),
+                    2 if table_text.lstrip().startswith("(") else 1,
+                    table_text.translate(SEPARATORS).split(),
+                )
+            )
+    return operations
+
+
+def _table_end(isabelle_message: str, start: int, stop: int) -> int:
+    end = isabelle_message.find(")\n", start, stop)
+    return end if end >= 0 else isabelle_message.rfind(")", start, stop)
+
+
+def _fill_table(
+    arity: int, codes: List[int], cardinality: int
+) -> "array[int]":
+    arguments = [codes[position :: arity + 1] for position in range(arity)]
+    if arguments == _row_major(arity, cardinality):
+        return array("H", codes[arity :: arity + 1])
+    table = array("H", [UNDEFINED]) * cardinality**arity
+    for entry in zip(*arguments, codes[arity :: arity + 1]):
+        index = 0
+        for argument in entry[:-1]:
+            index = index * cardinality + argument
+        table[index] = entry[-1]
     return table
 
 
+@lru_cache(maxsize=None)
+def _row_major(arity: int, cardinality: int) -> List[List[int]]:
+    if arity == 1:
+        return [list(range(cardinality))]
+    return [
+        [row for row in range(cardinality) for _ in range(cardinality)],
+        list(range(cardinality)) * cardinality,
+    ]
+
+
 def choose_algebraic_structure(
     label: str, operations: Dict[str, Dict[str, Any]]
 ) -> AlgebraicStructure:
@@ -102,31 +213,63 @@ def choose_algebraic_structure(
 def isabelle_format_to_algebra(
     isabelle_message: str, label: str
 ) -> AlgebraicStructure:
-    """
+    r"""
     Parse the textual representation of operations to ``AlgebraicStructure``.
 
+    >>> isabelle_format_to_algebra(
+    ...     "    mult = (\\<lambda>x. _)"
+    ...     "((a, a) := b, (a, b) := a, (b, a) := a)",
+    ...     "test"
+    ... ).operations
+    {'mult': {'a': {'a': 'b', 'b': 'a'}, 'b': {'a': 'a'}}}
+
     :param isabelle_message: a body of reply from Isabelle server (in JSON)
     :param label: a name of the theory for which we got a reply from server
     :returns: a residuated binar
     """
-    regex = re.compile(
-        r"    (\w+) =\n? +\(\\<lambda>x\. _\)\n? *\(([^\.]+)\)\n?",
-        re.DOTALL,
-    )
-    match = regex.search(isabelle_message)
-    operations: Dict[str, Union[CayleyTable, Dict[str, str]]] = {}
-    while match is not None:
-        table: Union[CayleyTable, Dict[str, str]] = parse_binary_operation(
-            match.group(2)
+    return tables_to_algebra(*tokenize_model(isabelle_message), label)
+
+
+def tables_to_algebra(
+    symbols: List[str],
+    tables: Dict[str, Tuple[int, "array[int]"]],
+    label: str,
+) -> AlgebraicStructure:
+    """
+    Build an algebraic structure from tables got by ``tokenize_model``.
+
+    :param symbols: names of constants
+    :param tables: tables of operations and their arities
+    :param label: a name of the theory for which we got a reply from server
+    :returns: an algebraic structure (its axioms are checked here)
+    """
+    operations: Dict[str, Union[CayleyTable, Dict[str, str]]] = {
+        name: (
+            {
+                one: _row_to_dict(
+                    symbols,
+                    table[row * len(symbols) : (row + 1) * len(symbols)],
+                )
+                for row, one in enumerate(symbols)
+            }
+            if arity == 2
+            else _row_to_dict(symbols, table)
         )
-        if not table:
-            table = parse_unary_operation(match.group(2))
-        operations[match.group(1)] = table
-        pos = match.span()[0] + 1
-        match = regex.search(isabelle_message, pos)
+        for name, (arity, table) in tables.items()
+    }
     return choose_algebraic_structure(label, operations)
 
 
+def _row_to_dict(symbols: List[str], row: "array[int]") -> Dict[str, str]:
+    if UNDEFINED not in row:
+        return dict(zip(symbols, map(symbols.__getitem__, row)))
+    return {
+        symbol: symbols[value]
+        for symbol, value in zip(symbols, row)
+        if value != UNDEFINED
+    }
+
+
 def isabelle_response_to_algebra(filename: str) -> List[AlgebraicStructure]:
     """
     Read file with replies from ``isabelle`` server and parse them.
@@ -143,31 +286,76 @@ def isabelle_response_to_algebra(filename: str) -> List[AlgebraicStructure]:
     ... ))
     6
 
+    :param filename: a name of a file to which all replies from Isabelle server
+        where written; theory files with several lemmas are looked for in the
+        same folder
+    :returns: a list of algebraic structures (labeled by lemma names, if
+        there are several lemmas in a theory)
+    """
+    return list(iterate_algebras(filename))
+
+
+def iterate_algebras(filename: str) -> Iterator[AlgebraicStructure]:
+    """
+    Parse replies from ``isabelle`` server lazily.
+
+    Theory nodes are read from the file one by one, so memory use doesn't
+    depend on the size of the file.
+
     :param filename: a name of a file to which all replies from Isabelle server
         where written
-    :returns: a list of algebraic structures
+    :returns: algebraic structures one by one
     """
-    with open(filename, "r", encoding="utf-8") as isabelle_log:
-        nodes = json.loads(
-            [
-                line
-                for line in isabelle_log.readlines()
-                if "FINISHED" in line and "lambda" in line
-            ][0][9:]
-        )["nodes"]
-    messages = [
-        (
-            [
-                message["message"]
-                for message in node["messages"]
-                if "lambda" in message["message"]
-            ][:1],
-            node["theory_name"].split(".")[1],
-        )
-        for node in nodes
-    ]
-    return [
-        isabelle_format_to_algebra(message[0][0], message[1])
-        for message in messages
-        if message[0] != []
-    ]
+    for _, structure in iterate_labelled_algebras(filename):
+        yield structure
+
+
+def iterate_labelled_algebras(
+    filename: str,
+    label_pattern: Optional[str] = None,
+    cardinality: Optional[int] = None,
+) -> Iterator[Tuple[str, AlgebraicStructure]]:
+    r"""
+    Parse chosen models from replies of ``isabelle`` server lazily.
+
+    A label is checked before a model is tokenized, and a cardinality is
+    checked before building an algebraic structure and checking its axioms,
+    so skipped models cost almost nothing.
+
+    >>> import sys
+    >>> if sys.version_info.major == 3 and sys.version_info.minor >= 9:
+    ...     from importlib.resources import files
+    ... else:
+    ...     from importlib_resources import files
+    >>> log_file_name = files("residuated_binars").joinpath(
+    ...     "resources/isabelle2.out"
+    ... )
+    >>> models = iterate_labelled_algebras(log_file_name, r"T1\d+")
+    >>> label, structure = next(models)
+    >>> label, structure.cardinality, structure.label
+    ('T105', 7, 'T105')
+    >>> [label for label, _ in models]
+    ['T131', 'T164']
+    >>> list(iterate_labelled_algebras(log_file_name, cardinality=2))
+    []
+
+    :param filename: a name of a file to which all replies from Isabelle server
+        where written
+    :param label_pattern: a regular expression which labels must match
+        (all labels by default)
+    :param cardinality: a cardinality of models to parse (all by default)
+    :returns: pairs of labels and algebraic structures one by one
+    """
+    pattern = None if label_pattern is None else re.compile(label_pattern)
+    for node in iterate_nodes(filename):
+        for label, messages in split_by_lemma(
+            node, os.path.dirname(filename)
+        ).items():
+            if pattern is None or pattern.fullmatch(label) is not None:
+                models = [
+                    message for message in messages if "lambda" in message
+                ]
+                if models:
+                    symbols, tables = tokenize_model(models[0])
+                    if cardinality in (None, len(symbols)):
+                        yield label, tables_to_algebra(symbols, tables, label)
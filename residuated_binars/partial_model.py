@@ -0,0 +1,240 @@
+# Copyright 2022 Boris Shminke
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# noqa: D205, D400
+"""
+Partial Model
+==============
+
+Operation tables with unknown cells, checked against laws while they
+are filled (a building block for a backtracking model search).
+
+-  every instance of every law (a law with all its variables bound) is
+   evaluated until it needs an unknown cell, and it waits for that cell
+-  when a cell is assigned, only the instances waiting for it are
+   evaluated again: they either hold, fail (a conflict), or start waiting
+   for another unknown cell
+-  every assignment is kept on a trail together with the moves of waiting
+   instances, so it can be undone in reverse order
+
+"""
+from itertools import product
+from typing import Any, Dict, List, Optional, Tuple
+
+from residuated_binars.laws import Law
+
+Cell = Tuple[str, int]
+
+
+class _Unknown(Exception):
+    """An evaluation needs a cell which is not assigned yet."""
+
+    def __init__(self, cell: Cell):
+        """
+        Remember a cell.
+
+        :param cell: a name of an operation and an index in its table
+        """
+        super().__init__(cell)
+        self.cell = cell
+
+
+class _Cells:  # pylint: disable=too-few-public-methods
+    """A part of a flat table (a row of a binary operation)."""
+
+    def __init__(self, values: List[Optional[int]], name: str, offset: int):
+        """
+        Point to a part of a table.
+
+        :param values: a flat table of an operation
+        :param name: a name of the operation
+        :param offset: where the part starts
+        """
+        self.values, self.name, self.offset = values, name, offset
+
+    def __getitem__(self, index: int) -> int:
+        """
+        Get a value of a cell.
+
+        :param index: an index of a cell in the part
+        :returns: an assigned value
+        :raises _Unknown: if the cell is not assigned
+        """
+        value = self.values[self.offset + index]
+        if value is None:
+            raise _Unknown((self.name, self.offset + index))
+        return value
+
+
+def _describe(law: Law, values: Tuple[int, ...]) -> str:
+    if not values:
+        return f"{law.name} fails"
+    return f"{law.name} fails for " + ", ".join(
+        f"{variable}={value}" for variable, value in zip(law.variables, values)
+    )
+
+
+class PartialModel:
+    r"""
+    Tables of operations with unknown cells and laws they must satisfy.
+
+    Elements are numbered from ``0`` to ``cardinality - 1``, and by default
+    ``C0`` and ``C1`` are the first and the last of them.
+
+    >>> from residuated_binars import constants
+    >>> model = PartialModel(
+    ...     2,
+    ...     {"join": 2, "meet": 2},
+    ...     [
+    ...         Law(f"LATTICE[{index}]", law)
+    ...         for index, law in enumerate(constants.LATTICE)
+    ...     ],
+    ... )
+    >>> print(model.assign("join", 0, 1, 1))
+    None
+    >>> model.assign("join", 1, 0, 0)
+    'LATTICE[1] fails for x=1, y=0'
+    >>> model.tables["join"], len(model.trail)
+    ([None, 1, None, None], 1)
+    >>> model.assign("meet", 0, 0, 1)
+    'LATTICE[5] fails for x=0, y=0'
+    >>> [model.assign("join", i, i, i) for i in range(2)]
+    [None, None]
+    >>> model.assign("join", 1, 1, 0)
+    Traceback (most recent call last):
+     ...
+    ValueError: join(1, 1) is already assigned
+    >>> model.undo()
+    >>> model.tables["join"]
+    [0, 1, None, None]
+    >>> model.undo(); model.undo()
+    >>> model.tables["join"], model.trail
+    ([None, None, None, None], [])
+    >>> involution = PartialModel(
+    ...     2,
+    ...     {"invo": 1},
+    ...     [Law("test", constants.PROJECTION.replace("f(", "invo("))],
+    ... )
+    >>> involution.assign("invo", 0, None, 1)
+    >>> involution.assign("invo", 1, None, 1)
+    'test fails for x=0'
+    >>> PartialModel(2, {}, [Law("test", "C0 = C1")])
+    Traceback (most recent call last):
+     ...
+    ValueError: test fails
+    """
+
+    def __init__(
+        self,
+        cardinality: int,
+        operations: Dict[str, int],
+        laws: List[Law],
+        model_constants: Optional[Dict[str, int]] = None,
+    ):
+        """
+        Create empty tables and evaluate every instance of every law.
+
+        :param cardinality: a number of elements
+        :param operations: arities of operations (``1`` or ``2``)
+        :param laws: laws to check
+        :param model_constants: values of constants of laws
+        :raises ValueError: if a law fails without any operations
+        """
+        self.cardinality, self.laws = cardinality, laws
+        self.tables: Dict[str, List[Optional[int]]] = {
+            name: [None] * cardinality**arity
+            for name, arity in operations.items()
+        }
+        self._model: Dict[str, Any] = {
+            "operations": {
+                name: (
+                    _Cells(self.tables[name], name, 0)
+                    if arity == 1
+                    else [
+                        _Cells(self.tables[name], name, row * cardinality)
+                        for row in range(cardinality)
+                    ]
+                )
+                for name, arity in operations.items()
+            },
+            "constants": model_constants or {"C0": 0, "C1": cardinality - 1},
+        }
+        self._instances = [
+            (law_index, values)
+            for law_index, law in enumerate(laws)
+            for values in product(
+                range(cardinality), repeat=len(law.variables)
+            )
+        ]
+        self._watches: Dict[Cell, List[int]] = {}
+        self.trail: List[Tuple[Cell, List[int], List[Cell]]] = []
+        conflict = self._evaluate(range(len(self._instances)), [])
+        if conflict is not None:
+            raise ValueError(conflict)
+
+    def _cell(self, operation: str, one: int, two: Optional[int]) -> Cell:
+        return operation, one if two is None else one * self.cardinality + two
+
+    def assign(
+        self, operation: str, one: int, two: Optional[int], value: int
+    ) -> Optional[str]:
+        """
+        Assign a value to a cell and check the laws depending on it.
+
+        If there is a conflict, the assignment is undone at once.
+
+        :param operation: a name of an operation
+        :param one: the first argument
+        :param two: the second argument (``None`` for unary operations)
+        :param value: a value of the operation on these arguments
+        :returns: a description of a failing instance of a law or ``None``
+        :raises ValueError: if the cell is already assigned
+        """
+        cell = self._cell(operation, one, two)
+        if self.tables[operation][cell[1]] is not None:
+            arguments = one if two is None else f"{one}, {two}"
+            raise ValueError(f"{operation}({arguments}) is already assigned")
+        self.tables[operation][cell[1]] = value
+        self.trail.append((cell, self._watches.pop(cell, []), []))
+        conflict = self._evaluate(self.trail[-1][1], self.trail[-1][2])
+        if conflict is not None:
+            self.undo()
+        return conflict
+
+    def undo(self) -> None:
+        """
+        Undo the last assignment.
+
+        :raises IndexError: if there is nothing to undo
+        """
+        cell, waiting, moved = self.trail.pop()
+        for other in reversed(moved):
+            self._watches[other].pop()
+        if waiting:
+            self._watches[cell] = waiting
+        self.tables[cell[0]][cell[1]] = None
+
+    def _evaluate(self, instances: Any, moved: List[Cell]) -> Optional[str]:
+        for instance in instances:
+            law_index, values = self._instances[instance]
+            law = self.laws[law_index]
+            try:
+                if not law.check_instance(
+                    self._model, dict(zip(law.variables, values))
+                ):
+                    return _describe(law, values)
+            except _Unknown as unknown:
+                self._watches.setdefault(unknown.cell, []).append(instance)
+                moved.append(unknown.cell)
+        return None
@@ -17,8 +17,61 @@
 Pseudo-:math:`R_0` Algebra
 ==========================
 """
-from residuated_binars.algebraic_structure import TOP
-from residuated_binars.pseudo_weak_r0_algebra import PseudoWeakR0Algebra
+from typing import Iterable, List
+
+from residuated_binars.lattice import order_from_meet
+from residuated_binars.pseudo_weak_r0_algebra import (
+    PseudoWeakR0Algebra,
+    Tables,
+    weak_r0_failure,
+)
+
+
+def _p5(tables: Tables) -> bool:
+    join, top = tables["join"], len(tables["join"]) - 1
+    return all(
+        join[value][second[value][join[inverse[one]][two]]] == top
+        for first, second, inverse in (
+            (tables["imp1"], tables["imp2"], tables["inv1"]),
+            (tables["imp2"], tables["imp1"], tables["inv2"]),
+        )
+        for one, row in enumerate(first)
+        for two, value in enumerate(row)
+    )
+
+
+def r0_failures(candidates: Iterable[Tables]) -> List[str]:
+    """
+    Check axioms P1--P5 for many candidate algebras at once.
+
+    P5 is checked only if P1--P4 hold (as when creating algebras).
+
+    >>> def chain(imp, inv):
+    ...     items = range(len(inv))
+    ...     return {
+    ...         "imp1": imp, "imp2": imp, "inv1": inv, "inv2": inv,
+    ...         "join": [[max(x, y) for y in items] for x in items],
+    ...         "meet": [[min(x, y) for y in items] for x in items],
+    ...     }
+    >>> lukasiewicz = [[min(3, 3 - x + y) for y in range(4)] for x in range(4)]
+    >>> r0_failures([
+    ...     chain([[1, 1], [0, 1]], [1, 0]),
+    ...     chain([[1, 1], [1, 1]], [1, 0]),
+    ...     chain(lukasiewicz, [3, 2, 1, 0]),
+    ... ])
+    ['', "P2 axiom doesn't hold", "P5 axiom doesn't hold"]
+
+    :param candidates: tables of algebras (as in
+        ``pseudo_weak_r0_algebra.weak_r0_failure``)
+    :returns: a failure message (or an empty string) for every candidate
+    """
+    failures = []
+    for tables in candidates:
+        failure = weak_r0_failure(tables, order_from_meet(tables["meet"]))
+        if failure == "" and not _p5(tables):
+            failure = "P5 axiom doesn't hold"
+        failures.append(failure)
+    return failures
 
 
 class PseudoR0Algebra(PseudoWeakR0Algebra):
@@ -27,7 +80,7 @@ class PseudoR0Algebra(PseudoWeakR0Algebra):
 
     for more info look `here <https://doi.org/10.1155/2014/854168>`__
 
-    >>> from residuated_binars.algebraic_structure import BOT
+    >>> from residuated_binars.algebraic_structure import BOT, TOP
     >>> imp = {
     ...     BOT: {BOT: TOP, TOP: TOP, "C3": TOP, "C2": TOP},
     ...     TOP: {BOT: BOT, TOP: TOP, "C3": "C3", "C2": "C2"},
@@ -82,36 +135,5 @@ class PseudoR0Algebra(PseudoWeakR0Algebra):
 
     def check_axioms(self) -> None:  # noqa: D102
         super().check_axioms()
-        try:
-            for one in self.operations["meet"].keys():
-                for two in self.operations["meet"].keys():
-                    assert (
-                        self.operations["join"][
-                            self.operations["imp1"][one][two]
-                        ][
-                            self.operations["imp2"][
-                                self.operations["imp1"][one][two]
-                            ][
-                                self.operations["join"][
-                                    self.operations["inv1"][one]
-                                ][two]
-                            ]
-                        ]
-                        == TOP
-                    )
-                    assert (
-                        self.operations["join"][
-                            self.operations["imp2"][one][two]
-                        ][
-                            self.operations["imp1"][
-                                self.operations["imp2"][one][two]
-                            ][
-                                self.operations["join"][
-                                    self.operations["inv2"][one]
-                                ][two]
-                            ]
-                        ]
-                        == TOP
-                    )
-        except AssertionError as error:
-            raise ValueError("P5 axiom doesn't hold") from error
+        if not _p5(self.tabular_format):
+            raise ValueError("P5 axiom doesn't hold")
@@ -17,12 +17,103 @@
 Pseudo-weak-:math:`R_0` Algebra
 ===============================
 """
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
 from residuated_binars.algebraic_structure import BOT, TOP
-from residuated_binars.axiom_checkers import (
-    is_left_identity,
-    left_distributive,
-)
 from residuated_binars.bounded_lattice import BoundedLattice
+from residuated_binars.lattice import order_from_meet
+
+Tables = Dict[str, Any]
+Axiom = Callable[[Tables, List[int]], bool]
+
+
+def _p1(tables: Tables, _: List[int]) -> bool:
+    return all(
+        tables[first][one][two]
+        == tables[second][tables[inverse][two]][tables[inverse][one]]
+        for first, second, inverse in (
+            ("imp1", "imp2", "inv1"),
+            ("imp2", "imp1", "inv2"),
+        )
+        for one in range(len(tables["join"]))
+        for two in range(len(tables["join"]))
+    )
+
+
+def _p2(tables: Tables, _: List[int]) -> bool:
+    return all(
+        tables[name][-1] == list(range(len(tables["join"])))
+        for name in ("imp1", "imp2")
+    )
+
+
+def _p3(tables: Tables, order: List[int]) -> bool:
+    return all(
+        order[greater] >> smaller & 1
+        for imp in (tables["imp1"], tables["imp2"])
+        for third in imp
+        for one, row in zip(third, imp)
+        for smaller, greater in zip(row, [imp[one][value] for value in third])
+    )
+
+
+def _p4(tables: Tables, _: List[int]) -> bool:
+    join = tables["join"]
+    return all(
+        row[join_row[three]] == join[row[two]][row[three]]
+        for imp in (tables["imp1"], tables["imp2"])
+        for row in imp
+        for two, join_row in enumerate(join)
+        for three in range(len(join))
+    )
+
+
+WEAK_AXIOMS: List[Tuple[str, Axiom]] = [
+    ("P1", _p1),
+    ("P2", _p2),
+    ("P3", _p3),
+    ("P4", _p4),
+]
+
+
+def weak_r0_failure(tables: Tables, order: List[int]) -> str:
+    """
+    Check axioms P1--P4 on tables of element indices.
+
+    Elements are numbered as in ``AlgebraicStructure.symbols`` (so the top
+    is the last one), and tables are lists of rows (as in
+    ``AlgebraicStructure.tabular_format``).
+
+    :param tables: tables of ``imp1``, ``imp2``, ``inv1``, ``inv2``,
+        ``join`` and ``meet``
+    :param order: bitmasks of elements below every element
+    :returns: messages about axioms which don't hold or an empty string
+    """
+    return " ".join(
+        " " if axiom(tables, order) else f"{name} axiom doesn't hold"
+        for name, axiom in WEAK_AXIOMS
+    ).strip()
+
+
+def weak_r0_failures(candidates: Iterable[Tables]) -> List[str]:
+    """
+    Check axioms P1--P4 for many candidate algebras at once.
+
+    >>> candidates = [
+    ...     {"imp1": imp, "imp2": imp, "inv1": [0, 1], "inv2": [0, 1],
+    ...      "join": [[0, 1], [1, 1]], "meet": [[0, 0], [0, 1]]}
+    ...     for imp in ([[1, 1], [0, 1]], [[1, 1], [1, 1]])
+    ... ]
+    >>> weak_r0_failures(candidates)
+    ["P1 axiom doesn't hold", "P2 axiom doesn't hold"]
+
+    :param candidates: tables of algebras (as in ``weak_r0_failure``)
+    :returns: a failure message (or an empty string) for every candidate
+    """
+    return [
+        weak_r0_failure(tables, order_from_meet(tables["meet"]))
+        for tables in candidates
+    ]
 
 
 class PseudoWeakR0Algebra(BoundedLattice):
@@ -50,69 +141,6 @@ class PseudoWeakR0Algebra(BoundedLattice):
     ValueError: P2 axiom doesn't hold
     """
 
-    def _check_p1(self) -> str:
-        try:
-            for one in self.operations["meet"].keys():
-                for two in self.operations["meet"].keys():
-                    assert (
-                        self.operations["imp1"][one][two]
-                        == self.operations["imp2"][
-                            self.operations["inv1"][two]
-                        ][self.operations["inv1"][one]]
-                    )
-                    assert (
-                        self.operations["imp2"][one][two]
-                        == self.operations["imp1"][
-                            self.operations["inv2"][two]
-                        ][self.operations["inv2"][one]]
-                    )
-            return " "
-        except AssertionError:
-            return "P1 axiom doesn't hold"
-
-    def _check_p2(self) -> str:
-        try:
-            assert is_left_identity(self.operations["imp1"], TOP)
-            assert is_left_identity(self.operations["imp2"], TOP)
-            return " "
-        except AssertionError:
-            return "P2 axiom doesn't hold"
-
-    def _check_p3(self) -> str:
-        try:
-            for i in self.operations["join"].keys():
-                for j in self.operations["join"].keys():
-                    for k in self.operations["join"].keys():
-                        smaller = self.operations["imp1"][i][j]
-                        greater = self.operations["imp1"][
-                            self.operations["imp1"][k][i]
-                        ][self.operations["imp1"][k][j]]
-                        assert (
-                            smaller == greater or smaller in self.more[greater]
-                        )
-                        smaller = self.operations["imp2"][i][j]
-                        greater = self.operations["imp2"][
-                            self.operations["imp2"][k][i]
-                        ][self.operations["imp2"][k][j]]
-                        assert (
-                            smaller == greater or smaller in self.more[greater]
-                        )
-            return " "
-        except AssertionError:
-            return "P3 axiom doesn't hold"
-
-    def _check_p4(self) -> str:
-        try:
-            assert left_distributive(
-                self.operations["imp1"], self.operations["join"]
-            )
-            assert left_distributive(
-                self.operations["imp2"], self.operations["join"]
-            )
-            return " "
-        except AssertionError:
-            return "P4 axiom doesn't hold"
-
     def check_axioms(self) -> None:  # noqa: D102
         super().check_axioms()
         assert (
@@ -121,13 +149,6 @@ class PseudoWeakR0Algebra(BoundedLattice):
             and self.operations["inv1"][self.operations["inv2"][TOP]] == TOP
             and self.operations["inv2"][self.operations["inv1"][TOP]] == TOP
         ), "Pseudo-inverse axioms don't hold"
-        res = " ".join(
-            (
-                self._check_p1(),
-                self._check_p2(),
-                self._check_p3(),
-                self._check_p4(),
-            )
-        ).strip()
+        res = weak_r0_failure(self.tabular_format, self.order_tables[2])
         if res != "":
             raise ValueError(res)
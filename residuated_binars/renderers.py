@@ -0,0 +1,125 @@
+# Copyright 2022 Boris Shminke
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# noqa: D205, D400
+"""
+Renderers
+==========
+
+Exporting whole collections of models to one file in a single pass.
+
+-  every model is written straight to a stream by its ``write_*`` method
+   (no intermediate string for a model or a collection)
+-  models are separated by their labels (as comments for ``Mace4`` and
+   LaTeX, and as bold text for Markdown)
+
+"""
+from enum import Enum
+from typing import Iterable, TextIO, Union
+
+from residuated_binars.algebraic_structure import AlgebraicStructure
+
+
+class OutputFormat(Enum):
+    """A format of exported models and a method writing it."""
+
+    MACE4 = "write_mace4"
+    LATEX = "write_latex_mult_table"
+    MARKDOWN = "write_markdown_mult_table"
+
+
+HEADERS = {
+    OutputFormat.MACE4: "% {}\n",
+    OutputFormat.LATEX: "% {}\n",
+    OutputFormat.MARKDOWN: "**{}**\n\n",
+}
+
+
+def export(
+    structures: Iterable[AlgebraicStructure],
+    target: Union[str, TextIO],
+    output_format: OutputFormat = OutputFormat.MACE4,
+) -> int:
+    r"""
+    Write models one after another.
+
+    >>> from residuated_binars.residuated_binar import ResiduatedBinar
+    >>> join = {"0": {"0": "0", "1": "1"}, "1": {"0": "1", "1": "1"}}
+    >>> meet = {"0": {"0": "0", "1": "0"}, "1": {"0": "0", "1": "1"}}
+    >>> mult = {"0": {"0": "0", "1": "0"}, "1": {"0": "0", "1": "0"}}
+    >>> const = {"0": {"0": "1", "1": "1"}, "1": {"0": "1", "1": "1"}}
+    >>> binar = ResiduatedBinar("test", {
+    ...     "join": join, "meet": meet, "mult": mult, "over": const,
+    ...     "undr": const
+    ... })
+    >>> from io import StringIO
+    >>> stream = StringIO()
+    >>> export([binar, binar], stream, OutputFormat.MARKDOWN)
+    2
+    >>> print(stream.getvalue())
+    **test**
+    <BLANKLINE>
+    |*|0|1|
+    |-|-|-|
+    |**0**|0|0|
+    |**1**|0|0|
+    <BLANKLINE>
+    **test**
+    <BLANKLINE>
+    |*|0|1|
+    |-|-|-|
+    |**0**|0|0|
+    |**1**|0|0|
+    <BLANKLINE>
+    <BLANKLINE>
+    >>> export([binar], "test.tex", OutputFormat.LATEX)
+    1
+    >>> with open("test.tex", "r", encoding="utf-8") as latex_file:
+    ...     print(latex_file.read()[:22])
+    % test
+    \begin{table}[]
+    >>> export([binar], "test.tex")
+    1
+    >>> with open("test.tex", "r", encoding="utf-8") as mace4_file:
+    ...     print(mace4_file.readlines()[1])
+    0 v 0 = 0.
+    <BLANKLINE>
+    >>> import os
+    >>> os.remove("test.tex")
+    >>> export([AlgebraicStructure("test", {"invo": {"0": "0"}})], stream,
+    ...     OutputFormat.LATEX)
+    Traceback (most recent call last):
+     ...
+    ValueError: test has no multiplication table
+
+    :param structures: models to write
+    :param target: a name of a file to write or an open text stream
+    :param output_format: ``Mace4``, LaTeX or Markdown (the last two are
+        only for structures with a multiplication table)
+    :returns: a number of written models
+    :raises ValueError: if a structure has no multiplication table for
+        LaTeX or Markdown output
+    """
+    if isinstance(target, str):
+        with open(target, "w", encoding="utf-8") as stream:
+            return export(structures, stream, output_format)
+    count = 0
+    for structure in structures:
+        if not hasattr(structure, output_format.value):
+            raise ValueError(f"{structure.label} has no multiplication table")
+        target.write(HEADERS[output_format].format(structure.label))
+        getattr(structure, output_format.value)(target)
+        target.write("\n")
+        count += 1
+    return count
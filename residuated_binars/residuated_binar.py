@@ -17,13 +17,35 @@
 Residuated Binar
 =================
 """
-from typing import Dict
+from io import StringIO
+from itertools import product
+from typing import Dict, List, Optional, TextIO, Tuple
 
 from residuated_binars.axiom_checkers import (
     left_distributive,
     right_distributive,
 )
-from residuated_binars.lattice import BOT, Lattice
+from residuated_binars.lattice import BOT, Lattice, Table, upper_covers
+
+
+def _residual_failure(
+    mult: Table,
+    residual: Table,
+    order: List[int],
+    covers: List[List[int]],
+    left: bool,
+) -> Optional[Tuple[int, int]]:
+    for bound, factor in product(range(len(order)), repeat=2):
+        value = residual[factor][bound] if left else residual[bound][factor]
+        products = [
+            mult[factor][element] if left else mult[element][factor]
+            for element in [value] + covers[value]
+        ]
+        if not order[bound] >> products[0] & 1 or any(
+            order[bound] >> other & 1 for other in products[1:]
+        ):
+            return bound, factor
+    return None
 
 
 class ResiduatedBinar(Lattice):
@@ -68,14 +90,14 @@ class ResiduatedBinar(Lattice):
     ...     "over": const, "undr": const})
     Traceback (most recent call last):
      ...
-    ValueError: check residuated binars axioms!
+    ValueError: check residuated binars axioms! over(0, 0) is not a residual
     >>> mult = {"0": {"0": "0", "1": "0"}, "1": {"0": "1", "1": "1"}}
     >>> undr = {"0": {"0": "1", "1": "1"}, "1": {"0": "0", "1": "1"}}
     >>> ResiduatedBinar("test", {"join": join, "meet": meet, "mult": mult,
     ...     "over": mult, "undr": undr})
     Traceback (most recent call last):
      ...
-    ValueError: check residuated binars axioms!
+    ValueError: check residuated binars axioms! undr(1, 0) is not a residual
     >>> print(binar.mace4_format[:10])
     0 v 0 = 0.
     """
@@ -88,48 +110,24 @@ class ResiduatedBinar(Lattice):
             self.operations["mult"], self.operations["join"]
         ):
             raise ValueError("multiplication must be distributive over join")
-        if not self._check_residuated_binars_axioms():
-            raise ValueError("check residuated binars axioms!")
-
-    def _check_residuated_binars_axioms(self) -> bool:
-        for one in self.symbols:
-            for two in self.symbols:
-                if (
-                    self.operations["join"][
-                        self.operations["mult"][
-                            self.operations["over"][one][two]
-                        ][two]
-                    ][one]
-                    != one
-                    or self.operations["join"][
-                        self.operations["mult"][two][
-                            self.operations["undr"][two][one]
-                        ]
-                    ][one]
-                    != one
-                ):
-                    return False
-                for three in self.symbols:
-                    if (
-                        self.operations["meet"][one][
-                            self.operations["over"][
-                                self.operations["join"][
-                                    self.operations["mult"][one][two]
-                                ][three]
-                            ][two]
-                        ]
-                        != one
-                        or self.operations["meet"][two][
-                            self.operations["undr"][one][
-                                self.operations["join"][
-                                    self.operations["mult"][one][two]
-                                ][three]
-                            ]
-                        ]
-                        != two
-                    ):
-                        return False
-        return True
+        failure = self._residuation_failure()
+        if failure is not None:
+            raise ValueError(
+                f"check residuated binars axioms! {failure} is not a residual"
+            )
+
+    def _residuation_failure(self) -> Optional[str]:
+        tables = self.tabular_format
+        order = self.order_tables[2]
+        covers = upper_covers(order)
+        for name, left in (("over", False), ("undr", True)):
+            failure = _residual_failure(
+                tables["mult"], tables[name], order, covers, left  # type: ignore
+            )
+            if failure is not None:
+                first, second = failure if name == "over" else failure[::-1]
+                return f"{name}({self.symbols[first]}, {self.symbols[second]})"
+        return None
 
     @property
     def operation_map(self) -> Dict[str, str]:  # noqa: D102
@@ -140,34 +138,62 @@ class ResiduatedBinar(Lattice):
     @property
     def latex_mult_table(self) -> str:
         """Return a LaTeX representation of a multiplication table."""
-        table = (
+        stream = StringIO()
+        self.write_latex_mult_table(stream)
+        return stream.getvalue()
+
+    def write_latex_mult_table(self, stream: TextIO) -> None:
+        """
+        Write a LaTeX representation of a multiplication table.
+
+        :param stream: a text stream to write to
+        """
+        symbols = self.symbols
+        mult = self.operations["mult"]
+        stream.write(
             "\\begin{table}[]\n"
-            + "\\begin{tabular}"
-            + f"{{l|{''.join((self.cardinality) * 'l')}}}\n"
-            + "$"
-            + "$ & $".join([r"\cdot"] + self.symbols)
-            + "$\\\\\\hline\n"
+            f"\\begin{{tabular}}{{l|{len(symbols) * 'l'}}}\n"
+            "$" + "$ & $".join([r"\cdot"] + symbols) + "$\\\\\\hline\n"
+        )
+        stream.write(
+            "".join(
+                f"${row}$ & "
+                + "".join(
+                    f"${mult[row][col]}$" + ("" if col == BOT else " & ")
+                    for col in symbols
+                )
+                + ("" if row == BOT else r"\\")
+                + "\n"
+                for row in symbols
+            )
         )
-        for row in self.symbols:
-            table += "$" + row + "$ & "
-            for col in self.symbols:
-                table += "$" + self.operations["mult"][row][col] + "$"
-                if col != BOT:
-                    table += " & "
-            if row != BOT:
-                table += r"\\"
-            table += "\n"
-        table += "\\end{tabular}\n" + "\\end{table}\n"
-        return table
+        stream.write("\\end{tabular}\n\\end{table}\n")
 
     @property
     def markdown_mult_table(self) -> str:
         """Return a Markdown representation of a multiplication table."""
-        table = "|*|" + "|".join(self.symbols) + "|\n"
-        table += "|" + (1 + len(self.symbols)) * "-|" + "\n"
-        for row in self.symbols:
-            table += "|**" + row + "**|"
-            for col in self.symbols:
-                table += self.operations["mult"][row][col] + "|"
-            table += "\n"
-        return table
+        stream = StringIO()
+        self.write_markdown_mult_table(stream)
+        return stream.getvalue()
+
+    def write_markdown_mult_table(self, stream: TextIO) -> None:
+        """
+        Write a Markdown representation of a multiplication table.
+
+        :param stream: a text stream to write to
+        """
+        symbols = self.symbols
+        mult = self.operations["mult"]
+        stream.write(
+            "|*|"
+            + "|".join(symbols)
+            + "|\n|"
+            + (1 + len(symbols)) * "-|"
+            + "\n"
+            + "".join(
+                f"|**{row}**|"
+                + "".join(mult[row][col] + "|" for col in symbols)
+                + "\n"
+                for row in symbols
+            )
+        )
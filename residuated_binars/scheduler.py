@@ -0,0 +1,242 @@
+# Copyright 2022 Boris Shminke
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# noqa: D205, D400
+"""
+Scheduler
+==========
+
+-  reads the time of processing every theory from the timestamps of a
+   log written by ``get_customised_logger``
+-  estimates how long a hypothesis will take at the next cardinality
+-  orders hypotheses longest first and distributes them between
+   several workers (servers or sessions), so that the slowest ones don't
+   start last
+
+"""
+import heapq
+import json
+import re
+from datetime import datetime
+from statistics import mean, median
+from typing import Dict, Iterator, List, Sequence, TextIO, Tuple
+
+from residuated_binars.generate_theories import Hypothesis
+from residuated_binars.isabelle_log import short_lines
+
+TIMESTAMP = re.compile(r"(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d{3}): (.*)")
+Timings = Dict[int, Dict[str, float]]
+
+
+def get_theory_timings(log_file_name: str) -> Dict[str, float]:
+    """
+    Get processing times of theories from a log of Isabelle server replies.
+
+    A time of processing a theory is measured from the first to the last
+    progress notification about it.
+
+    >>> import sys
+    >>> if sys.version_info.major == 3 and sys.version_info.minor >= 9:
+    ...     from importlib.resources import files
+    ... else:
+    ...     from importlib_resources import files
+    >>> timings = get_theory_timings(
+    ...     files("residuated_binars").joinpath("resources/isabelle.out")
+    ... )
+    >>> len(timings)
+    186
+    >>> timings["T01234_5"]
+    15.095
+
+    :param log_file_name: a name of a log file with timestamps
+    :returns: a map from theory names to seconds spent on them
+    """
+    first_seen: Dict[str, float] = {}
+    last_seen: Dict[str, float] = {}
+    with open(log_file_name, "r", encoding="utf-8") as log_file:
+        for theory_name, timestamp in _theory_notes(log_file):
+            first_seen.setdefault(theory_name, timestamp)
+            last_seen[theory_name] = timestamp
+    return {
+        theory_name: round(last_seen[theory_name] - start, 3)
+        for theory_name, start in first_seen.items()
+    }
+
+
+def _theory_notes(log_file: TextIO) -> Iterator[Tuple[str, float]]:
+    timestamp = 0.0
+    for line in short_lines(log_file):
+        match = TIMESTAMP.match(line)
+        if match is not None:
+            timestamp = datetime.strptime(
+                match.group(1), "%Y-%m-%d %H:%M:%S,%f"
+            ).timestamp()
+        elif line.startswith("NOTE ") and '"theory":' in line:
+            yield json.loads(line[5:])["theory"].split(".")[-1], timestamp
+
+
+class DifficultyModel:
+    """
+    Estimate processing time of hypotheses from the past rounds.
+
+    -  if a hypothesis was checked before, its last time is multiplied by
+       a typical growth of time from the previous cardinality to the last
+       one
+    -  otherwise, a mean time of similar hypotheses (with the same goal and
+       number of assumptions, the same goal, or the same number of
+       assumptions) from the last round is used
+
+    >>> hypotheses = {
+    ...     hypothesis.name: hypothesis for hypothesis in [
+    ...         Hypothesis((0,), 1), Hypothesis((1,), 0),
+    ...         Hypothesis((0, 2), 1), Hypothesis((2,), 1)
+    ...     ]
+    ... }
+    >>> model = DifficultyModel(
+    ...     {2: {"T0_1": 1.0, "T1_0": 2.0}, 3: {"T0_1": 3.0, "T1_0": 4.0}},
+    ...     hypotheses
+    ... )
+    >>> [model.estimate(hypothesis) for hypothesis in hypotheses.values()]
+    [7.5, 10.0, 3.0, 3.0]
+    >>> model.estimate(Hypothesis((0, 1, 2), 3))
+    3.5
+    >>> DifficultyModel({2: {"T0_1": 1.0}}, hypotheses).estimate(
+    ...     hypotheses["T0_1"]
+    ... )
+    1.0
+    >>> DifficultyModel({}, hypotheses).estimate(hypotheses["T0_1"])
+    0.0
+    """
+
+    def __init__(self, timings: Timings, hypotheses: Dict[str, Hypothesis]):
+        """
+        Remember the past timings.
+
+        :param timings: seconds spent on every theory for every cardinality
+        :param hypotheses: a map from theory names to hypotheses
+        """
+        self.timings = timings
+        self.hypotheses = hypotheses
+
+    @property
+    def growth(self) -> float:
+        """Return a median ratio of times of the last two rounds."""
+        cardinalities = sorted(self.timings)[-2:]
+        if len(cardinalities) < 2:
+            return 1.0
+        last, previous = (
+            self.timings[cardinalities[1]],
+            self.timings[cardinalities[0]],
+        )
+        ratios = [
+            last[name] / previous[name]
+            for name in last
+            if previous.get(name, 0) > 0
+        ]
+        return median(ratios) if ratios else 1.0
+
+    def estimate(self, hypothesis: Hypothesis) -> float:
+        """
+        Estimate processing time of a hypothesis in the next round.
+
+        :param hypothesis: a hypothesis to check
+        :returns: expected time in seconds
+        """
+        checked = [
+            cardinality
+            for cardinality, timings in self.timings.items()
+            if hypothesis.name in timings
+        ]
+        if checked:
+            return self.timings[max(checked)][hypothesis.name] * self.growth
+        if not self.timings:
+            return 0.0
+        return self._similar_time(hypothesis)
+
+    def _similar_time(self, hypothesis: Hypothesis) -> float:
+        last_timings = self.timings[max(self.timings)]
+        known = [
+            (self.hypotheses[name], seconds)
+            for name, seconds in last_timings.items()
+            if name in self.hypotheses
+        ]
+        for similar in (
+            lambda other: other.goal_index == hypothesis.goal_index
+            and len(other.assumption_indices)
+            == len(hypothesis.assumption_indices),
+            lambda other: other.goal_index == hypothesis.goal_index,
+            lambda other: len(other.assumption_indices)
+            == len(hypothesis.assumption_indices),
+        ):
+            similar_times = [
+                seconds for other, seconds in known if similar(other)
+            ]
+            if similar_times:
+                return mean(similar_times)
+        return mean(last_timings.values()) if last_timings else 0.0
+
+
+def schedule(
+    jobs: Sequence[Tuple[str, float]], workers: int = 1
+) -> List[List[str]]:
+    """
+    Distribute jobs between workers, the longest jobs first.
+
+    Every next job goes to the least loaded worker, so the short jobs fill
+    the gaps left by the long ones.
+
+    >>> schedule([("a", 1.0), ("b", 5.0), ("c", 3.0), ("d", 2.0)], 2)
+    [['b', 'a'], ['c', 'd']]
+    >>> schedule([("a", 1.0), ("b", 5.0)])
+    [['b', 'a']]
+
+    :param jobs: names of jobs and their expected duration
+    :param workers: a number of workers
+    :returns: ordered lists of job names for every worker
+    """
+    queues: List[List[str]] = [[] for _ in range(workers)]
+    loads: List[Tuple[float, int]] = [
+        (0.0, worker) for worker in range(workers)
+    ]
+    for name, duration in sorted(jobs, key=lambda job: -job[1]):
+        load, worker = heapq.heappop(loads)
+        queues[worker].append(name)
+        heapq.heappush(loads, (load + duration, worker))
+    return queues
+
+
+def order_hypotheses(
+    hypotheses: List[Hypothesis],
+    model: DifficultyModel,
+    workers: int = 1,
+) -> List[List[Hypothesis]]:
+    """
+    Order hypotheses for checking by expected difficulty.
+
+    :param hypotheses: hypotheses to check
+    :param model: a model of difficulty
+    :param workers: a number of workers
+    :returns: ordered lists of hypotheses for every worker
+    """
+    by_name = {hypothesis.name: hypothesis for hypothesis in hypotheses}
+    return [
+        [by_name[name] for name in queue]
+        for queue in schedule(
+            [
+                (hypothesis.name, model.estimate(hypothesis))
+                for hypothesis in hypotheses
+            ],
+            workers,
+        )
+    ]
@@ -0,0 +1,189 @@
+# Copyright 2022 Boris Shminke
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# noqa: D205, D400
+"""
+Session Build
+==============
+
+A dedicated Isabelle session with the ``finite_type`` declaration and
+definitions of laws, built once and reused by every theory.
+
+-  the session contains one polymorphic ``Definitions`` theory (as
+   written by ``generate_definitions_theory``), which doesn't depend on a
+   cardinality
+-  the session is named after a hash of that theory, so it's built only
+   for new definitions (and reused for every cardinality), and a built
+   session is marked by a stamp file in its folder
+-  theories import ``[session name].Definitions`` instead of ``Main``,
+   declare ``finite_type`` of a given cardinality themselves, and run in a
+   session started from the prebuilt heap
+
+"""
+import hashlib
+import json
+import os
+from typing import Any, Dict, List
+
+from isabelle_client import IsabelleClient
+from isabelle_client.socket_communication import IsabelleResponse
+
+from residuated_binars.check_assumptions import get_abs_path
+from residuated_binars.generate_theories import (
+    DEFINITIONS,
+    generate_definitions_theory,
+    write_theory_file,
+)
+
+STAMP = "built"
+
+
+class PrebuiltSession:
+    r"""
+    A session with shared definitions of laws.
+
+    >>> from residuated_binars.fake_isabelle_server import (
+    ...     FakeIsabelleServer
+    ... )
+    >>> from isabelle_client import get_isabelle_client
+    >>> server = FakeIsabelleServer()
+    >>> client = get_isabelle_client(server.start())
+    >>> session = PrebuiltSession(
+    ...     "test-sessions", ["(\\<forall> x::finite_type. join(x, x) = x)"]
+    ... )
+    >>> session.name
+    'Residuated_411afe70f30583f8'
+    >>> session.imports
+    'Residuated_411afe70f30583f8.Definitions'
+    >>> print(*session.definitions.values())
+    law0 (join :: finite_type \<times> finite_type \<Rightarrow> finite_type)
+    >>> session.build(client)
+    True
+    >>> session.build(client)
+    False
+    >>> with open(os.path.join(session.directory, "ROOT")) as root_file:
+    ...     print(root_file.read())
+    session Residuated_411afe70f30583f8 = HOL +
+      options [document = false]
+      theories
+        Definitions
+    <BLANKLINE>
+    >>> with open(
+    ...     os.path.join(session.directory, "Definitions.thy")
+    ... ) as theory_file:
+    ...     print(theory_file.read().split("\n")[3])
+    definition law0 where "law0 join =
+    >>> session_id = client.session_start(**session.start_arguments)
+    >>> PrebuiltSession("test-sessions", ["True"]).name != session.name
+    True
+    >>> server.stop()
+    >>> import asyncio
+    >>> class FailingClient:
+    ...     async def execute_command(self, command):
+    ...         return [IsabelleResponse("FAILED", '{"ok": false}')]
+    >>> failing = PrebuiltSession("test-sessions", [])
+    >>> asyncio.run(failing.build_async(FailingClient()))
+    Traceback (most recent call last):
+     ...
+    ValueError: Failed to build Residuated_2f90cc448a5dfae2: {"ok": false}
+    >>> import shutil
+    >>> shutil.rmtree("test-sessions")
+    """
+
+    def __init__(self, path: str, laws: List[str]):
+        """
+        Prepare a text of the session theory and its name.
+
+        :param path: a folder for sessions (each one gets a sub-folder)
+        :param laws: formulae in Isabelle syntax to define
+        """
+        lines, self.definitions = generate_definitions_theory(
+            laws, polymorphic=True
+        )
+        self.theory_text = "\n".join(lines)
+        digest = hashlib.sha256(self.theory_text.encode("utf-8")).hexdigest()
+        self.name = f"Residuated_{digest[:16]}"
+        self.directory = os.path.join(path, self.name)
+
+    @property
+    def imports(self) -> str:
+        """Return a qualified name of the theory with definitions."""
+        return f"{self.name}.{DEFINITIONS}"
+
+    @property
+    def start_arguments(self) -> Dict[str, Any]:
+        """Return arguments of ``session_start`` and ``session_build``."""
+        return {"session": self.name, "dirs": [get_abs_path(self.directory)]}
+
+    @property
+    def is_built(self) -> bool:
+        """Return whether the session was already built."""
+        return os.path.exists(os.path.join(self.directory, STAMP))
+
+    def _write(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        write_theory_file(self.directory, DEFINITIONS, self.theory_text)
+        with open(
+            os.path.join(self.directory, "ROOT"), "w", encoding="utf-8"
+        ) as root_file:
+            root_file.write(
+                f"session {self.name} = HOL +\n"
+                "  options [document = false]\n"
+                f"  theories\n    {DEFINITIONS}\n"
+            )
+
+    def _mark_built(self, responses: List[IsabelleResponse]) -> None:
+        if (
+            responses[-1].response_type != "FINISHED"
+            or not json.loads(responses[-1].response_body)["ok"]
+        ):
+            raise ValueError(
+                f"Failed to build {self.name}: {responses[-1].response_body}"
+            )
+        with open(
+            os.path.join(self.directory, STAMP), "w", encoding="utf-8"
+        ) as stamp_file:
+            stamp_file.write(self.name)
+
+    def build(self, client: IsabelleClient) -> bool:
+        """
+        Build the session if it wasn't built before.
+
+        :param client: a client of a running Isabelle server
+        :returns: whether the session was built now
+        :raises ValueError: if the build failed
+        """
+        if self.is_built:
+            return False
+        self._write()
+        self._mark_built(client.session_build(**self.start_arguments))
+        return True
+
+    async def build_async(self, client: IsabelleClient) -> bool:
+        """
+        Build the session if it wasn't built before, without blocking.
+
+        :param client: a client of a running Isabelle server
+        :returns: whether the session was built now
+        :raises ValueError: if the build failed
+        """
+        if self.is_built:
+            return False
+        self._write()
+        self._mark_built(
+            await client.execute_command(
+                f"session_build {json.dumps(self.start_arguments)}"
+            )
+        )
+        return True
@@ -0,0 +1,227 @@
+# Copyright 2022 Boris Shminke
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# noqa: D205, D400
+"""
+Subalgebras
+============
+
+Finding smaller models inside a model.
+
+-  a subuniverse is a set of elements closed under all operations and
+   containing the constants of the model's class (its
+   ``constant_symbols``); it's kept as a bitmask of indices of elements
+   in ``symbols``
+-  a closure of a set is computed with a work list over tables of element
+   indices: every pair of elements is multiplied once, when the second of
+   them is taken from the list
+-  all subuniverses are enumerated by adding one element at a time to
+   known subuniverses and closing the result; a closure bigger than a
+   given bound is never extended further
+-  a subalgebra is an instance of the same class as the model (axioms of
+   all classes in the package are equations, so they hold in
+   subalgebras)
+
+"""
+from typing import Any, Iterable, List, Optional, Set
+
+from residuated_binars.algebraic_structure import AlgebraicStructure
+
+
+def _bits(mask: int) -> List[int]:
+    return [index for index in range(mask.bit_length()) if mask >> index & 1]
+
+
+class Subuniverses:
+    r"""
+    Closed subsets of a model.
+
+    >>> import os
+    >>> from tempfile import TemporaryDirectory
+    >>> from residuated_binars.bounded_lattice import BoundedLattice
+    >>> from residuated_binars.lattice_catalog import LatticeCatalog
+    >>> with TemporaryDirectory() as directory, LatticeCatalog(
+    ...     os.path.join(directory, "lattices.rba"), 5
+    ... ) as catalog:
+    ...     pentagon = catalog.lattices(5, modular=False)[0]
+    >>> pentagon.symbols
+    ['⟘', 'a', 'b', 'c', '⟙']
+    >>> subuniverses = Subuniverses(pentagon)
+    >>> subuniverses.generated(["a", "c"])
+    ['⟘', 'a', 'c', '⟙']
+    >>> subuniverses.generated(["b"])
+    ['⟘', 'b', '⟙']
+    >>> Subuniverses(pentagon, constants=[]).generated(["a", "b"])
+    ['⟘', 'a', 'b', '⟙']
+    >>> [bin(mask) for mask in subuniverses.enumerate(3)]
+    ['0b10001', '0b10011', '0b10101', '0b11001']
+    >>> len(subuniverses.enumerate())
+    8
+    >>> chain = subuniverses.subalgebras(4)[-1]
+    >>> chain.label, type(chain).__name__, chain.symbols
+    ('L5_1:[⟘, b, c, ⟙]', 'BoundedLattice', ['⟘', 'b', 'c', '⟙'])
+    >>> _ = BoundedLattice(chain.label, chain.operations)
+
+    Constants of other classes are kept too:
+
+    >>> from residuated_binars.boolean_ring import BooleanRing
+    >>> ring = BooleanRing("two", {
+    ...     "add": {"0": {"0": "0", "1": "1"}, "1": {"0": "1", "1": "0"}},
+    ...     "neg": {"0": "0", "1": "1"},
+    ...     "mult": {"0": {"0": "0", "1": "0"}, "1": {"0": "0", "1": "1"}},
+    ... })
+    >>> cube = ring.power(3)
+    >>> subalgebras = Subuniverses(cube).subalgebras()
+    >>> [subalgebra.symbols for subalgebra in subalgebras]
+    [['0', '1'], ['(0, 1, 1)', '(1, 0, 0)', '0', '1'],
+     ['(0, 1, 0)', '(1, 0, 1)', '0', '1'],
+     ['(0, 0, 1)', '(1, 1, 0)', '0', '1']]
+    >>> [
+    ...     BooleanRing(subalgebra.label, subalgebra.operations).cardinality
+    ...     for subalgebra in subalgebras
+    ... ]
+    [2, 4, 4, 4]
+    """
+
+    def __init__(
+        self,
+        structure: AlgebraicStructure,
+        constants: Optional[Iterable[str]] = None,
+    ):
+        """
+        Prepare tables of element indices.
+
+        :param structure: a finite model
+        :param constants: symbols which every subuniverse must contain (by
+            default, ``constant_symbols`` of the model's class)
+        """
+        self.structure, self.symbols = structure, structure.symbols
+        tables = list(structure.tabular_format.values())
+        self._binary = [
+            table for table in tables if isinstance(table[0], list)
+        ]
+        self._unary = [table for table in tables if isinstance(table[0], int)]
+        self.constants = sum(
+            1 << self.symbols.index(symbol)
+            for symbol in (
+                structure.constant_symbols
+                if constants is None
+                else list(constants)
+            )
+            if symbol in self.symbols
+        )
+
+    def close(self, mask: int) -> int:
+        """
+        Get the smallest subuniverse containing given elements.
+
+        :param mask: a bitmask of indices of elements
+        :returns: a bitmask of indices of elements of the subuniverse
+        """
+        closure = mask | self.constants
+        queue, done = _bits(closure), 0
+        while queue:
+            element = queue.pop()
+            done |= 1 << element
+            products = [table[element] for table in self._unary] + [
+                value
+                for table in self._binary
+                for other in _bits(done)
+                for value in (table[element][other], table[other][element])
+            ]
+            for value in products:
+                if not closure >> value & 1:
+                    closure |= 1 << value
+                    queue.append(value)
+        return closure
+
+    def generated(self, generators: Iterable[str]) -> List[str]:
+        """
+        Get elements of a subalgebra generated by given elements.
+
+        :param generators: symbols of elements
+        :returns: symbols of elements of the subalgebra
+        """
+        return [
+            self.symbols[index]
+            for index in _bits(
+                self.close(
+                    sum(
+                        1 << self.symbols.index(symbol)
+                        for symbol in generators
+                    )
+                )
+            )
+        ]
+
+    def enumerate(self, max_size: Optional[int] = None) -> List[int]:
+        """
+        Find all non-empty subuniverses up to a given size.
+
+        :param max_size: a maximal number of elements (no limit by default)
+        :returns: bitmasks of subuniverses, smaller first
+        """
+        found: Set[int] = set()
+        queue = [self.close(1 << index) for index in range(len(self.symbols))]
+        while queue:
+            mask = queue.pop()
+            if mask not in found and (
+                max_size is None or bin(mask).count("1") <= max_size
+            ):
+                found.add(mask)
+                queue.extend(
+                    self.close(mask | 1 << index)
+                    for index in range(len(self.symbols))
+                    if not mask >> index & 1
+                )
+        return sorted(found, key=lambda mask: (bin(mask).count("1"), mask))
+
+    def subalgebra(self, mask: int) -> Any:
+        """
+        Restrict the model to a subuniverse.
+
+        :param mask: a bitmask of a subuniverse
+        :returns: a model of the same class as the original one
+        """
+        symbols = [self.symbols[index] for index in _bits(mask)]
+        return type(self.structure).unchecked(
+            f"{self.structure.label}[{', '.join(symbols)}]",
+            {
+                name: {
+                    one: (
+                        {two: operation[one][two] for two in symbols}
+                        if isinstance(operation[one], dict)
+                        else operation[one]
+                    )
+                    for one in symbols
+                }
+                for name, operation in self.structure.operations.items()
+            },
+        )
+
+    def subalgebras(self, max_size: Optional[int] = None) -> List[Any]:
+        """
+        Find all proper subalgebras up to a given size.
+
+        :param max_size: a maximal number of elements (by default, smaller
+            than the model)
+        :returns: subalgebras, smaller first
+        """
+        return [
+            self.subalgebra(mask)
+            for mask in self.enumerate(
+                len(self.symbols) - 1 if max_size is None else max_size
+            )
+            if mask != (1 << len(self.symbols)) - 1
+        ]
@@ -19,38 +19,77 @@ Use Nitpick
 
 A wrapper ‘do all’ script.
 
--  runs ``generate_theories.py`` which creates a new ``hyp2`` folder
-   with initial hypotheses templates
--  then for each cardinality from 2 to 100 (hard-coded)
--  runs ``add_task.py`` which creates a ``task[n]`` folder for a
-   particular cardinality with a respective task for ``Nitpick`` added
-   to the templates in ``hyp[n]``
--  runs ``check_assumptions.py`` on a ``task[n]`` folder
--  runs ``filter_theories.py`` which filter theories with no
-   counter-examples found to a new folder ``hyp[n+1]``
--  if the ``hyp[n+1]`` folder is empty, the script stops (that means
+-  creates a ``HypothesisRegistry`` with initial hypotheses (the same as
+   ``generate_theories.py`` would write to a ``hyp2`` folder)
+-  then for each cardinality from 2 to ``max_cardinality``
+-  writes theory files of still open hypotheses with a respective task
+   for ``Nitpick`` to a scratch folder
+-  runs ``check_assumptions.py`` on the scratch folder
+-  saves the results and processing times to the registry (the next
+   round starts from the hypotheses which are expected to be the
+   hardest) and keeps the server's log as
+   ``isabelle[n].out`` in the scratch folder
+-  if no open hypotheses left, the script stops (that means
    counter-examples were found for all original hypotheses)
+-  ``use_nitpick_async`` does the same using ``check_assumptions_async``:
+   theories of every round are dealt into several ``use_theories``
+   requests (the hardest ones go to different requests), which run
+   concurrently on several servers
+-  optionally, laws are defined once in a prebuilt session (see
+   ``session_build``), which every theory of every round imports
 
 """
 import os
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 
-from residuated_binars.add_task import TaskType, add_task
-from residuated_binars.check_assumptions import check_assumptions
-from residuated_binars.filter_theories import filter_theories
-from residuated_binars.generate_theories import independence_check
+from isabelle_client import get_isabelle_client
 
+from residuated_binars.add_task import TaskType
+from residuated_binars.check_assumptions import (
+    check_assumptions,
+    check_assumptions_async,
+)
+from residuated_binars.hypothesis_registry import HypothesisRegistry
+from residuated_binars.session_build import PrebuiltSession
 
-def use_nitpick(
+
+def use_nitpick(  # pylint: disable=too-many-arguments
     max_cardinality: int,
     independent_assumptions: List[str],
     additional_assumptions: List[str],
     check_subset_independence: bool,
     server_info: Optional[str] = None,
-) -> None:
-    """
+    *,
+    scratch_path: str = "tasks",
+    lemmas_per_theory: int = 1,
+    session_path: Optional[str] = None,
+) -> HypothesisRegistry:
+    r"""
     Incrementally search for finite counter-examples.
 
+    >>> from residuated_binars.fake_isabelle_server import (
+    ...     FakeIsabelleServer
+    ... )
+    >>> server = FakeIsabelleServer()
+    >>> registry = use_nitpick(
+    ...     3, ["(\\<forall> x::finite_type. join(x, x) = x)",
+    ...     "(\\<forall> x::finite_type. meet(x, x) = x)"], [], True,
+    ...     server.start(), scratch_path="test-nitpick",
+    ...     session_path="test-sessions"
+    ... )
+    >>> sorted(registry.timings)
+    [2, 3]
+    >>> len(os.listdir("test-sessions"))
+    1
+    >>> server.stop()
+    >>> use_nitpick(2, 2 * ["True"], [], True, session_path="test-sessions")
+    Traceback (most recent call last):
+     ...
+    ValueError: a prebuilt session needs a running server
+    >>> import shutil
+    >>> shutil.rmtree("test-nitpick")
+    >>> shutil.rmtree("test-sessions")
+
     :param max_cardinality: maximal cardinality of a model to search for
     :param independent_assumptions: a list of assumption which independence
         we want to check
@@ -58,19 +97,173 @@ def use_nitpick(
     :param check_subset_independence: whether to check every assumption from
         the list against all the rest or against any combination of the rest
     :param server_info: an info string of an Isabelle server
+    :param scratch_path: a folder for theory files and server logs
+    :param lemmas_per_theory: how many hypotheses to pack into one theory
+        file
+    :param session_path: if given, laws are defined in a session prebuilt
+        in this folder (once for a set of laws and reused for every
+        cardinality), and theories import it (this needs a running server)
+    :returns: a registry of hypotheses with their statuses
+    :raises ValueError: if a prebuilt session is asked for without a server
     """
+    registry = HypothesisRegistry(
+        independent_assumptions,
+        additional_assumptions,
+        check_subset_independence,
+        lemmas_per_theory,
+        session_path is not None,
+    )
+    session = _prebuilt_session(registry, session_path, server_info)
     cardinality = 2
-    hypotheses = f"hyp{cardinality}"
-    independence_check(
-        hypotheses,
+    while cardinality <= max_cardinality and registry.open_hypotheses:
+        theories = registry.write_tasks(
+            scratch_path, TaskType.NITPICK, cardinality, _imports(session)
+        )
+        check_assumptions(
+            scratch_path, server_info, theories, _start_arguments(session)
+        )
+        _save_round(registry, scratch_path, cardinality)
+        cardinality += 1
+    return registry
+
+
+async def use_nitpick_async(  # pylint: disable=too-many-arguments
+    max_cardinality: int,
+    independent_assumptions: List[str],
+    additional_assumptions: List[str],
+    check_subset_independence: bool,
+    server_infos: Sequence[str],
+    *,
+    scratch_path: str = "tasks",
+    lemmas_per_theory: int = 1,
+    max_in_flight: int = 4,
+    theories_per_request: int = 16,
+    session_path: Optional[str] = None,
+) -> HypothesisRegistry:
+    r"""
+    Incrementally search for finite counter-examples on several servers.
+
+    >>> from residuated_binars.fake_isabelle_server import (
+    ...     FakeIsabelleServer
+    ... )
+    >>> import asyncio
+    >>> servers = [FakeIsabelleServer(latency=0.001) for _ in range(2)]
+    >>> registry = asyncio.run(use_nitpick_async(
+    ...     3, 4 * ["True"], [], True,
+    ...     [server.start() for server in servers],
+    ...     scratch_path="test-async-nitpick", theories_per_request=7
+    ... ))
+    >>> len(registry.timings[3])
+    28
+    >>> registry = asyncio.run(use_nitpick_async(
+    ...     2, 2 * ["(\\<forall> x::finite_type. join(x, x) = x)"], [], True,
+    ...     [server.start() for server in servers],
+    ...     scratch_path="test-async-nitpick",
+    ...     session_path="test-async-nitpick"
+    ... ))
+    >>> len([name for name in os.listdir("test-async-nitpick")
+    ...     if name.startswith("Residuated_")])
+    1
+    >>> [server.max_requests_in_flight for server in servers]
+    [2, 2]
+    >>> for server in servers:
+    ...     server.stop()
+    >>> import shutil
+    >>> shutil.rmtree("test-async-nitpick")
+
+    :param max_cardinality: maximal cardinality of a model to search for
+    :param independent_assumptions: a list of assumption which independence
+        we want to check
+    :param additional_assumptions: a list of additional assumptions
+    :param check_subset_independence: whether to check every assumption from
+        the list against all the rest or against any combination of the rest
+    :param server_infos: info strings of running Isabelle servers
+    :param scratch_path: a folder for theory files and server logs
+    :param lemmas_per_theory: how many hypotheses to pack into one theory
+        file
+    :param max_in_flight: a maximal number of simultaneous requests
+    :param theories_per_request: how many theories to send in one request
+    :param session_path: if given, laws are defined in a session prebuilt
+        in this folder (once for a set of laws and reused for every
+        cardinality), and theories import it
+    :returns: a registry of hypotheses with their statuses
+    """
+    registry = HypothesisRegistry(
         independent_assumptions,
         additional_assumptions,
         check_subset_independence,
+        lemmas_per_theory,
+        session_path is not None,
+    )
+    session = await _prebuilt_session_async(
+        registry, session_path, server_infos[0]
     )
-    while cardinality <= max_cardinality and os.listdir(hypotheses) != []:
-        tasks = f"task{cardinality}"
-        add_task(hypotheses, tasks, TaskType.NITPICK, cardinality)
-        check_assumptions(tasks, server_info)
+    cardinality = 2
+    while cardinality <= max_cardinality and registry.open_hypotheses:
+        theories = registry.write_tasks(
+            scratch_path, TaskType.NITPICK, cardinality, _imports(session)
+        )
+        batch_count = -(-len(theories) // theories_per_request)
+        await check_assumptions_async(
+            scratch_path,
+            server_infos,
+            [theories[start::batch_count] for start in range(batch_count)],
+            max_in_flight,
+            _start_arguments(session),
+        )
+        _save_round(registry, scratch_path, cardinality)
         cardinality += 1
-        hypotheses = f"hyp{cardinality}"
-        filter_theories(tasks, hypotheses)
+    return registry
+
+
+def _prebuilt_session(
+    registry: HypothesisRegistry,
+    session_path: Optional[str],
+    server_info: Optional[str],
+) -> Optional[PrebuiltSession]:
+    if session_path is None:
+        return None
+    if server_info is None:
+        raise ValueError("a prebuilt session needs a running server")
+    session = PrebuiltSession(
+        session_path,
+        registry.independent_assumptions + registry.additional_assumptions,
+    )
+    session.build(get_isabelle_client(server_info))
+    return session
+
+
+async def _prebuilt_session_async(
+    registry: HypothesisRegistry,
+    session_path: Optional[str],
+    server_info: str,
+) -> Optional[PrebuiltSession]:
+    if session_path is None:
+        return None
+    session = PrebuiltSession(
+        session_path,
+        registry.independent_assumptions + registry.additional_assumptions,
+    )
+    await session.build_async(get_isabelle_client(server_info))
+    return session
+
+
+def _imports(session: Optional[PrebuiltSession]) -> Optional[str]:
+    return None if session is None else session.imports
+
+
+def _start_arguments(
+    session: Optional[PrebuiltSession],
+) -> Optional[Dict[str, Any]]:
+    return None if session is None else session.start_arguments
+
+
+def _save_round(
+    registry: HypothesisRegistry, scratch_path: str, cardinality: int
+) -> None:
+    registry.update_statuses(scratch_path, cardinality)
+    registry.update_timings(scratch_path, cardinality)
+    os.replace(
+        os.path.join(scratch_path, "isabelle.out"),
+        os.path.join(scratch_path, f"isabelle{cardinality}.out"),
+    )
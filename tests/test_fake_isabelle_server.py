@@ -0,0 +1,66 @@
+#   Copyright 2022 Boris Shminke
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+"""Tests."""
+import os
+import shutil
+from unittest import TestCase
+
+from residuated_binars.fake_isabelle_server import FakeIsabelleServer
+from residuated_binars.use_nitpick import use_nitpick
+
+
+class TestFakeIsabelleServer(TestCase):
+    """Test the pipeline against ``FakeIsabelleServer``."""
+
+    def setUp(self):
+        """Start a fake server."""
+        shutil.rmtree("test-fake", ignore_errors=True)
+        self.server = FakeIsabelleServer(latency=0.002, threads=4)
+        self.server_info = self.server.start()
+
+    def tearDown(self):
+        """Stop a fake server."""
+        self.server.stop()
+        shutil.rmtree("test-fake", ignore_errors=True)
+
+    def test_use_nitpick(self):
+        """Test ``use_nitpick`` talking to a server through TCP."""
+        registry = use_nitpick(
+            3,
+            6 * ["True"],
+            [],
+            True,
+            server_info=self.server_info,
+            scratch_path="test-fake",
+        )
+        self.assertEqual(self.server.theories_processed, 2 * 186)
+        self.assertEqual(len(registry.open_hypotheses), 186)
+        self.assertEqual(sorted(registry.timings), [2, 3])
+        self.assertEqual(len(registry.timings[3]), 186)
+        self.assertTrue(
+            os.path.exists(os.path.join("test-fake", "isabelle3.out"))
+        )
+
+    def test_failures(self):
+        """Test that failed requests leave no results."""
+        self.server.failure_rate = 1.0
+        with self.assertRaises(ValueError):
+            use_nitpick(
+                2,
+                3 * ["True"],
+                [],
+                True,
+                server_info=self.server_info,
+                scratch_path="test-fake",
+            )
@@ -0,0 +1,240 @@
+#   Copyright 2022 Boris Shminke
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+"""Tests."""
+import json
+import os
+import shutil
+import sys
+from typing import Any, Dict, List
+from unittest import TestCase
+
+from residuated_binars.add_task import TaskType, TheoryTemplate
+from residuated_binars.filter_theories import filter_theories
+from residuated_binars.hypothesis_registry import HypothesisRegistry
+from residuated_binars.isabelle_log import get_lemma_names
+from residuated_binars.parser import isabelle_response_to_algebra
+from residuated_binars.scheduler import DifficultyModel
+
+if sys.version_info.major == 3 and sys.version_info.minor >= 9:
+    # pylint: disable=no-name-in-module
+    from importlib.resources import files  # type: ignore
+else:
+    from importlib_resources import files  # pylint: disable=import-error
+
+
+def write_log(theory_name: str, messages: List[Dict[str, Any]]) -> None:
+    """
+    Write a fake Isabelle server reply about one theory.
+
+    :param theory_name: a full theory name
+    :param messages: messages about the theory
+    """
+    with open(
+        os.path.join("test-packed", "isabelle.out"), "w", encoding="utf-8"
+    ) as log_file:
+        log_file.write(
+            "FINISHED "
+            + json.dumps(
+                {"nodes": [{"theory_name": theory_name, "messages": messages}]}
+            )
+        )
+
+
+def refute_t1_0(task_lines: Dict[int, str]) -> List[Dict[str, Any]]:
+    """
+    Make messages finding a counter-example only for ``T1_0`` lemma.
+
+    :param task_lines: a map from lines of tasks to lemma names
+    :returns: messages about every task
+    """
+    return [
+        {
+            "message": (
+                "Nitpick found a counterexample"
+                if lemma_name == "T1_0"
+                else "Nitpick found no counterexample"
+            ),
+            "pos": {"line": line},
+        }
+        for line, lemma_name in task_lines.items()
+    ]
+
+
+class TestHypothesisRegistry(TestCase):
+    """Test ``HypothesisRegistry`` class."""
+
+    def setUp(self):
+        """Create a scratch folder."""
+        shutil.rmtree("test-packed", ignore_errors=True)
+
+    def tearDown(self):
+        """Remove a scratch folder."""
+        shutil.rmtree("test-packed", ignore_errors=True)
+
+    def test_packed_results(self):
+        """Test getting results for every lemma of a packed theory."""
+        registry = HypothesisRegistry(3 * ["True"], [], True, 5)
+        registry.write_tasks("test-packed", TaskType.NITPICK, 2)
+        task_lines = get_lemma_names("test-packed", "Pack0")
+        write_log("Draft.Pack0", refute_t1_0(task_lines))
+        registry.update_statuses("test-packed", 2)
+        self.assertEqual(
+            {
+                hypothesis.name
+                for hypothesis in registry.hypotheses.values()
+                if hypothesis.statuses
+            },
+            set(task_lines.values()),
+        )
+        self.assertFalse(registry.hypotheses["T1_0"].is_open)
+        self.assertEqual(len(registry.open_hypotheses), 8)
+
+    def test_single_lemma_pack(self):
+        """Test a trailing theory with only one lemma inside."""
+        registry = HypothesisRegistry(3 * ["True"], [], True, 4)
+        self.assertEqual(
+            registry.write_tasks("test-packed", TaskType.NITPICK, 2)[-1],
+            "Pack2",
+        )
+        task_lines = get_lemma_names("test-packed", "Pack2")
+        self.assertEqual(len(task_lines), 1)
+        line, lemma_name = list(task_lines.items())[0]
+        write_log(
+            "Draft.Pack2",
+            [
+                {"message": "Nitpicking formula...", "pos": {"line": line}},
+                {
+                    "message": "Nitpick found a counterexample",
+                    "pos": {"line": line},
+                },
+            ],
+        )
+        registry.update_statuses("test-packed", 2)
+        self.assertFalse(registry.hypotheses[lemma_name].is_open)
+
+    def test_filter_packed_theories(self):
+        """Test filtering lemmas of a packed theory."""
+        HypothesisRegistry(3 * ["True"], [], True, 5).write_tasks(
+            "test-packed", TaskType.NITPICK, 2
+        )
+        task_lines = get_lemma_names("test-packed", "Pack0")
+        write_log("Draft.Pack0", refute_t1_0(task_lines))
+        filter_theories("test-packed", os.path.join("test-packed", "next"))
+        open_lemmas = sorted(set(task_lines.values()) - {"T1_0"})
+        self.assertEqual(
+            sorted(os.listdir(os.path.join("test-packed", "next"))),
+            [f"{lemma_name}.thy" for lemma_name in open_lemmas],
+        )
+        with open(
+            os.path.join("test-packed", "next", f"{open_lemmas[0]}.thy"),
+            "r",
+            encoding="utf-8",
+        ) as theory_file:
+            template = TheoryTemplate(theory_file.read())
+        self.assertEqual(template.task_count, 1)
+
+    def test_packed_models(self):
+        """Test parsing models for every lemma of a packed theory."""
+        registry = HypothesisRegistry(3 * ["True"], [], True, 2)
+        self.assertEqual(
+            registry.write_tasks("test-packed", TaskType.NITPICK, 7),
+            ["Pack0", "Pack1", "Pack2", "Pack3", "Pack4"],
+        )
+        with open(
+            files("residuated_binars").joinpath("resources/isabelle2.out"),
+            "r",
+            encoding="utf-8",
+        ) as log_file:
+            nodes = json.loads(
+                [line for line in log_file if "lambda" in line][0][9:]
+            )["nodes"]
+        model = [
+            message["message"]
+            for node in nodes
+            for message in node["messages"]
+            if "lambda" in message["message"]
+        ][0]
+        write_log(
+            "Draft.Pack0",
+            [
+                {"message": model, "pos": {"line": line}}
+                for line in get_lemma_names("test-packed", "Pack0")
+            ],
+        )
+        self.assertEqual(
+            [
+                structure.label
+                for structure in isabelle_response_to_algebra(
+                    os.path.join("test-packed", "isabelle.out")
+                )
+            ],
+            ["T1_0", "T2_0"],
+        )
+
+    def test_packed_timings(self):
+        """Test estimating hypotheses from timings of packed theories."""
+        registry = HypothesisRegistry(3 * ["True"], [], True, 5)
+        registry.write_tasks("test-packed", TaskType.NITPICK, 2)
+        with open(
+            os.path.join("test-packed", "isabelle.out"), "w", encoding="utf-8"
+        ) as log_file:
+            for seconds, theory_name in (
+                (40, "Pack0"),
+                (40, "Pack1"),
+                (44, "Pack1"),
+                (50, "Pack0"),
+            ):
+                log_file.write(
+                    f"2021-12-14 20:45:{seconds},000: OK\nNOTE "
+                    + json.dumps({"theory": f"Draft.{theory_name}"})
+                    + "\n"
+                )
+        registry.update_timings("test-packed", 2)
+        model = DifficultyModel(registry.timings, registry.hypotheses)
+        for theory_name, seconds in (("Pack0", 2.0), ("Pack1", 1.0)):
+            for lemma_name in get_lemma_names(
+                "test-packed", theory_name
+            ).values():
+                self.assertEqual(
+                    model.estimate(registry.hypotheses[lemma_name]), seconds
+                )
+        self.assertEqual(len(registry.timings[2]), 9)
+
+    def test_typed_operations(self):
+        """Test that lemmas give operations ``finite_type`` types."""
+        HypothesisRegistry(
+            [
+                "(\\<forall> x::finite_type. join(x, x) = x)",
+                "(\\<forall> x::finite_type. invo(invo(x)) = x)",
+            ],
+            ["(\\<forall> x::finite_type. join(x, C0) = x)"],
+            True,
+            shared_definitions=True,
+        ).write_tasks(
+            "test-packed", TaskType.NITPICK, 2, "Prebuilt.Definitions"
+        )
+        binary = "finite_type \\<times> finite_type \\<Rightarrow> finite_type"
+        with open(
+            os.path.join("test-packed", "T0_1.thy"), "r", encoding="utf-8"
+        ) as theory_file:
+            self.assertEqual(
+                theory_file.read().split("\n")[4:9],
+                [
+                    'lemma "(',
+                    f"law0 (join :: {binary}) &",
+                    f"law2 (join :: {binary}) C0",
+                    ") \\<longrightarrow>",
+                    "law1 (invo :: finite_type \\<Rightarrow> finite_type)",
+                ],
+            )
@@ -15,10 +15,14 @@
 import os
 import shutil
 import sys
+from typing import List
 from unittest import TestCase
 from unittest.mock import Mock, patch
 
+from residuated_binars.add_task import TaskType, add_task
 from residuated_binars.check_assumptions import check_assumptions
+from residuated_binars.filter_theories import filter_theories
+from residuated_binars.generate_theories import independence_check
 from residuated_binars.use_nitpick import use_nitpick
 
 if sys.version_info.major == 3 and sys.version_info.minor >= 9:
@@ -28,7 +32,6 @@ else:
     from importlib_resources import files  # pylint: disable=import-error
 
 
-# pylint: disable=unused-argument
 def mock_use_theories(**kwargs):
     """
     Copy a ready file of Isabelle replies.
@@ -37,10 +40,42 @@ def mock_use_theories(**kwargs):
     """
     shutil.copyfile(
         files("residuated_binars").joinpath("resources/isabelle.out"),
-        os.path.join("task2", "isabelle.out"),
+        os.path.join(kwargs["master_dir"], "isabelle.out"),
     )
 
 
+def mock_client_factory(mock_server_start: Mock, mock_get_client: Mock):
+    """
+    Set up mocks of Isabelle server and client.
+
+    :param mock_server_start:
+    :param mock_get_client:
+    """
+    mock_server_start.return_value = ("info", None)
+    mock_client = Mock()
+    mock_client.shutdown = lambda: 0
+    mock_client.use_theories = mock_use_theories
+    mock_get_client.return_value = mock_client
+
+
+def nitpick_round(
+    source_path: str, task_path: str, target_path: str, cardinality: int
+) -> List[str]:
+    """
+    Add tasks, check them, and filter open theories.
+
+    :param source_path: a folder with hypotheses
+    :param task_path: a folder for theories with tasks
+    :param target_path: a folder for open theories
+    :param cardinality: a cardinality of finite model to find
+    :returns: sorted names of files in the target folder
+    """
+    add_task(source_path, task_path, TaskType.NITPICK, cardinality)
+    check_assumptions(task_path, "info")
+    filter_theories(task_path, target_path)
+    return sorted(os.listdir(target_path))
+
+
 class TestUseNitpick(TestCase):
     """Test ``use_nitpick`` function."""
 
@@ -53,13 +88,59 @@ class TestUseNitpick(TestCase):
         :param mock_server_start:
         :param mock_get_client:
         """
-        mock_server_start.return_value = ("info", None)
-        mock_client = Mock()
-        mock_client.shutdown = lambda: 0
-        mock_client.use_theories = mock_use_theories
-        mock_get_client.return_value = mock_client
+        mock_client_factory(mock_server_start, mock_get_client)
+        shutil.rmtree("task2", ignore_errors=True)
+        registry = use_nitpick(2, 6 * ["True"], [], True, scratch_path="task2")
+        check_assumptions("task2")
+        self.assertEqual(len(registry.open_hypotheses), 186)
+        self.assertTrue(os.path.exists(os.path.join("task2", "isabelle2.out")))
+
+    @patch("residuated_binars.check_assumptions.get_isabelle_client")
+    @patch("residuated_binars.check_assumptions.start_isabelle_server")
+    def test_folders_pipeline(
+        self, mock_server_start: Mock, mock_get_client: Mock
+    ):
+        """
+        Test a pipeline of ``hyp[n]`` and ``task[n]`` folders.
+
+        :param mock_server_start:
+        :param mock_get_client:
+        """
+        mock_client_factory(mock_server_start, mock_get_client)
         for path in ["hyp2", "hyp3", "task2"]:
             shutil.rmtree(path, ignore_errors=True)
-        use_nitpick(2, 6 * ["True"], [], True)
-        check_assumptions("task2")
+        independence_check("hyp2", 6 * ["True"], [], True)
+        add_task("hyp2", "task2", TaskType.NITPICK, 2)
+        check_assumptions("task2", "info")
+        filter_theories("task2", "hyp3")
         self.assertEqual(len(os.listdir("hyp3")), 186)
+
+    @patch("residuated_binars.check_assumptions.get_isabelle_client")
+    @patch("residuated_binars.check_assumptions.start_isabelle_server")
+    def test_shared_definitions_pipeline(
+        self, mock_server_start: Mock, mock_get_client: Mock
+    ):
+        """
+        Test two rounds of folders pipeline with shared definitions.
+
+        :param mock_server_start:
+        :param mock_get_client:
+        """
+        mock_client_factory(mock_server_start, mock_get_client)
+        paths = ["hyp2", "task2", "hyp3", "task3", "hyp4"]
+        for path in paths:
+            shutil.rmtree(path, ignore_errors=True)
+        independence_check(
+            "hyp2", 6 * ["True"], [], True, shared_definitions=True
+        )
+        self.assertEqual(
+            nitpick_round("hyp2", "task2", "hyp3", 2),
+            nitpick_round("hyp3", "task3", "hyp4", 3),
+        )
+        self.assertIn("Definitions.thy", os.listdir("hyp4"))
+        with open(
+            os.path.join("task3", "Definitions.thy"), "r", encoding="utf-8"
+        ) as theory_file:
+            self.assertIn("finite_type = C0 | C1 | C2", theory_file.read())
+        for path in paths:
+            shutil.rmtree(path)